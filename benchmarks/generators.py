@@ -0,0 +1,149 @@
+"""
+Generadores de datos sintéticos para los benchmarks.
+
+Los registros internos tienen la forma que envía devpipe.js y las líneas
+externas la de un debug.log de WordPress, con errores multilínea incluidos.
+Todo se genera con una semilla fija para que las corridas sean comparables.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional
+
+LEVELS = ("log", "info", "warn", "error", "debug")
+LEVEL_WEIGHTS = (50, 20, 15, 10, 5)
+PAGES = ("/", "/shop", "/shop/product/42", "/cart", "/checkout", "/blog/hello-world", "/wp-admin/edit.php")
+USER_AGENTS = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_6) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0",
+)
+PHP_LEVELS = ("PHP Notice:  ", "PHP Warning:  ", "PHP Deprecated:  ", "PHP Fatal error:  ")
+PHP_MESSAGES = (
+    "Undefined index: product_id in /var/www/html/wp-content/plugins/shop/cart.php on line 118",
+    "Trying to access array offset on value of type null in /var/www/html/wp-includes/class-wp-query.php on line 3624",
+    "Function get_page_by_title is deprecated since version 6.2.0!",
+    "Uncaught Error: Call to undefined function wc_get_product() in /var/www/html/wp-content/themes/shop/functions.php:57",
+)
+
+
+def devpipe_record(rng: random.Random, timestamp: datetime, base_url: str = "http://localhost:8080") -> Dict[str, Any]:
+    """
+    Genera un registro con la forma que envía devpipe.js.
+
+    Args:
+        rng: Generador aleatorio
+        timestamp: Fecha del registro
+        base_url: Origen de las URLs
+
+    Returns:
+        Dict: Registro listo para POST /log
+    """
+    level = rng.choices(LEVELS, LEVEL_WEIGHTS)[0]
+    record: Dict[str, Any] = {
+        "level": level,
+        "message": f"[{level}] carga de componente {rng.randint(1, 500)} en {rng.randint(1, 900)} ms",
+        "url": base_url + rng.choice(PAGES),
+        "timestamp": timestamp.isoformat(timespec="milliseconds") + "Z",
+        "user_agent": rng.choice(USER_AGENTS),
+        "additional_data": {"args_count": rng.randint(1, 3), "page_title": "Tienda de prueba"}
+    }
+    if level == "error":
+        bundle = f"{rng.getrandbits(32):08x}"
+        record["stack_trace"] = "\n".join(
+            f"    at fn{i} ({base_url}/assets/index-{bundle}.js:{rng.randint(1, 4000)}:{rng.randint(1, 80)})"
+            for i in range(rng.randint(2, 6))
+        )
+    return record
+
+
+def iter_devpipe_records(count: int, seed: int = 1, start: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Genera registros de devpipe.js en orden cronológico.
+
+    Args:
+        count: Número de registros
+        seed: Semilla del generador
+        start: Fecha del primer registro
+    """
+    rng = random.Random(seed)
+    timestamp = start or datetime(2026, 1, 1)
+    for _ in range(count):
+        timestamp += timedelta(milliseconds=rng.randint(1, 50))
+        yield devpipe_record(rng, timestamp)
+
+
+def iter_wordpress_lines(count: int, seed: int = 2, start: Optional[datetime] = None) -> Iterator[str]:
+    """
+    Genera líneas de un debug.log de WordPress en orden cronológico.
+
+    Aproximadamente uno de cada veinte registros es un error fatal con stack
+    trace de varias líneas; cada línea (incluidas las de continuación) cuenta.
+
+    Args:
+        count: Número de líneas
+        seed: Semilla del generador
+        start: Fecha del primer registro
+    """
+    rng = random.Random(seed)
+    timestamp = start or datetime(2026, 1, 1)
+    produced = 0
+    while produced < count:
+        timestamp += timedelta(milliseconds=rng.randint(1, 80))
+        stamp = timestamp.strftime("%d-%b-%Y %H:%M:%S")
+        if rng.random() < 0.05:
+            yield f"[{stamp} UTC] PHP Fatal error:  {PHP_MESSAGES[3]}"
+            produced += 1
+            yield "Stack trace:"
+            produced += 1
+            for frame in range(rng.randint(2, 5)):
+                if produced >= count:
+                    return
+                yield f"#{frame} /var/www/html/wp-includes/class-wp-hook.php({rng.randint(1, 400)}): apply_filters()"
+                produced += 1
+        else:
+            yield f"[{stamp} UTC] {rng.choice(PHP_LEVELS[:3])}{rng.choice(PHP_MESSAGES[:3])}"
+            produced += 1
+
+
+def write_internal_log(path: str, count: int, seed: int = 1) -> int:
+    """
+    Escribe un devpipe.log sintético como lo haría LogManager.
+
+    Returns:
+        int: Bytes escritos
+    """
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        batch = []
+        for record in iter_devpipe_records(count, seed):
+            record["server_timestamp"] = record["timestamp"][:-1]
+            batch.append(json.dumps(record))
+            if len(batch) >= 10000:
+                chunk = "\n".join(batch) + "\n"
+                written += f.write(chunk)
+                batch = []
+        if batch:
+            written += f.write("\n".join(batch) + "\n")
+    return written
+
+
+def write_wordpress_log(path: str, count: int, seed: int = 2) -> int:
+    """
+    Escribe un debug.log de WordPress sintético.
+
+    Returns:
+        int: Bytes escritos
+    """
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        batch = []
+        for line in iter_wordpress_lines(count, seed):
+            batch.append(line)
+            if len(batch) >= 10000:
+                written += f.write("\n".join(batch) + "\n")
+                batch = []
+        if batch:
+            written += f.write("\n".join(batch) + "\n")
+    return written
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para DevPipe.
+
+Simula N pestañas con devpipe.js enviando logs a un servidor en marcha: cada
+cliente genera mensajes de consola con una distribución de ritmo configurable,
+tormentas de errores ocasionales, una mezcla de URLs y el mismo esquema de
+cola por lotes del cliente real (se envía al llenarse el lote o al vencer el
+tiempo de espera).
+
+Uso:
+    python -m benchmarks.load_generator --clients 50 --duration 30
+    python -m benchmarks.load_generator --clients 20 --rate 50 --distribution bursty \\
+        --storm-probability 0.05 --storm-size 200 --mode batch --output carga.json
+
+Al terminar informa el throughput conseguido, los percentiles de latencia, la
+tasa de 429 y de errores y, leyendo /metrics antes y después, cuántos logs
+descartó el servidor.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.generators import devpipe_record
+
+DEFAULT_SERVER_URL = "http://localhost:7845"
+DISTRIBUTIONS = ("constant", "poisson", "bursty")
+MODES = ("single", "batch")
+# Fracción del tiempo en ráfaga y multiplicador del ritmo en la distribución 'bursty'
+BURST_SHARE = 0.1
+BURST_FACTOR = 5.0
+# Métrica del servidor con el resultado de cada log recibido
+REQUESTS_METRIC = "devpipe_log_requests_total"
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil por rango más cercano; 0 si no hay valores."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def parse_url_mix(spec: str) -> Tuple[List[str], List[float]]:
+    """
+    Interpreta una mezcla de URLs 'url=peso,url=peso'.
+
+    Returns:
+        Tuple: URLs y sus pesos (1 si no se indica)
+    """
+    urls, weights = [], []
+    for item in spec.split(","):
+        url, _, weight = item.strip().rpartition("=")
+        if not url:
+            url, weight = weight, "1"
+        urls.append(url)
+        weights.append(float(weight))
+    return urls, weights
+
+
+def scrape_log_results(server_url: str) -> Optional[Dict[str, float]]:
+    """
+    Lee de /metrics cuántos logs recibió el servidor por resultado.
+
+    Returns:
+        Optional[Dict[str, float]]: Resultado -> total, o None si no hay /metrics
+    """
+    try:
+        response = requests.get(f"{server_url}/metrics", timeout=5)
+        if response.status_code != 200:
+            return None
+    except requests.RequestException:
+        return None
+
+    results: Dict[str, float] = {}
+    prefix = REQUESTS_METRIC + '{result="'
+    for line in response.text.splitlines():
+        if line.startswith(prefix):
+            labels, _, value = line.rpartition(" ")
+            result = labels[len(prefix):labels.index('"', len(prefix))]
+            results[result] = results.get(result, 0.0) + float(value)
+    return results
+
+
+class LoadStats:
+    """Contadores compartidos por todos los clientes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.status_codes: Counter = Counter()
+        self.response_status: Counter = Counter()
+        self.records_sent = 0
+        self.records_generated = 0
+        self.requests = 0
+        self.exceptions = 0
+        self.retries = 0
+        self.storms = 0
+
+    def record_response(self, latency: float, status_code: int, records: int, body_status: Optional[str]) -> None:
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(latency)
+            self.status_codes[status_code] += 1
+            if body_status:
+                self.response_status[body_status] += 1
+            if status_code < 400:
+                self.records_sent += records
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+
+class SimulatedClient(threading.Thread):
+    """Una pestaña con devpipe.js: genera logs, los encola y los envía por lotes."""
+
+    def __init__(self, index: int, args: argparse.Namespace, stats: LoadStats, stop: threading.Event,
+                 urls: List[str], weights: List[float]):
+        super().__init__(name=f"client-{index}", daemon=True)
+        self.args = args
+        self.stats = stats
+        self.stop_event = stop
+        self.rng = random.Random(args.seed + index)
+        self.base_url = self.rng.choices(urls, weights)[0]
+        self.session = requests.Session()
+        self.queue: List[Dict[str, Any]] = []
+        self.last_flush = time.monotonic()
+        self.bursting = False
+
+    def _next_interval(self) -> float:
+        """Tiempo hasta el siguiente mensaje de consola según la distribución elegida."""
+        rate = self.args.rate
+        if self.args.distribution == "constant":
+            return 1.0 / rate
+        if self.args.distribution == "bursty":
+            # Modulación on/off con la misma media que 'rate'
+            if self.rng.random() < 0.05:
+                self.bursting = self.rng.random() < BURST_SHARE
+            rate = rate * BURST_FACTOR if self.bursting else rate * (1 - BURST_SHARE * BURST_FACTOR) / (1 - BURST_SHARE)
+        return self.rng.expovariate(max(rate, 1e-6))
+
+    def _enqueue(self, record: Dict[str, Any]) -> None:
+        self.queue.append(record)
+        self.stats.add("records_generated")
+        if len(self.queue) >= self.args.batch_size:
+            self._flush()
+
+    def _post(self, endpoint: str, payload: Any, records: int) -> None:
+        """Envía una petición, con reintentos y backoff exponencial como devpipe.js."""
+        for attempt in range(self.args.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.args.url + endpoint, json=payload, timeout=self.args.timeout)
+            except requests.RequestException:
+                self.stats.add("exceptions")
+            else:
+                try:
+                    body_status = response.json().get("status")
+                except (ValueError, AttributeError):
+                    body_status = None
+                self.stats.record_response(time.perf_counter() - start, response.status_code, records, body_status)
+                if response.status_code < 400 or (response.status_code != 429 and response.status_code < 500):
+                    return
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit() and attempt < self.args.max_retries:
+                    time.sleep(int(retry_after))
+                    self.stats.add("retries")
+                    continue
+            if attempt < self.args.max_retries:
+                self.stats.add("retries")
+                time.sleep(self.args.retry_delay * (2 ** attempt))
+
+    def _flush(self) -> None:
+        """Envía la cola: un POST por log (como devpipe.js) o uno por lote."""
+        batch, self.queue = self.queue, []
+        self.last_flush = time.monotonic()
+        if not batch:
+            return
+        if self.args.mode == "batch":
+            self._post(self.args.batch_endpoint, batch, len(batch))
+        else:
+            for record in batch:
+                self._post("/log", record, 1)
+
+    def run(self) -> None:
+        next_message = time.monotonic() + self._next_interval()
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_message:
+                self._enqueue(devpipe_record(self.rng, datetime.utcnow(), self.base_url))
+                next_message += self._next_interval()
+                # Si el cliente se retrasó, no intentar recuperar el tiempo perdido de golpe
+                next_message = max(next_message, now - 1.0)
+            if self.rng.random() < self.args.storm_probability * self.args.tick:
+                self.stats.add("storms")
+                for _ in range(self.args.storm_size):
+                    record = devpipe_record(self.rng, datetime.utcnow(), self.base_url)
+                    record["level"] = "error"
+                    record.setdefault("stack_trace", "    at storm (bundle.js:1:1)")
+                    self._enqueue(record)
+            if self.queue and now - self.last_flush >= self.args.batch_timeout:
+                self._flush()
+            self.stop_event.wait(max(0.0, min(next_message - time.monotonic(), self.args.tick)))
+        self._flush()
+
+
+def build_report(args: argparse.Namespace, stats: LoadStats, elapsed: float,
+                 before: Optional[Dict[str, float]], after: Optional[Dict[str, float]]) -> Dict[str, Any]:
+    """Resume la corrida: throughput, latencias, tasas de error y descartes del servidor."""
+    requests_total = max(stats.requests + stats.exceptions, 1)
+    errors = sum(count for code, count in stats.status_codes.items() if code >= 400) + stats.exceptions
+    report: Dict[str, Any] = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsedSeconds": round(elapsed, 3),
+        "requests": stats.requests,
+        "recordsGenerated": stats.records_generated,
+        "recordsSent": stats.records_sent,
+        "requestsPerSecond": round(stats.requests / elapsed, 2),
+        "recordsPerSecond": round(stats.records_sent / elapsed, 2),
+        "latencyMs": {name: round(percentile(stats.latencies, p) * 1000, 3)
+                      for name, p in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("max", 1.0))},
+        "statusCodes": {str(code): count for code, count in sorted(stats.status_codes.items())},
+        "responseStatus": dict(stats.response_status),
+        "rate429": round(stats.status_codes.get(429, 0) / requests_total, 5),
+        "errorRate": round(errors / requests_total, 5),
+        "exceptions": stats.exceptions,
+        "retries": stats.retries,
+        "errorStorms": stats.storms,
+        "server": None
+    }
+    if before is not None and after is not None:
+        delta = {result: after.get(result, 0) - before.get(result, 0) for result in set(before) | set(after)}
+        report["server"] = {
+            "results": {result: int(value) for result, value in sorted(delta.items()) if value},
+            "dropped": int(sum(value for result, value in delta.items() if result != "accepted"))
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n📊 {report['requests']} peticiones en {report['elapsedSeconds']}s")
+    print(f"   Throughput: {report['requestsPerSecond']} req/s, {report['recordsPerSecond']} logs/s")
+    latency = report["latencyMs"]
+    print(f"   Latencia (ms): p50 {latency['p50']}  p90 {latency['p90']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"   Códigos HTTP: {report['statusCodes']}  respuestas: {report['responseStatus']}")
+    print(f"   429: {report['rate429']:.2%}  errores: {report['errorRate']:.2%}  "
+          f"excepciones: {report['exceptions']}  reintentos: {report['retries']}  tormentas: {report['errorStorms']}")
+    if report["server"] is not None:
+        print(f"   Servidor: {report['server']['results']}  descartados: {report['server']['dropped']}")
+    else:
+        print("   Servidor: /metrics no disponible, sin conteo de descartes")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generador de carga que simula clientes devpipe.js")
+    parser.add_argument("--url", default=DEFAULT_SERVER_URL, help="URL del servidor DevPipe")
+    parser.add_argument("--clients", type=int, default=10, help="Pestañas simuladas")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duración en segundos")
+    parser.add_argument("--rate", type=float, default=5.0, help="Mensajes de consola por segundo por cliente (media)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="poisson",
+                        help="Distribución del ritmo de mensajes")
+    parser.add_argument("--storm-probability", type=float, default=0.0,
+                        help="Probabilidad por segundo de que un cliente lance una tormenta de errores")
+    parser.add_argument("--storm-size", type=int, default=100, help="Errores por tormenta")
+    parser.add_argument("--batch-size", type=int, default=10, help="Tamaño de la cola antes de enviar (devpipe.js: 10)")
+    parser.add_argument("--batch-timeout", type=float, default=2.0,
+                        help="Segundos máximos antes de enviar la cola (devpipe.js: 2)")
+    parser.add_argument("--mode", choices=MODES, default="single",
+                        help="'single' envía un POST /log por log como devpipe.js; 'batch' un POST por lote")
+    parser.add_argument("--batch-endpoint", default="/log/batch", help="Endpoint usado en modo batch")
+    parser.add_argument("--urls", default="http://localhost:8080=3,http://localhost:3000=1",
+                        help="Mezcla de orígenes 'url=peso,...' de las pestañas")
+    parser.add_argument("--max-retries", type=int, default=0, help="Reintentos por petición fallida (devpipe.js: 3)")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="Espera inicial entre reintentos")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Timeout de cada petición")
+    parser.add_argument("--tick", type=float, default=0.05, help="Resolución del bucle de cada cliente")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla de los generadores")
+    parser.add_argument("--output", default=None, help="Guardar el informe en JSON")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+
+    try:
+        status = requests.get(f"{args.url}/monitoring/status", timeout=5).json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ No se pudo conectar con {args.url}: {e}")
+        return 1
+    if not status.get("data", {}).get("isActive", True):
+        print("⚠️  El monitoreo está desactivado: el servidor responderá 'monitoring_disabled'")
+
+    if args.mode == "batch":
+        probe = requests.post(args.url + args.batch_endpoint, json=[], timeout=5)
+        if probe.status_code in (404, 405):
+            print(f"⚠️  {args.batch_endpoint} no existe en el servidor, se usa POST /log por log")
+            args.mode = "single"
+
+    urls, weights = parse_url_mix(args.urls)
+    stats = LoadStats()
+    stop = threading.Event()
+    clients = [SimulatedClient(i, args, stats, stop, urls, weights) for i in range(args.clients)]
+
+    before = scrape_log_results(args.url)
+    print(f"🚀 {args.clients} clientes, {args.rate} msg/s ({args.distribution}), modo {args.mode}, {args.duration}s")
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    try:
+        stop.wait(args.duration)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrumpido, enviando colas pendientes...")
+    stop.set()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+    after = scrape_log_results(args.url)
+
+    report = build_report(args, stats, elapsed, before, after)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Informe guardado en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de DevPipe.
+
+Mide la ingesta (LogManager.write_log y POST /log), la lectura de logs
+recientes, el merge de logs internos y externos (tiempo y memoria) y la
+latencia del FileWatcher entre la escritura de una línea y su lectura.
+
+Uso:
+    python -m benchmarks.run_benchmarks --quick
+    python -m benchmarks.run_benchmarks --sizes 10000,1000000,10000000 --output base.json
+    python -m benchmarks.run_benchmarks --quick --compare base.json --threshold 0.15
+
+Los resultados se guardan en JSON; con --compare se comparan contra una
+corrida anterior y el proceso termina con código 1 si alguna métrica empeora
+más que el umbral.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(REPO_ROOT, "server")
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.generators import iter_devpipe_records, write_internal_log, write_wordpress_log  # noqa: E402
+
+DEFAULT_SIZES = "10000,1000000,10000000"
+QUICK_SIZES = "10000,100000"
+# Tamaño máximo para el que se mide merge_logs completo en memoria
+DEFAULT_LIST_LIMIT = 1000000
+DEFAULT_DATA_DIR = os.path.join(REPO_ROOT, "benchmarks", ".data")
+DEFAULT_THRESHOLD = 0.15
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    """Crea una entrada de resultado; `better` es 'higher' o 'lower'."""
+    return {"value": round(value, 6), "unit": unit, "better": better}
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista no vacía."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _new_log_manager(directory: str):
+    """Crea un LogManager aislado en un directorio temporal, sin rotación."""
+    from core.directory_manager import DirectoryManager
+    from core.log_manager import LogManager
+
+    directory_manager = DirectoryManager(base_dir=directory, tokens_file=os.path.join(directory, "tokens.json"))
+    log_manager = LogManager(base_dir=directory, directory_manager=directory_manager)
+    log_manager.set_max_file_size(1024 * 1024 * 1024)
+    log_manager.start()
+    return log_manager
+
+
+def bench_write_log(work_dir: str, count: int) -> Results:
+    """Throughput de LogManager.write_log y de write_logs por lotes."""
+    records = list(iter_devpipe_records(count))
+    results: Results = {}
+
+    log_manager = _new_log_manager(os.path.join(work_dir, "write_single"))
+    start = time.perf_counter()
+    for record in records:
+        log_manager.write_log(dict(record))
+    elapsed = time.perf_counter() - start
+    results["write_log_records_per_s"] = metric(count / elapsed, "records/s", "higher")
+
+    log_manager = _new_log_manager(os.path.join(work_dir, "write_batch"))
+    start = time.perf_counter()
+    for i in range(0, count, 100):
+        log_manager.write_logs([dict(record) for record in records[i:i + 100]])
+    elapsed = time.perf_counter() - start
+    results["write_logs_batch100_records_per_s"] = metric(count / elapsed, "records/s", "higher")
+    return results
+
+
+def bench_http_log(work_dir: str, count: int) -> Results:
+    """Throughput de POST /log a través de la aplicación Flask (sin red)."""
+    app_dir = os.path.join(work_dir, "http")
+    os.makedirs(app_dir, exist_ok=True)
+    previous_cwd = os.getcwd()
+    os.chdir(app_dir)
+    try:
+        import main
+        # Crea config/ y logs/ en el directorio actual
+        main.init_server()
+        client = main.app.test_client()
+        main.log_manager.set_max_file_size(1024 * 1024)
+        client.post('/monitoring/start')
+        records = list(iter_devpipe_records(count))
+
+        latencies: List[float] = []
+        start = time.perf_counter()
+        for record in records:
+            request_start = time.perf_counter()
+            client.post('/log', json=record)
+            latencies.append(time.perf_counter() - request_start)
+        elapsed = time.perf_counter() - start
+        client.post('/monitoring/stop')
+    finally:
+        os.chdir(previous_cwd)
+
+    return {
+        "http_log_requests_per_s": metric(count / elapsed, "requests/s", "higher"),
+        "http_log_p50_ms": metric(percentile(latencies, 0.50) * 1000, "ms", "lower"),
+        "http_log_p99_ms": metric(percentile(latencies, 0.99) * 1000, "ms", "lower"),
+    }
+
+
+def bench_recent_logs(work_dir: str, sizes: List[int], repeats: int = 5) -> Results:
+    """Latencia de get_recent_logs(100) según el tamaño de devpipe.log."""
+    results: Results = {}
+    for size in sizes:
+        directory = os.path.join(work_dir, f"recent_{size}")
+        log_manager = _new_log_manager(directory)
+        write_internal_log(os.path.join(directory, "devpipe.log"), size)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            log_manager.get_recent_logs(100)
+            timings.append(time.perf_counter() - start)
+        results[f"recent_logs_{size}_ms"] = metric(statistics.median(timings) * 1000, "ms", "lower")
+    return results
+
+
+def _prepare_merge_data(data_dir: str, size: int) -> Dict[str, str]:
+    """Genera (o reutiliza) la mitad de las líneas como devpipe.log y la otra mitad como debug.log."""
+    directory = os.path.join(data_dir, f"merge_{size}")
+    internal = os.path.join(directory, "devpipe.log")
+    external = os.path.join(directory, "debug.log")
+    marker = os.path.join(directory, ".complete")
+    if not os.path.exists(marker):
+        os.makedirs(directory, exist_ok=True)
+        print(f"   generando datos de merge para {size} líneas...")
+        write_internal_log(internal, size // 2)
+        write_wordpress_log(external, size - size // 2)
+        open(marker, "w").close()
+    return {"directory": directory, "internal": internal, "external": external}
+
+
+def _merge_child(data: Dict[str, str], mode: str, conn) -> None:
+    """Proceso hijo: ejecuta un merge y reporta tiempo, registros y memoria máxima."""
+    sys.path.insert(0, SERVER_DIR)
+    from core.config_manager import ConfigManager
+    from core.merge_manager import MergeManager
+
+    config_dir = tempfile.mkdtemp(prefix="devpipe-bench-config-")
+    try:
+        config_manager = ConfigManager(config_file=os.path.join(config_dir, "config.json"))
+        config_manager.set_external_sources([{"name": "wp", "path": data["external"], "parser": "wordpress"}])
+        log_manager = _new_log_manager(data["directory"])
+        merge_manager = MergeManager(log_manager=log_manager, config_manager=config_manager)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        if mode == "list":
+            records = len(merge_manager.merge_logs())
+        else:
+            records = sum(1 for _ in merge_manager.iter_merged_logs())
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        conn.send({"seconds": elapsed, "records": records,
+                   "peak_rss_bytes": rss_after * scale, "rss_growth_bytes": (rss_after - rss_before) * scale})
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+        conn.close()
+
+
+def bench_merge(data_dir: str, sizes: List[int], list_limit: int) -> Results:
+    """Tiempo y memoria de merge_logs / iter_merged_logs, cada uno en un proceso limpio."""
+    results: Results = {}
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        data = _prepare_merge_data(data_dir, size)
+        modes = ["stream"] + (["list"] if size <= list_limit else [])
+        for mode in modes:
+            parent, child = context.Pipe(duplex=False)
+            process = context.Process(target=_merge_child, args=(data, mode, child))
+            process.start()
+            child.close()
+            outcome = parent.recv()
+            process.join()
+            name = f"merge_{mode}_{size}"
+            results[f"{name}_seconds"] = metric(outcome["seconds"], "s", "lower")
+            results[f"{name}_records_per_s"] = metric(outcome["records"] / outcome["seconds"], "records/s", "higher")
+            results[f"{name}_peak_rss_mb"] = metric(outcome["peak_rss_bytes"] / 1024 / 1024, "MB", "lower")
+    return results
+
+
+def bench_watcher(work_dir: str, lines: int, backend: str = "auto") -> Results:
+    """Latencia entre escribir una línea en un archivo y recibirla desde el FileWatcher."""
+    from core.file_watcher import FileWatcher
+
+    directory = os.path.join(work_dir, f"watcher_{backend}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "debug.log")
+    open(path, "w").close()
+
+    written: Dict[str, float] = {}
+    latencies: List[float] = []
+    done = threading.Event()
+    watcher = FileWatcher(backend=backend)
+
+    def on_change(file_path: str) -> None:
+        now = time.perf_counter()
+        for line in watcher.get_new_content(file_path):
+            sent = written.pop(line, None)
+            if sent is not None:
+                latencies.append(now - sent)
+        if len(latencies) >= lines:
+            done.set()
+
+    watcher.add_file(path, on_change)
+    try:
+        with open(path, "a", encoding="utf-8", buffering=1) as f:
+            for i in range(lines):
+                line = f"linea {i}"
+                written[line] = time.perf_counter()
+                f.write(line + "\n")
+                time.sleep(0.005)
+        done.wait(10)
+    finally:
+        watcher.stop()
+
+    if not latencies:
+        return {}
+    prefix = f"watcher_{backend}"
+    return {
+        f"{prefix}_p50_ms": metric(percentile(latencies, 0.50) * 1000, "ms", "lower"),
+        f"{prefix}_p95_ms": metric(percentile(latencies, 0.95) * 1000, "ms", "lower"),
+        f"{prefix}_max_ms": metric(max(latencies) * 1000, "ms", "lower"),
+        f"{prefix}_lines_seen": metric(len(latencies), "lines", "higher"),
+    }
+
+
+def collect_metadata(sizes: List[int]) -> Dict[str, Any]:
+    """Datos del entorno para interpretar los resultados."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "sizes": sizes,
+    }
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """
+    Compara los resultados con una corrida anterior.
+
+    Returns:
+        List[str]: Métricas que empeoraron más que el umbral
+    """
+    regressions = []
+    print(f"\n{'métrica':<45} {'base':>14} {'actual':>14} {'cambio':>9}")
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = -change if current["better"] == "higher" else change
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<45} {base['value']:>14.3f} {current['value']:>14.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de DevPipe")
+    parser.add_argument("--sizes", default=None, help=f"Líneas para el merge (por defecto {DEFAULT_SIZES})")
+    parser.add_argument("--quick", action="store_true", help=f"Tamaños reducidos ({QUICK_SIZES})")
+    parser.add_argument("--only", default="write,http,recent,merge,watcher",
+                        help="Benchmarks a ejecutar, separados por comas")
+    parser.add_argument("--ingest-count", type=int, default=20000, help="Registros para write_log")
+    parser.add_argument("--http-count", type=int, default=5000, help="Peticiones para POST /log")
+    parser.add_argument("--watcher-lines", type=int, default=200, help="Líneas para el FileWatcher")
+    parser.add_argument("--list-limit", type=int, default=DEFAULT_LIST_LIMIT,
+                        help="Tamaño máximo para medir merge_logs completo en memoria")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Caché de datos generados")
+    parser.add_argument("--output", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--compare", default=None, help="Resultados anteriores con los que comparar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Empeoramiento relativo máximo permitido (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in (args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)).split(",")]
+    selected = {name.strip() for name in args.only.split(",")}
+    work_dir = tempfile.mkdtemp(prefix="devpipe-bench-")
+
+    benchmarks: List[tuple] = [
+        ("write", lambda: bench_write_log(work_dir, args.ingest_count)),
+        ("http", lambda: bench_http_log(work_dir, args.http_count)),
+        ("recent", lambda: bench_recent_logs(work_dir, [1000, 10000, 100000])),
+        ("merge", lambda: bench_merge(args.data_dir, sizes, args.list_limit)),
+        ("watcher", lambda: {**bench_watcher(work_dir, args.watcher_lines),
+                             **bench_watcher(work_dir, args.watcher_lines, "polling")}),
+    ]
+
+    results: Results = {}
+    try:
+        for name, run in benchmarks:
+            if name not in selected:
+                continue
+            print(f"⏱️  {name}...")
+            start = time.perf_counter()
+            results.update(run())
+            print(f"   listo en {time.perf_counter() - start:.1f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"meta": collect_metadata(sizes), "results": results}
+    for name, value in sorted(results.items()):
+        print(f"   {name:<45} {value['value']:>14.3f} {value['unit']}")
+
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results",
+                                         f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Resultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} métricas empeoraron más de {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\n✅ Sin regresiones por encima de {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from flask import Blueprint, jsonify, Response
+from typing import Optional, Union
+from core.compactor import SegmentCompactor
+
+# Crear Blueprint para las rutas de compactación
+compaction_routes = Blueprint('compaction_routes', __name__)
+
+# Variable global para el SegmentCompactor (se asignará desde main.py)
+segment_compactor: Optional[SegmentCompactor] = None
+
+def init_segment_compactor(compactor: SegmentCompactor) -> None:
+    """Inicializa el SegmentCompactor desde main.py"""
+    global segment_compactor
+    segment_compactor = compactor
+
+@compaction_routes.route('/api/compaction/status', methods=['GET'])
+def get_compaction_status() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para obtener el estado del compactador y la última pasada."""
+    if segment_compactor is None:
+        return jsonify({"status": "error", "message": "Segment compactor not initialized"}), 500
+    try:
+        return jsonify({
+            "status": "success",
+            "data": segment_compactor.get_status()
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Error interno: {str(e)}"
+        }), 500
+
+@compaction_routes.route('/api/compaction/run', methods=['POST'])
+def run_compaction() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para ejecutar una pasada de compactación inmediatamente."""
+    if segment_compactor is None:
+        return jsonify({"status": "error", "message": "Segment compactor not initialized"}), 500
+    try:
+        result = segment_compactor.run_once()
+        return jsonify({
+            "status": "success",
+            "message": f"Compactación aplicada: {result['mergedSegments']} segmentos en {len(result['archives'])} archivos",
+            "data": result
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Error interno: {str(e)}"
+        }), 500
@@ -0,0 +1,167 @@
+import hmac
+import time
+from flask import Blueprint, jsonify, request, Response, g
+from typing import Optional, Union
+from core.profiler import SamplingProfiler, MemoryTracker, RouteTimings, DEFAULT_SAMPLE_INTERVAL_MS
+
+# Crear Blueprint para las rutas de diagnóstico
+debug_routes = Blueprint('debug_routes', __name__)
+
+# ConfigManager (se asignará desde main.py)
+config_manager = None
+
+profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
+route_timings = RouteTimings()
+
+def init_debug(cm) -> None:
+    """Inicializa las rutas de diagnóstico con el ConfigManager desde main.py"""
+    global config_manager
+    config_manager = cm
+
+def _debug_settings() -> dict:
+    """Sección 'debug' de la configuración actual"""
+    if config_manager is None:
+        return {}
+    return config_manager.get_config().get("debug", {})
+
+@debug_routes.before_request
+def check_debug_enabled() -> Optional[Union[Response, tuple[Response, int]]]:
+    """
+    Las rutas de diagnóstico solo responden si 'debug.enabled' está activo y el token coincide.
+
+    El token es obligatorio: CORS está habilitado para toda la app, así que
+    sin él cualquier página abierta en el navegador podría llamar a estas rutas.
+    """
+    settings = _debug_settings()
+    if not settings.get("enabled", False):
+        return jsonify({"status": "error", "message": "Not found"}), 404
+
+    token = settings.get("token", "")
+    if not token:
+        return jsonify({
+            "status": "error",
+            "message": "Define debug.token en la configuración para usar las rutas de diagnóstico"
+        }), 403
+    if not hmac.compare_digest(request.headers.get("X-Debug-Token", ""), token):
+        return jsonify({"status": "error", "message": "Token de diagnóstico inválido"}), 403
+    return None
+
+@debug_routes.before_app_request
+def start_request_timer() -> None:
+    """Marca el inicio de cada petición para medir su latencia."""
+    if _debug_settings().get("enabled", False):
+        g.debug_request_start = time.perf_counter()
+
+@debug_routes.after_app_request
+def record_request_timing(response: Response) -> Response:
+    """Registra la latencia de la petición por ruta."""
+    start = g.pop("debug_request_start", None)
+    if start is not None:
+        rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        route_timings.record(f"{request.method} {rule}", time.perf_counter() - start)
+    return response
+
+@debug_routes.route('/api/debug/profile/start', methods=['POST'])
+def start_profile() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para iniciar un perfil de CPU por muestreo de todos los hilos."""
+    try:
+        data = request.get_json(silent=True) or {}
+        seconds = float(data.get('seconds', 10))
+        interval_ms = int(data.get('interval_ms', DEFAULT_SAMPLE_INTERVAL_MS))
+        if not profiler.start(seconds, interval_ms):
+            return jsonify({
+                "status": "error",
+                "message": "Ya hay un perfil en curso"
+            }), 409
+        return jsonify({
+            "status": "success",
+            "message": f"Perfil iniciado durante {seconds} segundos",
+            "data": profiler.get_status()
+        })
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Parámetros inválidos: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@debug_routes.route('/api/debug/profile/stop', methods=['POST'])
+def stop_profile() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para detener el perfil en curso antes de tiempo."""
+    profiler.stop()
+    return jsonify({"status": "success", "data": profiler.get_status()})
+
+@debug_routes.route('/api/debug/profile', methods=['GET'])
+def get_profile() -> Union[Response, tuple[Response, int]]:
+    """
+    Endpoint para obtener el resultado del perfil.
+
+    ?format=collapsed devuelve las pilas para flamegraph; ?format=top (por
+    defecto) una tabla por función con muestras propias y acumuladas.
+    """
+    try:
+        output_format = request.args.get('format', 'top')
+        if output_format == 'collapsed':
+            return Response(profiler.collapsed(), mimetype='text/plain')
+        if output_format != 'top':
+            return jsonify({"status": "error", "message": "format debe ser 'top' o 'collapsed'"}), 400
+        limit = request.args.get('limit', default=50, type=int)
+        return jsonify({
+            "status": "success",
+            "data": {
+                **profiler.get_status(),
+                "functions": profiler.top(limit)
+            }
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@debug_routes.route('/api/debug/tracemalloc/start', methods=['POST'])
+def start_tracemalloc() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para activar tracemalloc."""
+    try:
+        data = request.get_json(silent=True) or {}
+        memory_tracker.start(int(data.get('frames', 1)))
+        return jsonify({"status": "success", "data": memory_tracker.get_status()})
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": f"Parámetros inválidos: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@debug_routes.route('/api/debug/tracemalloc/stop', methods=['POST'])
+def stop_tracemalloc() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para desactivar tracemalloc."""
+    memory_tracker.stop()
+    return jsonify({"status": "success", "data": memory_tracker.get_status()})
+
+@debug_routes.route('/api/debug/tracemalloc/snapshot', methods=['POST'])
+def take_tracemalloc_snapshot() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para tomar un snapshot de memoria."""
+    try:
+        limit = request.args.get('limit', default=30, type=int)
+        return jsonify({"status": "success", "data": memory_tracker.snapshot(limit)})
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@debug_routes.route('/api/debug/tracemalloc/diff', methods=['GET'])
+def get_tracemalloc_diff() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para comparar los dos últimos snapshots de memoria."""
+    try:
+        limit = request.args.get('limit', default=30, type=int)
+        return jsonify({"status": "success", "data": memory_tracker.diff(limit)})
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@debug_routes.route('/api/debug/routes', methods=['GET'])
+def get_route_timings() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para obtener los percentiles de latencia por ruta (en ms)."""
+    return jsonify({"status": "success", "data": route_timings.percentiles()})
+
+@debug_routes.route('/api/debug/routes/reset', methods=['POST'])
+def reset_route_timings() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para descartar las latencias registradas."""
+    route_timings.reset()
+    return jsonify({"status": "success", "message": "Latencias descartadas"})
@@ -111,22 +111,38 @@ def remove_directory() -> Union[Response, tuple[Response, int]]:
 
 @directory_routes.route('/api/directories', methods=['GET'])
 def list_directories() -> Union[Response, tuple[Response, int]]:
-    """Endpoint para listar todos los directorios configurados."""
+    """
+    Endpoint para listar los directorios configurados.
+
+    Parámetros opcionales: offset y limit para paginar, y fields (lista
+    separada por comas, p. ej. 'exists,logFile') para elegir los campos de info.
+    """
     if directory_manager is None:
         return jsonify({"status": "error", "message": "Directory manager not initialized"}), 500
     try:
-        directories: List[Dict[str, Any]] = []
-        for token, path in directory_manager.directory_tokens.items():
-            info = directory_manager.get_directory_info(token)
-            directories.append({
-                "token": token,
-                "path": path,
-                "info": info
-            })
+        offset: int = request.args.get('offset', default=0, type=int)
+        limit: Optional[int] = request.args.get('limit', default=None, type=int)
+        if offset < 0 or (limit is not None and limit < 0):
+            return jsonify({
+                "status": "error",
+                "message": "offset y limit deben ser positivos"
+            }), 400
+
+        fields_arg: Optional[str] = request.args.get('fields')
+        fields: Optional[List[str]] = None
+        if fields_arg:
+            fields = [field.strip() for field in fields_arg.split(',') if field.strip()]
+
+        total, directories = directory_manager.get_directories_info(offset, limit, fields)
 
         return jsonify({
             "status": "success",
-            "data": directories
+            "data": directories,
+            "pagination": {
+                "total": total,
+                "offset": offset,
+                "limit": limit
+            }
         })
 
     except Exception as e:
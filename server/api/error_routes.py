@@ -0,0 +1,77 @@
+from flask import Blueprint, jsonify, request, Response
+from dateutil import parser as date_parser
+from typing import Optional, Union
+from core.error_groups import ErrorGroupIndex, GROUP_SORTS
+from core.log_parsers import normalize_timestamp
+
+# Crear Blueprint para las rutas de grupos de errores
+error_routes = Blueprint('error_routes', __name__)
+
+# Variable global para el ErrorGroupIndex (se asignará desde main.py)
+error_group_index: Optional[ErrorGroupIndex] = None
+
+def init_error_group_index(index: ErrorGroupIndex) -> None:
+    """Inicializa el ErrorGroupIndex desde main.py"""
+    global error_group_index
+    error_group_index = index
+
+@error_routes.route('/api/errors/groups', methods=['GET'])
+def get_error_groups() -> Union[Response, tuple[Response, int]]:
+    """
+    Endpoint para listar los errores agrupados por huella.
+
+    Parámetros: sort (count | lastSeen | firstSeen), limit, offset, from y
+    to (grupos vistos en el rango) y token.
+    """
+    if error_group_index is None:
+        return jsonify({"status": "error", "message": "Error group index not initialized"}), 500
+    try:
+        start = normalize_timestamp(date_parser.parse(request.args['from'])) if request.args.get('from') else None
+        end = normalize_timestamp(date_parser.parse(request.args['to'])) if request.args.get('to') else None
+    except (ValueError, OverflowError) as e:
+        return jsonify({"status": "error", "message": f"Fecha inválida: {str(e)}"}), 400
+
+    sort = request.args.get('sort', 'count')
+    if sort not in GROUP_SORTS:
+        return jsonify({
+            "status": "error",
+            "message": f"sort debe ser uno de: {', '.join(GROUP_SORTS)}"
+        }), 400
+    limit = request.args.get('limit', default=50, type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if limit < 0 or offset < 0:
+        return jsonify({
+            "status": "error",
+            "message": "limit y offset no pueden ser negativos"
+        }), 400
+
+    try:
+        return jsonify({
+            "status": "success",
+            "data": error_group_index.list_groups(
+                sort, limit, offset,
+                start.isoformat() if start else None,
+                end.isoformat() if end else None,
+                request.args.get('token') or None
+            )
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@error_routes.route('/api/errors/groups/<fingerprint>', methods=['GET'])
+def get_error_group(fingerprint: str) -> Union[Response, tuple[Response, int]]:
+    """Endpoint para obtener un grupo de errores con sus frames y muestras."""
+    if error_group_index is None:
+        return jsonify({"status": "error", "message": "Error group index not initialized"}), 500
+    group = error_group_index.get_group(fingerprint)
+    if group is None:
+        return jsonify({"status": "error", "message": "Grupo de errores no encontrado"}), 404
+    return jsonify({"status": "success", "data": group})
+
+@error_routes.route('/api/errors/groups', methods=['DELETE'])
+def clear_error_groups() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para descartar todos los grupos de errores."""
+    if error_group_index is None:
+        return jsonify({"status": "error", "message": "Error group index not initialized"}), 500
+    error_group_index.clear()
+    return jsonify({"status": "success", "message": "Grupos de errores descartados"})
@@ -0,0 +1,48 @@
+from flask import Blueprint, jsonify, Response
+from typing import Optional, Union
+from core.retention import RetentionJanitor
+
+# Crear Blueprint para las rutas de retención
+retention_routes = Blueprint('retention_routes', __name__)
+
+# Variable global para el RetentionJanitor (se asignará desde main.py)
+retention_janitor: Optional[RetentionJanitor] = None
+
+def init_retention_janitor(janitor: RetentionJanitor) -> None:
+    """Inicializa el RetentionJanitor desde main.py"""
+    global retention_janitor
+    retention_janitor = janitor
+
+@retention_routes.route('/api/retention/status', methods=['GET'])
+def get_retention_status() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para obtener el estado del janitor y la última pasada."""
+    if retention_janitor is None:
+        return jsonify({"status": "error", "message": "Retention janitor not initialized"}), 500
+    try:
+        return jsonify({
+            "status": "success",
+            "data": retention_janitor.get_status()
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Error interno: {str(e)}"
+        }), 500
+
+@retention_routes.route('/api/retention/run', methods=['POST'])
+def run_retention() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para ejecutar una pasada de retención inmediatamente."""
+    if retention_janitor is None:
+        return jsonify({"status": "error", "message": "Retention janitor not initialized"}), 500
+    try:
+        result = retention_janitor.run_once()
+        return jsonify({
+            "status": "success",
+            "message": f"Retención aplicada: {result['reclaimedBytes']} bytes recuperados",
+            "data": result
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Error interno: {str(e)}"
+        }), 500
@@ -0,0 +1,62 @@
+from flask import Blueprint, jsonify, request, Response
+from dateutil import parser as date_parser
+from typing import Optional, Union
+from core.log_parsers import normalize_timestamp
+from core.rollups import RollupAggregator, ROLLUP_FIELDS, RESOLUTIONS
+
+# Crear Blueprint para las rutas de estadísticas agregadas
+stats_routes = Blueprint('stats_routes', __name__)
+
+# Variable global para el RollupAggregator (se asignará desde main.py)
+rollup_aggregator: Optional[RollupAggregator] = None
+
+def init_rollup_aggregator(aggregator: RollupAggregator) -> None:
+    """Inicializa el RollupAggregator desde main.py"""
+    global rollup_aggregator
+    rollup_aggregator = aggregator
+
+@stats_routes.route('/api/stats/rollup', methods=['GET'])
+def get_rollup() -> Union[Response, tuple[Response, int]]:
+    """
+    Endpoint para obtener conteos agregados por intervalo.
+
+    Parámetros: group_by (campos separados por comas entre level, path,
+    source y token; por defecto level), from, to (fecha de recepción) y
+    resolution (minute | hour; por defecto según el rango).
+    """
+    if rollup_aggregator is None:
+        return jsonify({"status": "error", "message": "Rollup aggregator not initialized"}), 500
+    try:
+        start = normalize_timestamp(date_parser.parse(request.args['from'])) if request.args.get('from') else None
+        end = normalize_timestamp(date_parser.parse(request.args['to'])) if request.args.get('to') else None
+    except (ValueError, OverflowError) as e:
+        return jsonify({"status": "error", "message": f"Fecha inválida: {str(e)}"}), 400
+
+    group_by = [field.strip() for field in request.args.get('group_by', 'level').split(',') if field.strip()]
+    invalid = [field for field in group_by if field not in ROLLUP_FIELDS]
+    if invalid:
+        return jsonify({
+            "status": "error",
+            "message": f"group_by debe contener solo: {', '.join(ROLLUP_FIELDS)}"
+        }), 400
+    resolution = request.args.get('resolution') or None
+    if resolution and resolution not in RESOLUTIONS:
+        return jsonify({
+            "status": "error",
+            "message": f"resolution debe ser uno de: {', '.join(RESOLUTIONS)}"
+        }), 400
+
+    try:
+        return jsonify({
+            "status": "success",
+            "data": rollup_aggregator.query(group_by, start, end, resolution)
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error interno: {str(e)}"}), 500
+
+@stats_routes.route('/api/stats/rollup/status', methods=['GET'])
+def get_rollup_status() -> Union[Response, tuple[Response, int]]:
+    """Endpoint para obtener el tamaño y la cobertura de los agregados."""
+    if rollup_aggregator is None:
+        return jsonify({"status": "error", "message": "Rollup aggregator not initialized"}), 500
+    return jsonify({"status": "success", "data": rollup_aggregator.get_status()})
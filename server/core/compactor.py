@@ -0,0 +1,273 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .metrics import COMPACTED_SEGMENTS, COMPACTION_BYTES
+
+# Intervalo por defecto entre pasadas del compactador
+DEFAULT_INTERVAL_SECONDS = 60
+# Segundos sin escrituras para considerar la ingesta ociosa
+DEFAULT_IDLE_SECONDS = 2
+# Espera máxima entre comprobaciones mientras la ingesta está activa
+IDLE_POLL_SECONDS = 0.25
+# Prioridad (nice) del hilo del compactador en Linux
+COMPACTOR_NICE = 19
+
+KB = 1024
+MB = 1024 * 1024
+
+
+class CompactionCancelled(Exception):
+    """El compactador se detuvo en mitad de una copia."""
+
+
+class SegmentCompactor:
+    """
+    Compacta en segundo plano los segmentos sellados pequeños.
+
+    Con un maxFileSize bajo la rotación deja miles de segmentos diminutos, y
+    cada listado, pasada de retención o lectura de varios segmentos paga un
+    coste por archivo. El compactador agrupa tramos de segmentos consecutivos
+    menores que 'smallSegmentKB' en archivos de hasta 'targetArchiveMB'
+    (opcionalmente comprimidos) con SegmentStore.merge, que reconstruye la
+    entrada del manifiesto. Para no competir con la ingesta el hilo corre con
+    la prioridad mínima, salta las pasadas con la CPU cargada, limita los
+    bytes copiados por segundo y se pausa mientras haya escrituras recientes.
+    """
+
+    def __init__(self, log_manager, directory_manager, config_manager):
+        """
+        Inicializa el compactador.
+
+        Args:
+            log_manager: LogManager con el directorio base y la última escritura
+            directory_manager: DirectoryManager con los directorios por token
+            config_manager: ConfigManager con la sección 'compaction'
+        """
+        self.log_manager = log_manager
+        self.directory_manager = directory_manager
+        self.config_manager = config_manager
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.total_merged_segments = 0
+        self.runs = 0
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de compactación.
+
+        Returns:
+            Dict: Sección 'compaction' de la configuración
+        """
+        return self.config_manager.get_config().get("compaction", {})
+
+    def _get_directories(self) -> Dict[str, Optional[str]]:
+        """
+        Obtiene los directorios de logs a revisar.
+
+        Returns:
+            Dict[str, Optional[str]]: Ruta absoluta -> token (None para el directorio base)
+        """
+        directories: Dict[str, Optional[str]] = {os.path.abspath(self.log_manager.base_dir): None}
+        for token, path in list(self.directory_manager.directory_tokens.items()):
+            directories.setdefault(os.path.abspath(path), token)
+        return directories
+
+    @staticmethod
+    def plan(segments: List[Dict[str, Any]], small_bytes: int, target_bytes: int,
+             settle_seconds: float, now: float) -> List[List[Dict[str, Any]]]:
+        """
+        Elige los tramos de segmentos a compactar.
+
+        Un tramo son segmentos consecutivos menores que `small_bytes` cuyo
+        tamaño sin comprimir no supera `target_bytes`. Se compacta si tiene al
+        menos dos segmentos y está cerrado (lo sigue un segmento grande o
+        llenó el objetivo); el último tramo solo cuando lleva `settle_seconds`
+        sin crecer, para no reescribir el mismo archivo en cada pasada.
+
+        Args:
+            segments: Segmentos sellados del manifiesto, del más antiguo al más reciente
+            small_bytes: Tamaño por debajo del cual un segmento es candidato
+            target_bytes: Tamaño objetivo de cada archivo compactado
+            settle_seconds: Antigüedad mínima del último tramo
+            now: Hora actual (epoch)
+
+        Returns:
+            List[List[Dict]]: Tramos a compactar
+        """
+        plans: List[List[Dict[str, Any]]] = []
+        run: List[Dict[str, Any]] = []
+        run_bytes = 0
+        for segment in segments:
+            size = segment.get("rawBytes", segment["bytes"])
+            if size >= small_bytes or (run and run_bytes + size > target_bytes):
+                if len(run) >= 2:
+                    plans.append(run)
+                run, run_bytes = [], 0
+                if size >= small_bytes:
+                    continue
+            run.append(segment)
+            run_bytes += size
+        if len(run) >= 2 and now - run[-1]["sealedAt"] >= settle_seconds:
+            plans.append(run)
+        return plans
+
+    def _cpu_busy(self, max_load: float) -> bool:
+        """
+        Indica si la carga media supera `max_load` por CPU.
+
+        Returns:
+            bool: False también si el sistema no ofrece getloadavg
+        """
+        if not max_load:
+            return False
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            return False
+        return load / (os.cpu_count() or 1) > max_load
+
+    def _make_pace(self, settings: Dict[str, Any]):
+        """
+        Crea la función de ritmo que SegmentStore.merge llama por bloque copiado.
+
+        Espera mientras la ingesta haya escrito en los últimos 'idleSeconds' y
+        duerme lo necesario para no superar 'maxRateMBps'.
+        """
+        idle_seconds = settings.get("idleSeconds", DEFAULT_IDLE_SECONDS)
+        max_rate = settings.get("maxRateMBps", 0) * MB
+        started = time.monotonic()
+        copied = 0
+
+        def pace(chunk_bytes: int) -> None:
+            nonlocal started, copied
+            while idle_seconds and time.monotonic() - self.log_manager.last_write_at < idle_seconds:
+                if self._stop.wait(IDLE_POLL_SECONDS):
+                    raise CompactionCancelled()
+                # El tiempo de espera no cuenta para el límite de ritmo
+                started, copied = time.monotonic(), 0
+            if self._stop.is_set():
+                raise CompactionCancelled()
+            copied += chunk_bytes
+            if max_rate:
+                ahead = copied / max_rate - (time.monotonic() - started)
+                if ahead > 0 and self._stop.wait(ahead):
+                    raise CompactionCancelled()
+
+        return pace
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Ejecuta una pasada de compactación.
+
+        Returns:
+            Dict: Archivos creados, segmentos absorbidos, bytes copiados y errores
+        """
+        with self._run_lock:
+            settings = self.get_settings()
+            small_bytes = int(settings.get("smallSegmentKB", 1024) * KB)
+            target_bytes = int(settings.get("targetArchiveMB", 16) * MB)
+            settle_seconds = settings.get("settleSeconds", 600)
+            compress = settings.get("compress", True)
+
+            result: Dict[str, Any] = {
+                "startedAt": datetime.now().isoformat(),
+                "archives": [],
+                "mergedSegments": 0,
+                "copiedBytes": 0,
+                "reclaimedBytes": 0,
+                "errors": []
+            }
+
+            if self._cpu_busy(settings.get("maxLoadPerCpu", 0)):
+                result["skipped"] = "cpu_busy"
+            else:
+                pace = self._make_pace(settings)
+                now = time.time()
+                for directory, token in self._get_directories().items():
+                    store = self.log_manager.get_store(directory)
+                    segments = store.segments(include_active=False)
+                    for run in self.plan(segments, small_bytes, target_bytes, settle_seconds, now):
+                        try:
+                            archive = store.merge([segment["seq"] for segment in run], compress, pace)
+                        except CompactionCancelled:
+                            result["skipped"] = "stopped"
+                            break
+                        except OSError as e:
+                            result["errors"].append(f"{directory}: {e}")
+                            continue
+                        if archive is None:
+                            # El manifiesto cambió durante la copia; se reintenta en la siguiente pasada
+                            continue
+                        previous_bytes = sum(segment["bytes"] for segment in run)
+                        result["archives"].append({
+                            "path": os.path.join(directory, archive["file"]),
+                            "segments": len(run),
+                            "records": archive["records"],
+                            "bytes": archive["bytes"]
+                        })
+                        result["mergedSegments"] += len(run)
+                        result["copiedBytes"] += archive["rawBytes"]
+                        result["reclaimedBytes"] += previous_bytes - archive["bytes"]
+                        COMPACTED_SEGMENTS.inc(len(run))
+                        COMPACTION_BYTES.inc(archive["rawBytes"])
+                    if token:
+                        self.directory_manager.invalidate(token)
+                    if result.get("skipped"):
+                        break
+
+            result["finishedAt"] = datetime.now().isoformat()
+            self.last_result = result
+            self.total_merged_segments += result["mergedSegments"]
+            self.runs += 1
+            return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado del compactador.
+
+        Returns:
+            Dict: Configuración, si está activo, totales y la última pasada
+        """
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "settings": self.config_manager.snapshot.to_dict().get("compaction", {}),
+            "runs": self.runs,
+            "totalMergedSegments": self.total_merged_segments,
+            "lastRun": self.last_result
+        }
+
+    def _loop(self) -> None:
+        """Hilo del compactador: una pasada cada 'intervalSeconds' con la prioridad mínima."""
+        try:
+            # En Linux la prioridad es por hilo
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), COMPACTOR_NICE)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            settings = self.get_settings()
+            if settings.get("enabled", True):
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"Error compactando segmentos: {e}")
+            interval = max(settings.get("intervalSeconds", DEFAULT_INTERVAL_SECONDS), 1)
+            if self._stop.wait(interval):
+                return
+
+    def start(self) -> None:
+        """Inicia el hilo del compactador."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="SegmentCompactor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo del compactador (una copia en curso se cancela)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
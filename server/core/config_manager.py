@@ -1,6 +1,74 @@
 import json
 import os
-from typing import Dict, List, Any
+import re
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Pattern, Tuple
+from .log_parsers import get_parser
+
+# Nombre de la fuente creada a partir de la ruta externa heredada (externalLogPath)
+LEGACY_SOURCE_NAME = "wordpress"
+# Nombre reservado con el que los clientes seleccionan los logs internos (devpipe.js)
+INTERNAL_SOURCE_NAME = "devpipe"
+
+
+def _freeze(value: Any) -> Any:
+    """Convierte dicts y listas anidados en vistas de solo lectura."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Convierte una configuración congelada de nuevo en dicts y listas."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class ConfigSnapshot:
+    """
+    Configuración inmutable junto con los datos derivados que usa el camino
+    caliente. Cada cambio crea un snapshot nuevo que se publica con una sola
+    asignación, así que los lectores nunca ven una configuración a medias.
+    """
+
+    __slots__ = ("config", "version", "url_filters", "url_matcher", "max_file_size_bytes", "external_sources")
+
+    def __init__(self, config: Dict[str, Any], external_sources: List[Dict[str, Any]], version: int):
+        """
+        Crea el snapshot.
+
+        Args:
+            config: Configuración completa (se copia)
+            external_sources: Fuentes externas habilitadas y normalizadas
+            version: Número de versión, creciente con cada cambio
+        """
+        self.config: Mapping[str, Any] = _freeze(config)
+        self.version = version
+        self.url_filters: Tuple[str, ...] = tuple(
+            term.strip().lower() for term in config.get("urlFilters", []) if str(term).strip()
+        )
+        # Un único patrón con todos los filtros (whitelist por subcadena)
+        self.url_matcher: Optional[Pattern[str]] = (
+            re.compile("|".join(re.escape(term) for term in self.url_filters)) if self.url_filters else None
+        )
+        self.max_file_size_bytes = int(config.get("maxFileSize", 50) * 1024)
+        self.external_sources: Tuple[Mapping[str, Any], ...] = tuple(_freeze(source) for source in external_sources)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Obtiene una copia mutable y serializable de la configuración.
+
+        Returns:
+            Dict: Configuración
+        """
+        return _thaw(self.config)
+
 
 class ConfigManager:
     def __init__(self, config_file: str = "config/config.json"):
@@ -11,9 +79,23 @@ class ConfigManager:
             config_file: Ruta al archivo de configuración
         """
         self.config_file = config_file
-        self.config = self.load_default_config()
+        self._lock = threading.Lock()
+        self.snapshot = self._build_snapshot(self.load_default_config(), 0)
         self._ensure_config_dir()
         self.load_config()
+
+    @property
+    def config(self) -> Mapping[str, Any]:
+        """Configuración actual (solo lectura)."""
+        return self.snapshot.config
+
+    def _build_snapshot(self, config: Dict[str, Any], version: int) -> ConfigSnapshot:
+        """Crea un snapshot calculando sus datos derivados."""
+        return ConfigSnapshot(config, self._resolve_sources(config), version)
+
+    def _publish(self, config: Dict[str, Any]) -> None:
+        """Publica una configuración nueva reemplazando el snapshot actual."""
+        self.snapshot = self._build_snapshot(config, self.snapshot.version + 1)
     
     def _ensure_config_dir(self):
         """Asegura que existe el directorio de configuración."""
@@ -36,50 +118,176 @@ class ConfigManager:
             "logDir": "logs",
             "monitoring": {
                 "enabled": False,
-                "intervalMs": 1000
+                "intervalMs": 1000,  # Intervalo máximo de sondeo sin actividad
+                "debounceMs": 50,  # Agrupación de eventos del FileWatcher
+                "backend": "auto"  # auto | inotify | polling
             },
             "externalLogPath": "",  # Ruta del archivo de logs externos (WordPress)
-            "mergedLogPath": "logs/devpipe_merged.log"  # Ruta del archivo merged
+            "externalSources": [],  # Fuentes externas adicionales: {name, path, parser, timestampFormat, enabled}
+            "mergedLogPath": "logs/devpipe_merged.log",  # Ruta del archivo merged
+            "parallelParseThresholdMB": 64,  # Tamaño desde el que los logs externos se parsean en paralelo (0 = nunca)
+            "stream": {
+                "maxLatenessMs": 2000,  # Demora máxima de reordenamiento del tail en vivo
+                "pollIntervalMs": 250
+            },
+            "retention": {
+                "enabled": True,
+                "intervalSeconds": 300,
+                "maxDirectoryMB": 100,  # Por directorio, incluido devpipe.log (0 = sin límite)
+                "maxTotalMB": 0,  # Suma de todos los directorios (0 = sin límite)
+                "maxAgeHours": 0,  # Antigüedad máxima de los segmentos rotados (0 = sin límite)
+                "compress": True,  # Comprimir con gzip antes de borrar
+                "directories": {}  # Cuotas por token: {maxDirectoryMB, maxAgeHours}
+            },
+            "compaction": {
+                "enabled": True,
+                "intervalSeconds": 60,
+                "smallSegmentKB": 1024,  # Segmentos sellados menores que esto se compactan
+                "targetArchiveMB": 16,  # Tamaño sin comprimir de cada archivo compactado
+                "settleSeconds": 600,  # Espera antes de compactar el último tramo (aún puede crecer)
+                "compress": True,  # Comprimir con gzip los archivos compactados
+                "maxRateMBps": 8,  # Límite de lectura de la copia (0 = sin límite)
+                "idleSeconds": 2,  # Pausar la copia si hubo escrituras en los últimos N segundos
+                "maxLoadPerCpu": 0.75  # Saltar la pasada si la carga media por CPU es mayor (0 = nunca)
+            },
+            "rollups": {
+                "enabled": True,  # Conteos por minuto y hora de los logs escritos
+                "minuteBuckets": 1440,  # Minutos conservados (24 h); se aplica al reiniciar
+                "hourBuckets": 720,  # Horas conservadas (30 días); se aplica al reiniciar
+                "maxKeysPerBucket": 2000,  # Rutas distintas por bucket antes de agruparlas en <other>
+                "persistPath": "config/rollups.json",
+                "persistIntervalSeconds": 60
+            },
+            "errorGroups": {
+                "enabled": True,  # Agrupar errores por huella de la pila
+                "levels": ["error"],  # Niveles que se agrupan (además de los logs con stack_trace)
+                "maxFrames": 5,  # Frames de la pila que forman la huella
+                "maxGroups": 5000,  # Se descartan los grupos vistos hace más tiempo
+                "samplesPerGroup": 5,  # Últimas apariciones guardadas por grupo
+                "persistPath": "config/error_groups.json",
+                "persistIntervalSeconds": 60
+            },
+            "storage": {
+                "backend": "segments",  # segments (archivos devpipe.log) | sqlite
+                "sqlitePath": "logs/devpipe.sqlite3",  # Base de datos del backend sqlite (modo WAL)
+                "sqliteBatchSize": 500,  # Registros máximos por transacción del escritor
+                "durability": "none",  # none | interval | batch | always (política de fsync)
+                "syncIntervalMs": 1000  # Ventana máxima sin fsync en modo interval
+            },
+            "debug": {
+                "enabled": False,  # Endpoints /api/debug/* de profiling
+                "token": ""  # Obligatorio con enabled: se exige en la cabecera X-Debug-Token
+            }
         }
     
+    def _read_config_file(self) -> Dict[str, Any]:
+        """
+        Lee el archivo de configuración sobre la configuración por defecto.
+
+        Returns:
+            Dict: Configuración completa
+
+        Raises:
+            ValueError: Si el archivo no es JSON válido o una fuente es inválida
+        """
+        config = self.load_default_config()
+        with open(self.config_file, "r", encoding="utf-8") as f:
+            loaded_config = json.load(f)
+        if not isinstance(loaded_config, dict):
+            raise ValueError("La configuración debe ser un objeto JSON")
+        # Actualizar solo las claves que existen en la configuración por defecto
+        for key in config:
+            if key in loaded_config:
+                config[key] = loaded_config[key]
+        if "externalSources" in loaded_config:
+            config["externalSources"] = [self._normalize_source(source) for source in config["externalSources"]]
+        return config
+
     def load_config(self) -> None:
         """Carga la configuración desde el archivo."""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    loaded_config = json.load(f)
-                    # Actualizar solo las claves que existen en la configuración por defecto
-                    for key in self.config:
-                        if key in loaded_config:
-                            self.config[key] = loaded_config[key]
+                config = self._read_config_file()
+                with self._lock:
+                    self._publish(config)
+            else:
+                # Crear el archivo para poder editarlo y observarlo
+                self.save_config()
         except Exception as e:
             print(f"Error cargando configuración: {e}")
             # Si hay error, usar configuración por defecto
             self.save_config()
+
+    def reload(self) -> bool:
+        """
+        Vuelve a leer el archivo de configuración tras una edición externa.
+
+        Si el archivo no es válido (p. ej. a medio guardar) se conserva la
+        configuración actual.
+
+        Returns:
+            bool: True si la configuración cambió
+        """
+        try:
+            config = self._read_config_file()
+        except Exception as e:
+            print(f"Configuración no recargada: {e}")
+            return False
+
+        with self._lock:
+            if config == self.snapshot.to_dict():
+                return False
+            self._publish(config)
+        print("🔄 Configuración recargada desde el archivo")
+        return True
     
     def save_config(self) -> bool:
         """
-        Guarda la configuración en el archivo.
+        Guarda la configuración en el archivo de forma atómica.
         
         Returns:
             bool: True si la configuración se guardó correctamente
         """
         try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=2)
+            temp_file = f"{self.config_file}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot.to_dict(), f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.config_file)
             return True
         except Exception as e:
             print(f"Error guardando configuración: {e}")
             return False
+
+    def _update(self, changes: Dict[str, Any]) -> bool:
+        """
+        Aplica cambios sobre una copia de la configuración, publica el
+        snapshot resultante y lo guarda.
+
+        Args:
+            changes: Claves a reemplazar
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        with self._lock:
+            config = self.snapshot.to_dict()
+            config.update(changes)
+            self._publish(config)
+            return self.save_config()
     
-    def get_config(self) -> Dict[str, Any]:
+    def get_config(self) -> Mapping[str, Any]:
         """
         Obtiene la configuración actual.
+
+        El resultado es de solo lectura; para una copia modificable o
+        serializable usar `snapshot.to_dict()`.
         
         Returns:
-            Dict: Configuración actual
+            Mapping: Configuración actual
         """
-        return self.config
+        return self.snapshot.config
     
     def update_config(self, new_config: Dict[str, Any]) -> bool:
         """
@@ -92,12 +300,14 @@ class ConfigManager:
             bool: True si la configuración se actualizó correctamente
         """
         try:
+            if "externalSources" in new_config:
+                new_config = {
+                    **new_config,
+                    "externalSources": [self._normalize_source(source) for source in new_config["externalSources"]]
+                }
+
             # Solo actualizar claves válidas
-            for key in self.config:
-                if key in new_config:
-                    self.config[key] = new_config[key]
-            
-            return self.save_config()
+            return self._update({key: new_config[key] for key in self.config if key in new_config})
         except Exception as e:
             print(f"Error actualizando configuración: {e}")
             return False
@@ -109,7 +319,7 @@ class ConfigManager:
         Returns:
             List[str]: Lista de filtros
         """
-        return self.config.get("urlFilters", [])
+        return list(self.config.get("urlFilters", ()))
 
     def get_external_log_path(self) -> str:
         """
@@ -131,8 +341,7 @@ class ConfigManager:
             bool: True si se guardó correctamente
         """
         try:
-            self.config["externalLogPath"] = path
-            return self.save_config()
+            return self._update({"externalLogPath": path})
         except Exception as e:
             print(f"Error estableciendo ruta externa: {e}")
             return False
@@ -157,8 +366,123 @@ class ConfigManager:
             bool: True si se guardó correctamente
         """
         try:
-            self.config["mergedLogPath"] = path
-            return self.save_config()
+            return self._update({"mergedLogPath": path})
         except Exception as e:
             print(f"Error estableciendo ruta merged: {e}")
             return False
+
+    @staticmethod
+    def _normalize_source(source: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Valida y completa la definición de una fuente externa.
+
+        Args:
+            source: Definición de la fuente
+
+        Returns:
+            Dict: Definición normalizada
+
+        Raises:
+            ValueError: Si la definición es inválida
+        """
+        if not isinstance(source, dict):
+            raise ValueError("Cada fuente debe ser un objeto")
+
+        name = str(source.get("name", "")).strip()
+        path = str(source.get("path", "")).strip()
+        if not name:
+            raise ValueError("La fuente debe tener un nombre")
+        if name == INTERNAL_SOURCE_NAME:
+            raise ValueError(f"El nombre '{INTERNAL_SOURCE_NAME}' está reservado para los logs internos")
+        if not path or not os.path.isabs(path):
+            raise ValueError(f"La ruta de la fuente '{name}' debe ser absoluta")
+
+        parser_name = source.get("parser") or LEGACY_SOURCE_NAME
+        get_parser(parser_name)
+
+        return {
+            "name": name,
+            "path": path,
+            "parser": parser_name,
+            "timestampFormat": source.get("timestampFormat") or "",
+            "enabled": bool(source.get("enabled", True))
+        }
+
+    def _resolve_sources(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Calcula las fuentes externas habilitadas de una configuración.
+
+        La ruta heredada `externalLogPath` se expone como la fuente "wordpress".
+
+        Args:
+            config: Configuración completa
+
+        Returns:
+            List[Dict]: Lista de fuentes
+        """
+        sources: List[Dict[str, Any]] = []
+        legacy_path = config.get("externalLogPath", "")
+        if legacy_path:
+            sources.append({
+                "name": LEGACY_SOURCE_NAME,
+                "path": legacy_path,
+                "parser": LEGACY_SOURCE_NAME,
+                "timestampFormat": "",
+                "enabled": True
+            })
+
+        seen = {source["name"] for source in sources}
+        for source in config.get("externalSources", []):
+            try:
+                normalized = self._normalize_source(source)
+            except ValueError as e:
+                print(f"Fuente externa ignorada: {e}")
+                continue
+            if normalized["name"] in seen or not normalized["enabled"]:
+                continue
+            seen.add(normalized["name"])
+            sources.append(normalized)
+        return sources
+
+    def get_external_sources(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene las fuentes de logs externos habilitadas.
+
+        La ruta heredada `externalLogPath` se expone como la fuente "wordpress".
+
+        Args:
+            names: Nombres de las fuentes a incluir (None = todas)
+
+        Returns:
+            List[Dict]: Lista de fuentes
+        """
+        return [
+            dict(source) for source in self.snapshot.external_sources
+            if names is None or source["name"] in names
+        ]
+
+    def set_external_sources(self, sources: List[Dict[str, Any]]) -> bool:
+        """
+        Establece la lista de fuentes externas adicionales.
+
+        Args:
+            sources: Lista de definiciones de fuentes
+
+        Returns:
+            bool: True si se guardó correctamente
+
+        Raises:
+            ValueError: Si alguna fuente es inválida o hay nombres repetidos
+        """
+        normalized = [self._normalize_source(source) for source in sources]
+        names = [source["name"] for source in normalized]
+        if len(names) != len(set(names)):
+            raise ValueError("Los nombres de las fuentes deben ser únicos")
+        if self.get_external_log_path() and LEGACY_SOURCE_NAME in names:
+            raise ValueError(f"El nombre '{LEGACY_SOURCE_NAME}' está reservado para externalLogPath")
+
+        try:
+            return self._update({"externalSources": normalized})
+        except Exception as e:
+            print(f"Error estableciendo fuentes externas: {e}")
+            return False
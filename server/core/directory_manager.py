@@ -1,26 +1,55 @@
 import os
 import secrets
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Iterable, List, Tuple
+
+# Modos de persistencia de los tokens
+PERSIST_MODES = ('atomic', 'journal')
+# Entradas del journal a partir de las cuales se compacta en el archivo principal
+JOURNAL_COMPACT_ENTRIES = 500
+# Segundos que se reutiliza la información de un directorio
+DEFAULT_INFO_TTL = 5.0
+# Hilos para consultar en paralelo la información de varios directorios
+INFO_WORKERS = 8
+# Campos de la información que requieren llamadas al sistema de archivos
+STAT_FIELDS = {"exists", "isWritable", "created", "lastModified", "logFile"}
 
 class DirectoryManager:
-    def __init__(self, base_dir: str = "logs", tokens_file: str = "config/directory_tokens.json"):
+    def __init__(self, base_dir: str = "logs", tokens_file: str = "config/directory_tokens.json",
+                 persist_mode: str = "journal", info_ttl: float = DEFAULT_INFO_TTL):
         """
         Inicializa el gestor de directorios.
 
         Args:
             base_dir: Directorio base para logs por defecto
             tokens_file: Archivo para persistir los tokens
+            persist_mode: 'atomic' reescribe el archivo completo en cada cambio;
+                'journal' añade cada cambio a `<tokens_file>.journal` y lo
+                compacta en el archivo principal cada JOURNAL_COMPACT_ENTRIES
+            info_ttl: Segundos que se cachea la información de cada directorio
         """
         self.base_dir = base_dir
         self.tokens_file = tokens_file
+        self.journal_file = f"{tokens_file}.journal"
+        self.persist_mode = persist_mode if persist_mode in PERSIST_MODES else "journal"
         self.directory_tokens: Dict[str, str] = {}
+        # Índice inverso ruta -> token, sincronizado con directory_tokens
+        self.path_tokens: Dict[str, str] = {}
+        self._journal_entries = 0
+        self._lock = threading.RLock()
+        self.info_ttl = info_ttl
+        # Token -> (expiración, información del directorio)
+        self._info_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
         self._load_tokens()
         self._clean_duplicate_tokens()
     
     def _load_tokens(self):
-        """Carga los tokens guardados desde el archivo."""
+        """Carga los tokens guardados desde el archivo y aplica el journal pendiente."""
         try:
             if os.path.exists(self.tokens_file):
                 with open(self.tokens_file, 'r') as f:
@@ -28,15 +57,76 @@ class DirectoryManager:
         except Exception as e:
             print(f"Error cargando tokens: {e}")
             self.directory_tokens = {}
+
+        if os.path.exists(self.journal_file):
+            try:
+                with open(self.journal_file, 'r') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # Última línea a medio escribir por una caída
+                            continue
+                        if entry.get("op") == "add":
+                            self.directory_tokens[entry["token"]] = entry["path"]
+                        elif entry.get("op") == "remove":
+                            self.directory_tokens.pop(entry["token"], None)
+                        self._journal_entries += 1
+            except Exception as e:
+                print(f"Error cargando journal de tokens: {e}")
+
+        self.path_tokens = {path: token for token, path in self.directory_tokens.items()}
+        if self._journal_entries:
+            self._save_tokens()
     
     def _save_tokens(self):
-        """Guarda los tokens en el archivo."""
-        try:
-            os.makedirs(os.path.dirname(self.tokens_file), exist_ok=True)
-            with open(self.tokens_file, 'w') as f:
-                json.dump(self.directory_tokens, f, indent=2)
-        except Exception as e:
-            print(f"Error guardando tokens: {e}")
+        """Guarda todos los tokens en el archivo de forma atómica y vacía el journal."""
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.tokens_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_file = f"{self.tokens_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(self.directory_tokens, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.tokens_file)
+
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+                self._journal_entries = 0
+            except Exception as e:
+                print(f"Error guardando tokens: {e}")
+
+    def _persist_change(self, entry: Dict[str, str]):
+        """
+        Persiste un cambio de token según el modo configurado.
+
+        Args:
+            entry: Operación {"op": "add"|"remove", "token", "path"}
+        """
+        if self.persist_mode != "journal":
+            self._save_tokens()
+            return
+
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.journal_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.journal_file, 'a') as f:
+                    f.write(json.dumps(entry) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_entries += 1
+            except Exception as e:
+                print(f"Error escribiendo journal de tokens: {e}")
+                self._save_tokens()
+                return
+
+            if self._journal_entries >= JOURNAL_COMPACT_ENTRIES:
+                self._save_tokens()
     
     def _generate_token(self, length: int = 32) -> str:
         """Genera un token único."""
@@ -81,18 +171,20 @@ class DirectoryManager:
             # Verificar que el directorio existe o se puede crear
             os.makedirs(abs_path, exist_ok=True)
             
-            # Verificar si el directorio ya tiene un token asignado
-            for existing_token, existing_path in self.directory_tokens.items():
-                if existing_path == abs_path:
+            with self._lock:
+                # Verificar si el directorio ya tiene un token asignado
+                existing_token = self.path_tokens.get(abs_path)
+                if existing_token is not None:
                     return existing_token
-            
-            # Si no existe, generar nuevo token
-            token = self._generate_token()
-            
-            # Guardar mapeo token -> ruta
-            self.directory_tokens[token] = abs_path
-            self._save_tokens()
-            
+
+                # Si no existe, generar nuevo token
+                token = self._generate_token()
+
+                # Guardar mapeo token -> ruta
+                self.directory_tokens[token] = abs_path
+                self.path_tokens[abs_path] = token
+                self._persist_change({"op": "add", "token": token, "path": abs_path})
+
             return token
             
         except Exception as e:
@@ -120,30 +212,73 @@ class DirectoryManager:
         Returns:
             bool: True si se eliminó correctamente
         """
-        if token in self.directory_tokens:
-            del self.directory_tokens[token]
-            self._save_tokens()
+        with self._lock:
+            path = self.directory_tokens.pop(token, None)
+            if path is None:
+                return False
+            if self.path_tokens.get(path) == token:
+                del self.path_tokens[path]
+            self._info_cache.pop(token, None)
+            self._persist_change({"op": "remove", "token": token})
             return True
-        return False
-    
-    def get_directory_info(self, token: str) -> Dict[str, Any]:
+
+    def get_token(self, directory_path: str) -> Optional[str]:
         """
-        Obtiene información sobre el directorio asociado a un token.
+        Obtiene el token registrado para un directorio.
 
         Args:
-            token: Token del directorio
+            directory_path: Ruta al directorio
 
         Returns:
-            Dict[str, Any]: Información del directorio o diccionario vacío si no existe
+            Optional[str]: Token o None si el directorio no está registrado
         """
-        directory = self.get_directory(token)
-        if not directory:
-            return {}
+        return self.path_tokens.get(os.path.abspath(directory_path))
+
+    def flush(self):
+        """Compacta el journal pendiente en el archivo principal."""
+        with self._lock:
+            if self._journal_entries:
+                self._save_tokens()
+    
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """
+        Descarta la información cacheada de un directorio.
+
+        Args:
+            token: Token del directorio (None = todos)
+        """
+        if token is None:
+            self._info_cache.clear()
+        else:
+            self._info_cache.pop(token, None)
+
+    def invalidate_path(self, path: str) -> None:
+        """
+        Descarta la información cacheada del directorio que contiene una ruta.
 
+        Args:
+            path: Directorio registrado o archivo dentro de él
+        """
+        path = os.path.abspath(path)
+        token = self.path_tokens.get(path) or self.path_tokens.get(os.path.dirname(path))
+        if token is not None:
+            self._info_cache.pop(token, None)
+
+    @staticmethod
+    def _read_directory_info(directory: str) -> Dict[str, Any]:
+        """
+        Consulta el sistema de archivos para obtener la información de un directorio.
+
+        Args:
+            directory: Ruta del directorio
+
+        Returns:
+            Dict[str, Any]: Información del directorio y de su devpipe.log
+        """
         info: Dict[str, Any] = {
             "path": directory,
-            "exists": os.path.exists(directory),
-            "isWritable": os.access(directory, os.W_OK),
+            "exists": False,
+            "isWritable": False,
             "created": None,
             "lastModified": None,
             "logFile": {
@@ -154,22 +289,103 @@ class DirectoryManager:
             }
         }
 
-        if info["exists"]:
+        try:
             stat = os.stat(directory)
-            info["created"] = datetime.fromtimestamp(stat.st_ctime).isoformat()
-            info["lastModified"] = datetime.fromtimestamp(stat.st_mtime).isoformat()
+        except OSError:
+            return info
+
+        info["exists"] = True
+        info["isWritable"] = os.access(directory, os.W_OK)
+        info["created"] = datetime.fromtimestamp(stat.st_ctime).isoformat()
+        info["lastModified"] = datetime.fromtimestamp(stat.st_mtime).isoformat()
+
+        # Verificar el archivo devpipe.log
+        log_file_path = os.path.join(directory, "devpipe.log")
+        info["logFile"]["path"] = log_file_path
+        try:
+            log_stat = os.stat(log_file_path)
+            info["logFile"]["exists"] = True
+            info["logFile"]["size"] = log_stat.st_size
+            info["logFile"]["lastModified"] = datetime.fromtimestamp(log_stat.st_mtime).isoformat()
+        except OSError:
+            pass
+
+        return info
+
+    def get_directory_info(self, token: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Obtiene información sobre el directorio asociado a un token.
+
+        La información se cachea durante `info_ttl` segundos; las escrituras en
+        el directorio la invalidan antes de tiempo.
+
+        Args:
+            token: Token del directorio
+            fields: Campos a incluir (None = todos)
+
+        Returns:
+            Dict[str, Any]: Información del directorio o diccionario vacío si no existe
+        """
+        directory = self.get_directory(token)
+        if not directory:
+            return {}
 
-            # Verificar el archivo devpipe.log
-            log_file_path = os.path.join(directory, "devpipe.log")
-            info["logFile"]["path"] = log_file_path
+        fields = set(fields) if fields is not None else None
+        if fields is not None and not fields & STAT_FIELDS:
+            # No hace falta consultar el sistema de archivos
+            return {"path": directory} if "path" in fields else {}
 
-            if os.path.exists(log_file_path):
-                info["logFile"]["exists"] = True
-                log_stat = os.stat(log_file_path)
-                info["logFile"]["size"] = log_stat.st_size
-                info["logFile"]["lastModified"] = datetime.fromtimestamp(log_stat.st_mtime).isoformat()
+        cached = self._info_cache.get(token)
+        if cached is not None and cached[0] > time.monotonic() and cached[1]["path"] == directory:
+            info = cached[1]
+        else:
+            info = self._read_directory_info(directory)
+            self._info_cache[token] = (time.monotonic() + self.info_ttl, info)
 
+        info = dict(info, logFile=dict(info["logFile"]))
+        if fields is not None:
+            info = {key: value for key, value in info.items() if key in fields}
         return info
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Obtiene el pool de hilos para consultar directorios, creándolo la primera vez."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=INFO_WORKERS, thread_name_prefix="directory-info")
+            return self._executor
+
+    def get_directories_info(self, offset: int = 0, limit: Optional[int] = None,
+                             fields: Optional[Iterable[str]] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Obtiene la información de una página de directorios registrados.
+
+        Las consultas al sistema de archivos de los directorios se hacen en
+        paralelo, de modo que un montaje lento no bloquea a los demás.
+
+        Args:
+            offset: Posición del primer directorio
+            limit: Número máximo de directorios (None = todos)
+            fields: Campos de la información a incluir (None = todos)
+
+        Returns:
+            Tuple[int, List[Dict]]: Total de directorios y la página con
+            {token, path, info}
+        """
+        with self._lock:
+            items = list(self.directory_tokens.items())
+        page = items[offset:offset + limit] if limit is not None else items[offset:]
+        fields = list(fields) if fields is not None else None
+
+        tokens = [token for token, _ in page]
+        if len(tokens) > 1:
+            infos = list(self._get_executor().map(lambda token: self.get_directory_info(token, fields), tokens))
+        else:
+            infos = [self.get_directory_info(token, fields) for token in tokens]
+
+        return len(items), [
+            {"token": token, "path": path, "info": info}
+            for (token, path), info in zip(page, infos)
+        ]
     
     def _clean_duplicate_tokens(self):
         """Limpia los tokens duplicados manteniendo solo uno por directorio."""
@@ -186,6 +402,7 @@ class DirectoryManager:
         # Eliminar tokens duplicados
         for token in tokens_to_remove:
             del self.directory_tokens[token]
+        self.path_tokens = unique_paths
 
         # Guardar cambios si se eliminó algún duplicado
         if tokens_to_remove:
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Archivo donde se persiste el índice de grupos
+DEFAULT_ERROR_GROUPS_PATH = "config/error_groups.json"
+# Intervalo por defecto entre guardados
+DEFAULT_PERSIST_INTERVAL_SECONDS = 60
+# Frames de la pila que forman parte de la huella
+DEFAULT_MAX_FRAMES = 5
+# Criterios de orden de los grupos
+GROUP_SORTS = ("count", "lastSeen", "firstSeen")
+# Longitud máxima del título y del mensaje de las muestras
+MAX_TITLE_LENGTH = 200
+
+# Línea de una pila: V8 ('    at fn (url:1:2)') o Firefox/Safari ('fn@url:1:2')
+_FRAME_LINE = re.compile(r'^\s*at\s|^[^\s@]*@\S*:\d+')
+# Tipo de error al inicio de la pila o del mensaje: 'TypeError: ...'
+_ERROR_TYPE = re.compile(r'^\s*(?:Uncaught\s+)?([A-Z][A-Za-z0-9_.]*(?:Error|Exception))\b')
+# Origen de las URLs (esquema y host)
+_ORIGIN = re.compile(r'\b[a-z][a-z0-9+.-]*://[^/\s)]*')
+# Query string y fragmento de las URLs
+_QUERY = re.compile(r'[?#][^\s():]*')
+# Línea y columna al final de una ubicación: ':10:5', ':10' o ' on line 10'
+_LINE_COLUMN = re.compile(r'(?::\d+){1,2}(?=\)?$|\s)| on line \d+')
+# Hash de bundle antes de la extensión: app.3f2a1b9c.js, chunk-4f3a2b1c.js, index-BdQq_4o1.js
+_BUNDLE_HASH = re.compile(r'[.-](?:[0-9a-f]{6,}|(?=[A-Za-z0-9_]*\d)[A-Za-z0-9_]{8,})(?=\.(?:m?js|css)\b)')
+# Identificadores y números largos de los mensajes
+_IDENTIFIER = re.compile(r'\b(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                         r'|[0-9a-fA-F]{16,}|\d{5,})\b')
+
+
+def normalize_frame(frame: str) -> str:
+    """
+    Normaliza una línea de pila para que no dependa del despliegue.
+
+    Quita el origen, la query string, el hash del bundle y la línea y
+    columna, de modo que el mismo punto del código da el mismo frame en
+    cada build y en cada entorno.
+
+    Args:
+        frame: Línea de la pila
+
+    Returns:
+        str: Frame normalizado
+    """
+    frame = _ORIGIN.sub('', frame.strip())
+    frame = _QUERY.sub('', frame)
+    frame = _LINE_COLUMN.sub('', frame)
+    return _BUNDLE_HASH.sub('', frame)
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normaliza la primera línea de un mensaje de error.
+
+    Args:
+        message: Mensaje del log
+
+    Returns:
+        str: Mensaje sin rutas variables, ubicaciones ni identificadores
+    """
+    first_line = message.strip().split('\n', 1)[0]
+    return _IDENTIFIER.sub('<id>', normalize_frame(first_line))[:MAX_TITLE_LENGTH]
+
+
+def fingerprint(log_data: Dict[str, Any], max_frames: int = DEFAULT_MAX_FRAMES) -> Tuple[str, str, List[str]]:
+    """
+    Calcula la huella de un error.
+
+    Con pila, la huella es el tipo de error más los primeros `max_frames`
+    frames normalizados, así que el mismo fallo con datos distintos en el
+    mensaje cae en el mismo grupo. Sin pila se usa el mensaje normalizado.
+
+    Args:
+        log_data: Log con message y opcionalmente stack_trace
+        max_frames: Frames que forman parte de la huella
+
+    Returns:
+        Tuple[str, str, List[str]]: Huella, tipo de error y frames normalizados
+    """
+    message = str(log_data.get("message") or "")
+    stack = str(log_data.get("stack_trace") or "")
+    frames = [normalize_frame(line) for line in stack.split('\n') if _FRAME_LINE.search(line)][:max_frames]
+    match = _ERROR_TYPE.match(stack) or _ERROR_TYPE.match(message)
+    error_type = match.group(1) if match else "Error"
+
+    if frames:
+        key = "\n".join([error_type, *frames])
+    else:
+        key = "\n".join([error_type, normalize_message(message)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16], error_type, frames
+
+
+class ErrorGroupIndex:
+    """
+    Índice incremental de errores agrupados por huella.
+
+    Se alimenta como listener de LogManager.write_logs: cada error escrito
+    suma uno a su grupo, que guarda el conteo, la primera y la última vez
+    que se vio, el conteo por token y las últimas muestras. Cada muestra se
+    localiza por su server_timestamp, que LogManager asigna distinto a cada
+    registro, y su token (con /logs/query?from=<ts>&to=<ts> devuelve solo
+    ese registro); el localizador sigue siendo válido tras rotar, compactar o
+    comprimir segmentos y con cualquier backend. El índice está
+    acotado a 'maxGroups' grupos (se descartan los vistos hace más tiempo) y
+    se persiste periódicamente como los agregados de /api/stats/rollup.
+    """
+
+    def __init__(self, config_manager):
+        """
+        Inicializa el índice y carga el guardado.
+
+        Args:
+            config_manager: ConfigManager con la sección 'errorGroups'
+        """
+        self.config_manager = config_manager
+        self.path = self.get_settings().get("persistPath") or DEFAULT_ERROR_GROUPS_PATH
+        # Huella -> grupo, del visto hace más tiempo al más reciente
+        self.groups: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_saved_at: Optional[str] = None
+        self.load()
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de la agrupación de errores.
+
+        Returns:
+            Dict: Sección 'errorGroups' de la configuración
+        """
+        return self.config_manager.get_config().get("errorGroups", {})
+
+    def observe(self, logs: List[Dict[str, Any]], token: Optional[str]) -> None:
+        """
+        Agrupa los errores de un lote de logs escritos (listener de LogManager).
+
+        Args:
+            logs: Logs escritos, con server_timestamp
+            token: Token del directorio donde se escribieron
+        """
+        settings = self.get_settings()
+        if not settings.get("enabled", True):
+            return
+        levels = settings.get("levels", ["error"])
+        errors = [log_data for log_data in logs if log_data.get("level") in levels or log_data.get("stack_trace")]
+        if not errors:
+            return
+
+        max_frames = settings.get("maxFrames", DEFAULT_MAX_FRAMES)
+        max_groups = max(settings.get("maxGroups", 5000), 1)
+        max_samples = max(settings.get("samplesPerGroup", 5), 0)
+        token_name = token or "default"
+        fingerprinted = [(log_data, *fingerprint(log_data, max_frames)) for log_data in errors]
+
+        with self._lock:
+            for log_data, key, error_type, frames in fingerprinted:
+                seen = log_data.get("server_timestamp") or datetime.now().isoformat()
+                group = self.groups.get(key)
+                if group is None:
+                    group = self.groups[key] = {
+                        "fingerprint": key,
+                        "type": error_type,
+                        "title": str(log_data.get("message") or "").strip().split('\n', 1)[0][:MAX_TITLE_LENGTH],
+                        "frames": frames,
+                        "count": 0,
+                        "firstSeen": seen,
+                        "lastSeen": seen,
+                        "tokens": {},
+                        "samples": []
+                    }
+                    while len(self.groups) > max_groups:
+                        self.groups.popitem(last=False)
+                else:
+                    self.groups.move_to_end(key)
+                group["count"] += 1
+                group["lastSeen"] = max(group["lastSeen"], seen)
+                group["tokens"][token_name] = group["tokens"].get(token_name, 0) + 1
+                if max_samples:
+                    group["samples"].append({
+                        "serverTimestamp": seen,
+                        "token": token,
+                        "url": log_data.get("url"),
+                        "message": str(log_data.get("message") or "")[:MAX_TITLE_LENGTH]
+                    })
+                    del group["samples"][:-max_samples]
+            self._dirty = True
+
+    def list_groups(self, sort: str = "count", limit: int = 50, offset: int = 0, start: Optional[str] = None,
+                    end: Optional[str] = None, token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lista los grupos de errores.
+
+        Args:
+            sort: Uno de GROUP_SORTS (descendente)
+            limit: Máximo de grupos
+            offset: Grupos a saltar
+            start: Solo grupos vistos desde esta fecha (ISO local)
+            end: Solo grupos vistos hasta esta fecha (ISO local)
+            token: Solo grupos con errores en este token
+
+        Returns:
+            Dict: Total de grupos que cumplen los filtros y la página pedida (sin muestras)
+        """
+        with self._lock:
+            selected = [
+                {key: value for key, value in group.items() if key != "samples"}
+                for group in self.groups.values()
+                if (start is None or group["lastSeen"] >= start)
+                and (end is None or group["firstSeen"] <= end)
+                and (token is None or token in group["tokens"])
+            ]
+        selected.sort(key=lambda group: group[sort], reverse=True)
+        return {
+            "total": len(selected),
+            "groups": selected[offset:offset + limit]
+        }
+
+    def get_group(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un grupo con sus muestras.
+
+        Args:
+            key: Huella del grupo
+
+        Returns:
+            Optional[Dict]: Copia del grupo, o None si no existe
+        """
+        with self._lock:
+            group = self.groups.get(key)
+            return json.loads(json.dumps(group)) if group is not None else None
+
+    def clear(self) -> None:
+        """Descarta todos los grupos."""
+        with self._lock:
+            self.groups.clear()
+            self._dirty = True
+        self.save()
+
+    def load(self) -> None:
+        """Carga el índice guardado, si existe."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for group in sorted(data.get("groups", []), key=lambda group: group["lastSeen"]):
+                self.groups[group["fingerprint"]] = group
+        except Exception as e:
+            print(f"Error cargando grupos de errores de {self.path}: {e}")
+
+    def save(self) -> bool:
+        """
+        Guarda el índice de forma atómica si cambió.
+
+        Returns:
+            bool: True si se guardó
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = json.dumps({"version": 1, "groups": list(self.groups.values())})
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.path}.tmp"
+            with open(temp_file, 'w') as f:
+                f.write(data)
+            os.replace(temp_file, self.path)
+            self.last_saved_at = datetime.now().isoformat()
+            return True
+        except Exception as e:
+            self._dirty = True
+            print(f"Error guardando grupos de errores en {self.path}: {e}")
+            return False
+
+    def _loop(self) -> None:
+        """Hilo de guardado: cada 'persistIntervalSeconds' si hubo cambios."""
+        while True:
+            interval = self.get_settings().get("persistIntervalSeconds", DEFAULT_PERSIST_INTERVAL_SECONDS)
+            if self._stop.wait(max(interval, 1)):
+                return
+            self.save()
+
+    def start(self) -> None:
+        """Inicia el hilo de guardado."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="ErrorGroupsPersist", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo de guardado y guarda lo pendiente."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
@@ -1,8 +1,128 @@
+import glob
+import json
 import os
+import re
+import threading
 import time
-from typing import Dict, List, Optional, Callable, Any
+import zlib
+from typing import Dict, List, Optional, Callable, Any, Pattern, Tuple
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent
+from .metrics import WATCHER_EVENTS, WATCHER_LAG, WATCHER_LINES
+
+# Intervalo por defecto para agrupar ráfagas de eventos de un mismo archivo
+DEFAULT_DEBOUNCE_MS = 50
+# Bytes iniciales usados como huella para detectar un copytruncate
+FINGERPRINT_BYTES = 256
+# Intervalo mínimo entre escrituras de los checkpoints de offsets
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+# Tamaño del buffer reutilizable de lectura
+READ_BUFFER_SIZE = 64 * 1024
+# Máximo de bytes leídos por archivo en cada llamada; el resto se lee en otra pasada
+MAX_READ_BYTES = 4 * 1024 * 1024
+
+# Backends de eventos: 'auto' usa inotify salvo donde no funciona, 'polling' sondea siempre
+BACKENDS = ('auto', 'inotify', 'polling')
+# Intervalo de sondeo mientras hay archivos activos
+POLL_MIN_INTERVAL_MS = 20
+# Intervalo de sondeo máximo por defecto cuando no hay cambios
+DEFAULT_POLL_INTERVAL_MS = 1000
+# Sistemas de archivos donde inotify no recibe los cambios hechos desde otra máquina
+POLLING_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'vboxsf', '9p', 'virtiofs', 'fuse', 'fuseblk'}
+
+_GLOB_CHARS = re.compile(r'[*?\[]')
+
+
+def is_glob_pattern(path: str) -> bool:
+    """
+    Indica si una ruta contiene comodines glob.
+
+    Args:
+        path: Ruta a comprobar
+
+    Returns:
+        bool: True si la ruta es un patrón
+    """
+    return bool(_GLOB_CHARS.search(path))
+
+
+def _glob_to_regex(pattern: str) -> Pattern:
+    """
+    Convierte un patrón glob con `**` en una expresión regular sobre rutas.
+
+    `*` y `?` no cruzan separadores de directorio; `**` equivale a cero o más directorios.
+    """
+    parts = pattern.split('/')
+    pieces: List[str] = []
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        if part == '**':
+            pieces.append('.*' if last else '(?:[^/]*/)*')
+            continue
+
+        piece = ''
+        i = 0
+        while i < len(part):
+            char = part[i]
+            if char == '*':
+                piece += '[^/]*'
+            elif char == '?':
+                piece += '[^/]'
+            elif char == '[' and part.find(']', i + 1) != -1:
+                end = part.find(']', i + 1)
+                body = part[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                piece += f'[{body}]'
+                i = end
+            else:
+                piece += re.escape(char)
+            i += 1
+        pieces.append(piece if last else piece + '/')
+    return re.compile(''.join(pieces) + r'\Z')
+
+
+def _mount_fstype(path: str) -> Optional[str]:
+    """
+    Obtiene el tipo de sistema de archivos donde está montada una ruta.
+
+    Args:
+        path: Ruta a consultar
+
+    Returns:
+        Optional[str]: Tipo según /proc/mounts (None si no se puede determinar)
+    """
+    try:
+        with open('/proc/mounts', 'r', encoding='utf-8') as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+
+    path = os.path.realpath(path)
+    best, fstype = '', None
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        prefix = mount_point.rstrip('/') + '/'
+        if (path == mount_point or path.startswith(prefix)) and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype
+
+
+def _split_glob(pattern: str) -> Tuple[str, bool]:
+    """
+    Obtiene el directorio base fijo de un patrón glob.
+
+    Returns:
+        Tuple[str, bool]: Directorio base y si hace falta un watch recursivo
+    """
+    parts = pattern.split('/')
+    for index, part in enumerate(parts):
+        if _GLOB_CHARS.search(part):
+            base = '/'.join(parts[:index]) or '/'
+            return base, index < len(parts) - 1
+    return os.path.dirname(pattern), False
+
 
 class LogFileHandler(FileSystemEventHandler):
     def __init__(self, callback: Callable[[str], None]):
@@ -10,40 +130,295 @@ class LogFileHandler(FileSystemEventHandler):
         Inicializa el manejador de eventos de archivo.
         
         Args:
-            callback: Función a llamar cuando el archivo cambia
+            callback: Función a llamar con la ruta de cada archivo que cambia
         """
         self.callback = callback
     
-    def on_modified(self, event: FileModifiedEvent) -> None:
-        """Maneja el evento de modificación de archivo."""
+    def _dispatch(self, event) -> None:
+        """Notifica la ruta del evento al despachador."""
         try:
-            if hasattr(event, 'src_path') and event.src_path is not None:
+            if hasattr(event, 'src_path') and event.src_path is not None and not event.is_directory:
                 # Convertir a string de forma segura
                 path_str = str(event.src_path)
                 self.callback(path_str)
         except Exception as e:
             print(f"Error en on_modified: {e}")
 
+    def on_modified(self, event: FileModifiedEvent) -> None:
+        """Maneja el evento de modificación de archivo."""
+        self._dispatch(event)
+
+    def on_created(self, event) -> None:
+        """Maneja la creación del archivo (p. ej. tras una rotación)."""
+        self._dispatch(event)
+
+    def on_moved(self, event) -> None:
+        """Maneja un archivo que reemplaza al monitoreado por renombrado (guardado atómico)."""
+        try:
+            if not event.is_directory and getattr(event, 'dest_path', None):
+                self.callback(str(event.dest_path))
+        except Exception as e:
+            print(f"Error en on_moved: {e}")
+
 class FileWatcher:
-    def __init__(self):
-        """Inicializa el monitor de archivos."""
+    def __init__(self, debounce_ms: int = DEFAULT_DEBOUNCE_MS, checkpoint_file: Optional[str] = None,
+                 checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, backend: str = 'auto',
+                 poll_interval_ms: int = DEFAULT_POLL_INTERVAL_MS):
+        """
+        Inicializa el monitor de archivos.
+
+        Se registra un único watch por directorio, compartido por todos los
+        archivos y patrones que lo necesitan, y un único manejador que despacha
+        cada evento con una tabla ruta -> archivo monitoreado.
+
+        Cada archivo se sigue por (dispositivo, inodo, offset); esos checkpoints
+        se guardan en `checkpoint_file` para continuar tras un reinicio.
+
+        Los directorios donde inotify no sirve (no disponible, montajes de red
+        o de máquinas virtuales) se sondean con `os.stat`; el intervalo baja a
+        POLL_MIN_INTERVAL_MS mientras hay cambios y se duplica hasta
+        `poll_interval_ms` cuando no los hay.
+
+        Args:
+            debounce_ms: Los eventos de un archivo dentro de este intervalo se
+                agrupan en una sola llamada al callback
+            checkpoint_file: Archivo donde persistir los offsets (None = no persistir)
+            checkpoint_interval: Segundos mínimos entre escrituras de checkpoints
+            backend: 'auto', 'inotify' o 'polling'
+            poll_interval_ms: Intervalo máximo de sondeo sin actividad
+        """
         self.observer = Observer()
         self.watched_files: Dict[str, Dict[str, Any]] = {}
+        self.patterns: Dict[str, Dict[str, Any]] = {}
         self.active = False
+        self.debounce_ms = debounce_ms
+        self._handler = LogFileHandler(self._on_native_event)
+        # Directorio -> {"watch", "recursive", "users"}
+        self._directories: Dict[Tuple[str, bool], Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._pending: Dict[str, threading.Timer] = {}
+        self._pending_lock = threading.Lock()
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self._checkpoints: Dict[str, Dict[str, Any]] = {}
+        self._last_checkpoint = time.monotonic()
+        self._checkpoints_dirty = False
+        self._buffers = threading.local()
+        self.backend = backend if backend in BACKENDS else 'auto'
+        # Si watchdog cayó en su propio sondeo, no hay eventos nativos
+        self._native_events = not issubclass(Observer, PollingObserver)
+        self.poll_interval_ms = max(poll_interval_ms, POLL_MIN_INTERVAL_MS)
+        self._poll_thread: Optional[threading.Thread] = None
+        self._poll_stop = threading.Event()
+        self._load_checkpoints()
     
     def start(self):
         """Inicia el monitoreo de archivos."""
         if not self.active:
             self.observer.start()
+            self._poll_stop.clear()
+            self._poll_thread = threading.Thread(target=self._poll_loop, name="FileWatcherPoller", daemon=True)
+            self._poll_thread.start()
             self.active = True
     
     def stop(self):
         """Detiene el monitoreo de archivos."""
         if self.active:
+            self.save_checkpoints()
+            self._poll_stop.set()
+            if self._poll_thread is not None:
+                self._poll_thread.join()
+                self._poll_thread = None
             self.observer.stop()
             self.observer.join()
+            # Un Observer detenido no se puede reiniciar
+            self.observer = Observer()
             self.active = False
-            self.watched_files.clear()
+            with self._lock:
+                self.watched_files.clear()
+                self.patterns.clear()
+                self._directories.clear()
+            with self._pending_lock:
+                for timer in self._pending.values():
+                    timer.cancel()
+                self._pending.clear()
+
+    def _is_covered(self, directory: str) -> bool:
+        """Indica si un watch recursivo existente ya cubre el directorio."""
+        for (watched_dir, recursive) in self._directories:
+            if recursive and (directory == watched_dir or directory.startswith(watched_dir.rstrip('/') + '/')):
+                return True
+        return False
+
+    def _acquire_directory(self, directory: str, recursive: bool, user: str) -> Tuple[str, bool]:
+        """
+        Registra un usuario de un directorio, creando el watch si es el primero.
+
+        Returns:
+            Tuple[str, bool]: Clave del directorio usada
+        """
+        key = (directory, recursive)
+        if not recursive and key not in self._directories and self._is_covered(directory):
+            # Reutilizar el watch recursivo que ya cubre el directorio
+            key = next(k for k in self._directories
+                       if k[1] and (directory == k[0] or directory.startswith(k[0].rstrip('/') + '/')))
+
+        entry = self._directories.get(key)
+        if entry is None:
+            watch = None
+            if not self._needs_polling(directory):
+                try:
+                    watch = self.observer.schedule(self._handler, directory, recursive=recursive)
+                except OSError as e:
+                    # p. ej. límite de watches de inotify alcanzado
+                    print(f"No se pudo observar {directory} ({e}), se usará sondeo")
+            # Sin watch, el directorio se sondea
+            entry = {"watch": watch, "users": set()}
+            self._directories[key] = entry
+        entry["users"].add(user)
+        return key
+
+    def _release_directory(self, key: Tuple[str, bool], user: str) -> None:
+        """Libera un usuario de un directorio y elimina el watch si era el último."""
+        entry = self._directories.get(key)
+        if entry is None:
+            return
+        entry["users"].discard(user)
+        if not entry["users"]:
+            del self._directories[key]
+            if entry["watch"] is not None:
+                self.observer.unschedule(entry["watch"])
+
+    def _needs_polling(self, directory: str) -> bool:
+        """Indica si un directorio debe sondearse en lugar de usar eventos."""
+        if self.backend != 'auto':
+            return self.backend == 'polling'
+        if not self._native_events:
+            return True
+        fstype = _mount_fstype(directory)
+        return fstype is not None and (fstype in POLLING_FILESYSTEMS or fstype.startswith('fuse.'))
+
+    def _is_polled(self, key: Tuple[str, bool]) -> bool:
+        """Indica si el directorio registrado con esa clave se sondea."""
+        entry = self._directories.get(key)
+        return entry is not None and entry["watch"] is None
+
+    def set_poll_interval(self, interval_ms: int) -> None:
+        """
+        Cambia el intervalo máximo de sondeo.
+
+        Args:
+            interval_ms: Intervalo en milisegundos cuando no hay actividad
+        """
+        self.poll_interval_ms = max(interval_ms, POLL_MIN_INTERVAL_MS)
+
+    def _poll_once(self, discover: bool) -> bool:
+        """
+        Sondea los archivos de los directorios sin eventos.
+
+        Se toma la lista de archivos una sola vez y se hace un `os.stat` por
+        archivo, sin mantener el lock durante las llamadas al sistema.
+
+        Args:
+            discover: Si se buscan archivos nuevos para los patrones sondeados
+
+        Returns:
+            bool: True si algún archivo cambió
+        """
+        with self._lock:
+            files = [(path, info) for path, info in self.watched_files.items()
+                     if self._is_polled(info["directory"])]
+            patterns = [pattern for pattern, info in self.patterns.items()
+                        if self._is_polled(info["directory"])] if discover else []
+
+        changed = False
+        for path, file_info in files:
+            try:
+                stat = os.stat(path)
+                signature: Optional[Tuple[int, int, int]] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                signature = None
+            if signature != file_info.get("signature"):
+                file_info["signature"] = signature
+                changed = True
+                WATCHER_EVENTS.inc(origin="poll")
+                self._dispatch_event(path)
+
+        for pattern in patterns:
+            for path in glob.glob(pattern, recursive=True):
+                if path not in self.watched_files and os.path.isfile(path):
+                    changed = True
+                    self._dispatch_event(path)
+        return changed
+
+    def _poll_loop(self) -> None:
+        """Hilo de sondeo con intervalo adaptativo."""
+        interval = POLL_MIN_INTERVAL_MS
+        next_discovery = 0.0
+        while not self._poll_stop.wait(interval / 1000):
+            now = time.monotonic()
+            discover = now >= next_discovery
+            if discover:
+                next_discovery = now + self.poll_interval_ms / 1000
+            try:
+                changed = self._poll_once(discover)
+            except Exception as e:
+                print(f"Error sondeando archivos: {e}")
+                changed = False
+            interval = POLL_MIN_INTERVAL_MS if changed else min(interval * 2, self.poll_interval_ms)
+            # Los offsets avanzados por el último evento se guardan aunque no lleguen más
+            self._maybe_save_checkpoints()
+
+    def _on_native_event(self, path: str) -> None:
+        """Recibe un evento del observer de watchdog."""
+        WATCHER_EVENTS.inc(origin="native")
+        self._dispatch_event(path)
+
+    @property
+    def pending_count(self) -> int:
+        """Número de archivos con una notificación agrupada pendiente."""
+        return len(self._pending)
+
+    def _dispatch_event(self, path: str) -> None:
+        """
+        Despacha un evento del observer: búsqueda O(1) por ruta y, si no
+        corresponde a un archivo monitoreado, comprobación de los patrones.
+        """
+        file_info = self.watched_files.get(path)
+        if file_info is not None:
+            self._on_event(path, file_info.get("callback"))
+            return
+
+        for pattern, pattern_info in list(self.patterns.items()):
+            if pattern_info["regex"].match(path):
+                # Archivo nuevo que coincide con el patrón: se lee desde el inicio
+                if self.add_file(path, pattern_info["callback"], start_at_end=False, pattern=pattern):
+                    self._on_event(path, pattern_info["callback"])
+                return
+
+    def _on_event(self, file_path: str, callback: Optional[Callable[[str], None]]) -> None:
+        """
+        Agrupa los eventos de un archivo: el primero programa una única
+        notificación tras `debounce_ms` y los siguientes se absorben.
+        """
+        if callback is None:
+            return
+        with self._pending_lock:
+            if file_path in self._pending:
+                return
+            timer = threading.Timer(self.debounce_ms / 1000, self._fire, args=(file_path, callback))
+            timer.daemon = True
+            self._pending[file_path] = timer
+        timer.start()
+
+    def _fire(self, file_path: str, callback: Callable[[str], None]) -> None:
+        """Ejecuta el callback del archivo una vez terminado el intervalo."""
+        with self._pending_lock:
+            self._pending.pop(file_path, None)
+        try:
+            callback(file_path)
+        except Exception as e:
+            print(f"Error en callback de {file_path}: {e}")
     
     @property
     def is_active(self) -> bool:
@@ -55,13 +430,16 @@ class FileWatcher:
         """
         return self.active
     
-    def add_file(self, file_path: str, callback: Optional[Callable[[str], None]] = None) -> bool:
+    def add_file(self, file_path: str, callback: Optional[Callable[[str], None]] = None,
+                 start_at_end: bool = True, pattern: Optional[str] = None) -> bool:
         """
         Añade un archivo al monitoreo.
         
         Args:
             file_path: Ruta absoluta al archivo
             callback: Función opcional a llamar cuando el archivo cambie
+            start_at_end: Si True, solo se lee el contenido añadido desde ahora
+            pattern: Patrón glob por el que se descubrió el archivo, si aplica
             
         Returns:
             bool: True si el archivo se añadió correctamente
@@ -70,30 +448,40 @@ class FileWatcher:
             print(f"El archivo {file_path} no existe")
             return False
         
-        if file_path in self.watched_files:
-            print(f"El archivo {file_path} ya está siendo monitoreado")
-            return False
-        
-        try:
-            file_dir = os.path.dirname(file_path)
-            handler = LogFileHandler(callback if callback else lambda x: None)
+        with self._lock:
+            if file_path in self.watched_files:
+                print(f"El archivo {file_path} ya está siendo monitoreado")
+                return False
 
-            watch = self.observer.schedule(handler, file_dir, recursive=False)
-            
-            self.watched_files[file_path] = {
-                "handler": handler,
-                "watch": watch,
-                "last_position": os.path.getsize(file_path),
-                "last_modified": os.path.getmtime(file_path)
-            }
-            
-            if not self.active:
-                self.start()
-            
-            return True
-        except Exception as e:
-            print(f"Error añadiendo archivo {file_path}: {e}")
-            return False
+            try:
+                directory_key = self._acquire_directory(os.path.dirname(file_path), False, file_path)
+                stat = os.stat(file_path)
+
+                self.watched_files[file_path] = {
+                    "directory": directory_key,
+                    "callback": callback,
+                    "pattern": pattern,
+                    "dev": stat.st_dev,
+                    "ino": stat.st_ino,
+                    "last_position": self._initial_position(file_path, stat, start_at_end),
+                    "last_modified": stat.st_mtime,
+                    "fingerprint": None,
+                    "partial": bytearray(),
+                    "signature": (stat.st_ino, stat.st_size, stat.st_mtime_ns),
+                    "lock": threading.Lock()
+                }
+                self._update_fingerprint(file_path, self.watched_files[file_path], stat.st_size)
+                pending = self.watched_files[file_path]["last_position"] < stat.st_size
+            except Exception as e:
+                print(f"Error añadiendo archivo {file_path}: {e}")
+                return False
+
+        if not self.active:
+            self.start()
+        if pending and callback is not None:
+            # Contenido escrito mientras el archivo no estaba monitoreado
+            self._on_event(file_path, callback)
+        return True
     
     def remove_file(self, file_path: str) -> bool:
         """
@@ -105,21 +493,186 @@ class FileWatcher:
         Returns:
             bool: True si el archivo se eliminó correctamente
         """
-        if file_path not in self.watched_files:
-            return False
-        
-        try:
-            watch = self.watched_files[file_path]["watch"]
-            self.observer.unschedule(watch)
-            del self.watched_files[file_path]
-            return True
-        except Exception as e:
-            print(f"Error eliminando archivo {file_path}: {e}")
+        with self._lock:
+            if file_path not in self.watched_files:
+                return False
+
+            try:
+                file_info = self.watched_files.pop(file_path)
+                self._checkpoints[file_path] = self._checkpoint_of(file_info)
+                self._release_directory(file_info["directory"], file_path)
+                return True
+            except Exception as e:
+                print(f"Error eliminando archivo {file_path}: {e}")
+                return False
+
+    def add_pattern(self, pattern: str, callback: Callable[[str], None]) -> bool:
+        """
+        Suscribe un patrón glob (p. ej. `/var/www/*/wp-content/**/debug.log`).
+
+        Los archivos que ya coinciden se monitorean desde su final actual; los
+        que aparezcan después se detectan por sus eventos y se leen completos.
+
+        Args:
+            pattern: Patrón glob; `**` abarca cualquier número de directorios
+            callback: Función a llamar cuando cambie un archivo que coincida
+
+        Returns:
+            bool: True si el patrón se añadió correctamente
+        """
+        pattern = os.path.abspath(pattern)
+        base_dir, recursive = _split_glob(pattern)
+        if not os.path.isdir(base_dir):
+            print(f"El directorio base {base_dir} del patrón no existe")
             return False
+
+        with self._lock:
+            if pattern in self.patterns:
+                print(f"El patrón {pattern} ya está siendo monitoreado")
+                return False
+            try:
+                directory_key = self._acquire_directory(base_dir, recursive, pattern)
+            except Exception as e:
+                print(f"Error añadiendo patrón {pattern}: {e}")
+                return False
+            self.patterns[pattern] = {
+                "regex": _glob_to_regex(pattern),
+                "callback": callback,
+                "directory": directory_key
+            }
+
+        for file_path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(file_path):
+                self.add_file(file_path, callback, pattern=pattern)
+
+        if not self.active:
+            self.start()
+        return True
+
+    def remove_pattern(self, pattern: str) -> bool:
+        """
+        Elimina un patrón y los archivos descubiertos por él.
+
+        Args:
+            pattern: Patrón glob
+
+        Returns:
+            bool: True si el patrón se eliminó correctamente
+        """
+        pattern = os.path.abspath(pattern)
+        with self._lock:
+            pattern_info = self.patterns.pop(pattern, None)
+            if pattern_info is None:
+                return False
+            for file_path, file_info in list(self.watched_files.items()):
+                if file_info.get("pattern") == pattern:
+                    self.remove_file(file_path)
+            self._release_directory(pattern_info["directory"], pattern)
+        return True
     
+    def _initial_position(self, file_path: str, stat: os.stat_result, start_at_end: bool) -> int:
+        """
+        Calcula desde dónde leer un archivo recién añadido.
+
+        Si hay un checkpoint del mismo inodo se continúa desde él; si el inodo
+        cambió (rotado mientras no se monitoreaba) se lee el archivo nuevo completo.
+        """
+        checkpoint = self._checkpoints.get(file_path)
+        if checkpoint:
+            same_file = (checkpoint.get("dev") == stat.st_dev and checkpoint.get("ino") == stat.st_ino
+                         and checkpoint.get("offset", 0) <= stat.st_size)
+            if not same_file:
+                return 0
+            fingerprint = checkpoint.get("fingerprint")
+            if fingerprint and self._read_fingerprint(file_path, fingerprint[0]) != tuple(fingerprint):
+                return 0
+            return checkpoint.get("offset", 0)
+        return stat.st_size if start_at_end else 0
+
+    @staticmethod
+    def _read_fingerprint(file_path: str, size: int) -> Optional[Tuple[int, int]]:
+        """Calcula la huella (tamaño, crc32) de los primeros `size` bytes del archivo."""
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(size)
+        except OSError:
+            return None
+        if len(head) < size:
+            return None
+        return size, zlib.crc32(head)
+
+    def _update_fingerprint(self, file_path: str, file_info: Dict[str, Any], size: int) -> None:
+        """Guarda la huella del inicio del archivo mientras no esté completa."""
+        fingerprint = file_info.get("fingerprint")
+        if fingerprint and fingerprint[0] >= FINGERPRINT_BYTES:
+            return
+        wanted = min(size, FINGERPRINT_BYTES)
+        if wanted and (not fingerprint or wanted > fingerprint[0]):
+            file_info["fingerprint"] = self._read_fingerprint(file_path, wanted)
+
+    @staticmethod
+    def _find_by_inode(directory: str, dev: int, ino: int) -> Optional[str]:
+        """Busca en el directorio el archivo rotado con el inodo indicado."""
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.inode() == ino and entry.is_file(follow_symlinks=False):
+                        if entry.stat(follow_symlinks=False).st_dev == dev:
+                            return entry.path
+        except OSError:
+            pass
+        return None
+
+    def _read_buffer(self) -> memoryview:
+        """Obtiene el buffer de lectura del hilo actual, creándolo la primera vez."""
+        view = getattr(self._buffers, "view", None)
+        if view is None:
+            view = memoryview(bytearray(READ_BUFFER_SIZE))
+            self._buffers.view = view
+        return view
+
+    def _read_from(self, path: str, file_info: Dict[str, Any], final: bool = False) -> Tuple[List[str], bool]:
+        """
+        Lee desde el offset guardado hasta el final actual y avanza el offset.
+
+        Solo se entregan líneas completas: el resto sin salto de línea queda en
+        `partial` para la próxima lectura, salvo con `final` (archivo rotado que
+        ya no recibirá más datos) una vez leído hasta el final.
+
+        Returns:
+            Tuple[List[str], bool]: Líneas nuevas y si quedaron bytes sin leer
+        """
+        view = self._read_buffer()
+        pending: bytearray = file_info["partial"]
+        read = 0
+        with open(path, 'rb', buffering=0) as f:
+            f.seek(file_info["last_position"])
+            while read < MAX_READ_BYTES:
+                n = f.readinto(view)
+                if not n:
+                    break
+                pending += view[:n]
+                read += n
+        file_info["last_position"] += read
+        if read:
+            self._checkpoints_dirty = True
+        more = read >= MAX_READ_BYTES
+
+        end = len(pending) if final and not more else pending.rfind(b'\n') + 1
+        if end <= 0:
+            return [], more
+        text = pending[:end].decode('utf-8', errors='replace')
+        del pending[:end]
+        return [line.strip() for line in text.splitlines() if line.strip()], more
+
     def get_new_content(self, file_path: str) -> List[str]:
         """
         Obtiene el nuevo contenido de un archivo desde la última lectura.
+
+        Detecta rotaciones por renombrado (cambia el inodo: se termina de leer
+        el archivo rotado antes de pasar al nuevo) y por copytruncate (el
+        tamaño baja o cambia la huella del inicio: se relee desde el principio).
+        Una línea a medio escribir se retiene hasta que llegue su salto de línea.
         
         Args:
             file_path: Ruta al archivo
@@ -127,33 +680,126 @@ class FileWatcher:
         Returns:
             List[str]: Lista de nuevas líneas
         """
-        if file_path not in self.watched_files:
+        file_info = self.watched_files.get(file_path)
+        if file_info is None:
             return []
         
+        lines: List[str] = []
+        more = False
         try:
-            file_info = self.watched_files[file_path]
-            current_size = os.path.getsize(file_path)
-            last_position = file_info["last_position"]
-            
-            if current_size < last_position:
-                # El archivo fue truncado
-                last_position = 0
-            
-            if current_size == last_position:
-                return []
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                f.seek(last_position)
-                new_lines = f.readlines()
-                
-                # Actualizar posición
-                file_info["last_position"] = current_size
-                file_info["last_modified"] = os.path.getmtime(file_path)
-                
-                return [line.strip() for line in new_lines if line.strip()]
+            with file_info["lock"]:
+                try:
+                    stat: Optional[os.stat_result] = os.stat(file_path)
+                except FileNotFoundError:
+                    stat = None
+
+                if stat is None or (stat.st_dev, stat.st_ino) != (file_info["dev"], file_info["ino"]):
+                    # Rotación por renombrado: vaciar primero el inodo anterior
+                    old_path = self._find_by_inode(os.path.dirname(file_path), file_info["dev"], file_info["ino"])
+                    if old_path:
+                        # Leer el inodo anterior hasta el final, aunque supere MAX_READ_BYTES
+                        old_more = True
+                        while old_more:
+                            old_lines, old_more = self._read_from(old_path, file_info, final=stat is not None)
+                            lines.extend(old_lines)
+                    if stat is None:
+                        # El archivo nuevo todavía no existe
+                        return lines
+                    self._reset_position(file_info)
+                    file_info["dev"] = stat.st_dev
+                    file_info["ino"] = stat.st_ino
+                elif stat.st_size < file_info["last_position"]:
+                    # Truncado (copytruncate)
+                    self._reset_position(file_info)
+                elif file_info["fingerprint"] and \
+                        self._read_fingerprint(file_path, file_info["fingerprint"][0]) != file_info["fingerprint"]:
+                    # Truncado y vuelto a crecer por encima del offset anterior
+                    self._reset_position(file_info)
+
+                if stat.st_size > file_info["last_position"]:
+                    new_lines, more = self._read_from(file_path, file_info)
+                    lines.extend(new_lines)
+                    WATCHER_LAG.observe(max(time.time() - stat.st_mtime, 0.0))
+                self._update_fingerprint(file_path, file_info, stat.st_size)
+                file_info["last_modified"] = stat.st_mtime
         except Exception as e:
             print(f"Error leyendo archivo {file_path}: {e}")
-            return []
+
+        if more and file_info["callback"] is not None:
+            # Quedan datos por encima del máximo por lectura
+            self._on_event(file_path, file_info["callback"])
+        if lines:
+            WATCHER_LINES.inc(len(lines))
+        self._maybe_save_checkpoints()
+        return lines
+
+    @staticmethod
+    def _reset_position(file_info: Dict[str, Any]) -> None:
+        """Vuelve a leer el archivo desde el principio."""
+        file_info["last_position"] = 0
+        file_info["fingerprint"] = None
+        file_info["partial"].clear()
+
+    @staticmethod
+    def _checkpoint_of(file_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Obtiene el checkpoint persistible de un archivo monitoreado."""
+        return {
+            "dev": file_info["dev"],
+            "ino": file_info["ino"],
+            # Una línea incompleta se vuelve a leer entera tras un reinicio
+            "offset": file_info["last_position"] - len(file_info["partial"]),
+            "fingerprint": list(file_info["fingerprint"]) if file_info["fingerprint"] else None
+        }
+
+    def _load_checkpoints(self) -> None:
+        """Carga los checkpoints guardados."""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                self._checkpoints = json.load(f)
+        except Exception as e:
+            print(f"Error cargando checkpoints: {e}")
+            self._checkpoints = {}
+
+    def save_checkpoints(self) -> bool:
+        """
+        Guarda los offsets de todos los archivos de forma atómica.
+
+        Returns:
+            bool: True si se guardaron correctamente
+        """
+        if not self.checkpoint_file:
+            return False
+        with self._lock:
+            for path, file_info in self.watched_files.items():
+                self._checkpoints[path] = self._checkpoint_of(file_info)
+            # Descartar checkpoints de archivos que ya no existen
+            checkpoints = {path: checkpoint for path, checkpoint in self._checkpoints.items()
+                           if os.path.exists(path)}
+            self._checkpoints = checkpoints
+            self._last_checkpoint = time.monotonic()
+            self._checkpoints_dirty = False
+
+        try:
+            directory = os.path.dirname(self.checkpoint_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.checkpoint_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(checkpoints, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.checkpoint_file)
+            return True
+        except Exception as e:
+            print(f"Error guardando checkpoints: {e}")
+            return False
+
+    def _maybe_save_checkpoints(self) -> None:
+        """Guarda los checkpoints si cambiaron y pasó el intervalo desde la última vez."""
+        if self.checkpoint_file and self._checkpoints_dirty and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoints()
     
     def get_watched_files(self) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import Any, Dict
+
+# Tamaño del buffer usado para contar saltos de línea
+COUNT_BUFFER_SIZE = 1024 * 1024
+
+
+class LineCounter:
+    """
+    Contador de líneas por archivo con caché incremental.
+
+    Cada archivo se identifica por (dispositivo, inodo). Si el archivo creció
+    solo se cuentan los bytes añadidos; si fue truncado o reemplazado se vuelve
+    a contar completo. Sin cambios, contar es un único `os.stat`.
+    """
+
+    def __init__(self):
+        """Inicializa el contador."""
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _count_range(path: str, start: int, end: int) -> Dict[str, Any]:
+        """
+        Cuenta los saltos de línea de un rango de bytes del archivo.
+
+        Returns:
+            Dict: Número de saltos de línea, último byte leído y bytes leídos
+        """
+        newlines = 0
+        last_byte = b''
+        remaining = end - start
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(COUNT_BUFFER_SIZE, remaining))
+                if not chunk:
+                    break
+                newlines += chunk.count(b'\n')
+                last_byte = chunk[-1:]
+                remaining -= len(chunk)
+        return {"newlines": newlines, "last_byte": last_byte, "size": end - start - remaining}
+
+    def count_lines(self, path: str) -> int:
+        """
+        Obtiene el número de líneas de un archivo.
+
+        Una última línea sin salto de línea final también cuenta, igual que al
+        iterar el archivo en modo texto.
+
+        Args:
+            path: Ruta del archivo
+
+        Returns:
+            int: Número de líneas (0 si el archivo no existe)
+        """
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return 0
+
+        with self._lock:
+            entry = self._entries.get(key)
+            same_file = (entry is not None
+                         and entry["dev"] == stat.st_dev
+                         and entry["ino"] == stat.st_ino
+                         and entry["size"] <= stat.st_size)
+
+            if not same_file:
+                # Archivo nuevo, reemplazado o truncado: contar desde el inicio
+                entry = {"dev": stat.st_dev, "ino": stat.st_ino, "size": 0, "newlines": 0, "last_byte": b''}
+                self._entries[key] = entry
+
+            if stat.st_size > entry["size"]:
+                counted = self._count_range(key, entry["size"], stat.st_size)
+                entry["newlines"] += counted["newlines"]
+                if counted["last_byte"]:
+                    entry["last_byte"] = counted["last_byte"]
+                entry["size"] += counted["size"]
+
+            partial_line = 1 if entry["last_byte"] not in (b'', b'\n') else 0
+            return entry["newlines"] + partial_line
+
+    def forget(self, path: str) -> None:
+        """
+        Descarta la caché de un archivo.
+
+        Args:
+            path: Ruta del archivo
+        """
+        with self._lock:
+            self._entries.pop(os.path.abspath(path), None)
@@ -1,8 +1,20 @@
 import json
 import os
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional, Union
 from .directory_manager import DirectoryManager
+from .metrics import BYTES_WRITTEN, RECORDS_WRITTEN, ROTATIONS, WRITE_ERRORS, WRITE_LATENCY
+from .segment_store import SegmentStore, ACTIVE_SEGMENT_NAME, DURABILITY_MODES, to_store_timestamp
+from .sqlite_store import SqliteDatabase, SqliteStore, DEFAULT_BATCH_SIZE
+
+# Backends de almacenamiento seleccionables con storage.backend
+STORAGE_BACKENDS = ('segments', 'sqlite')
+DEFAULT_SQLITE_PATH = "logs/devpipe.sqlite3"
+DEFAULT_SYNC_INTERVAL_MS = 1000
+# Separación mínima entre los server_timestamp de dos registros: cada registro tiene uno distinto
+SERVER_TIMESTAMP_STEP = timedelta(microseconds=1)
 
 class LogManager:
     def __init__(self, base_dir: str = "logs", directory_manager: Optional[DirectoryManager] = None, config_manager=None):
@@ -20,6 +32,18 @@ class LogManager:
         self.max_file_size: int = 50 * 1024  # 50KB por defecto
         self.active: bool = False
         self.current_token: Optional[str] = None
+        # Directorio absoluto -> SegmentStore
+        self._stores: Dict[str, SegmentStore] = {}
+        self._stores_lock = threading.Lock()
+        self._sqlite: Optional[SqliteDatabase] = None
+        self._sync_thread: Optional[threading.Thread] = None
+        self._sync_stop = threading.Event()
+        # time.monotonic() de la última escritura; las tareas de fondo esperan a que la ingesta esté ociosa
+        self.last_write_at: float = 0.0
+        # Callbacks (logs, token) tras cada lote escrito: agregados incrementales
+        self._write_listeners: List[Callable[[List[Dict[str, Any]], Optional[str]], None]] = []
+        self._last_server_timestamp = datetime.min
+        self._timestamp_lock = threading.Lock()
         self._ensure_log_dir(self.base_dir)
     
     def _ensure_log_dir(self, directory: str) -> None:
@@ -47,15 +71,134 @@ class LogManager:
         Returns:
             str: Ruta completa al archivo de log
         """
-        return os.path.join(self._get_log_directory(), "devpipe.log")
+        return os.path.join(self._get_log_directory(), ACTIVE_SEGMENT_NAME)
+
+    def get_store(self, directory: Optional[str] = None) -> SegmentStore:
+        """
+        Obtiene el almacenamiento por segmentos de un directorio.
+
+        Args:
+            directory: Directorio de logs (None = el directorio actual)
+
+        Returns:
+            SegmentStore: Store del directorio, abierto la primera vez que se pide
+        """
+        directory = os.path.abspath(directory or self._get_log_directory())
+        store = self._stores.get(directory)
+        if store is None:
+            with self._stores_lock:
+                store = self._stores.get(directory)
+                if store is None:
+                    self._ensure_log_dir(directory)
+                    store = self._stores[directory] = SegmentStore(directory)
+        return store
     
+    def _get_storage_settings(self) -> Dict[str, Any]:
+        """Sección 'storage' de la configuración (backend por segmentos si no hay ConfigManager)."""
+        if self.config_manager:
+            return self.config_manager.get_config().get("storage", {})
+        return {}
+
+    def get_backend_name(self) -> str:
+        """
+        Obtiene el backend de almacenamiento configurado.
+
+        Returns:
+            str: 'segments' (archivos devpipe.log) o 'sqlite'
+        """
+        backend = self._get_storage_settings().get("backend", "segments")
+        return backend if backend in STORAGE_BACKENDS else "segments"
+
+    def get_durability(self) -> str:
+        """
+        Obtiene la política de fsync configurada.
+
+        Returns:
+            str: 'none', 'interval', 'batch' o 'always'
+        """
+        durability = self._get_storage_settings().get("durability", "none")
+        return durability if durability in DURABILITY_MODES else "none"
+
+    def _ensure_sync_thread(self) -> None:
+        """Inicia el hilo de fsync agrupado del modo 'interval' si no está en marcha."""
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return
+        with self._stores_lock:
+            if self._sync_thread is None or not self._sync_thread.is_alive():
+                self._sync_stop.clear()
+                self._sync_thread = threading.Thread(target=self._sync_loop, name="LogSync", daemon=True)
+                self._sync_thread.start()
+
+    def _sync_loop(self) -> None:
+        """
+        Hilo del modo 'interval': cada syncIntervalMs sincroniza los segmentos
+        activos con escrituras pendientes y hace checkpoint del WAL de SQLite,
+        de modo que una caída pierde como mucho ese intervalo.
+        """
+        while True:
+            interval_ms = self._get_storage_settings().get("syncIntervalMs", DEFAULT_SYNC_INTERVAL_MS)
+            if self._sync_stop.wait(max(interval_ms, 1) / 1000):
+                return
+            self.sync()
+            if self.get_durability() != "interval":
+                return
+
+    def sync(self) -> None:
+        """Sincroniza en disco las escrituras pendientes de todos los backends."""
+        for store in list(self._stores.values()):
+            try:
+                store.sync()
+            except OSError as e:
+                print(f"Error sincronizando {store.active_path}: {e}")
+        if self._sqlite is not None:
+            try:
+                self._sqlite.checkpoint()
+            except Exception as e:
+                print(f"Error sincronizando SQLite: {e}")
+
+    def get_sqlite_database(self) -> SqliteDatabase:
+        """Abre la base SQLite configurada, reabriéndola si cambió la ruta."""
+        settings = self._get_storage_settings()
+        path = os.path.abspath(settings.get("sqlitePath") or DEFAULT_SQLITE_PATH)
+        with self._stores_lock:
+            if self._sqlite is None or self._sqlite.path != path:
+                if self._sqlite is not None:
+                    self._sqlite.close()
+                self._sqlite = SqliteDatabase(path, settings.get("sqliteBatchSize", DEFAULT_BATCH_SIZE))
+            return self._sqlite
+
+    def get_backend(self) -> Union[SegmentStore, SqliteStore]:
+        """
+        Obtiene el almacenamiento de los logs del directorio actual según el backend configurado.
+
+        Ambos backends exponen append_records, iter_lines, query, count, stats y clear.
+
+        Returns:
+            SegmentStore o SqliteStore
+        """
+        if self.get_backend_name() == "sqlite":
+            return SqliteStore(self.get_sqlite_database(), self.current_token)
+        return self.get_store()
+
+    def close(self) -> None:
+        """Sincroniza lo pendiente, detiene el hilo de fsync y cierra la base SQLite si está abierta."""
+        self._sync_stop.set()
+        self.sync()
+        with self._stores_lock:
+            if self._sqlite is not None:
+                self._sqlite.close()
+                self._sqlite = None
+
     def start(self) -> None:
         """Inicia la captura de logs."""
         self.active = True
     
     def stop(self) -> None:
-        """Detiene la captura de logs."""
+        """Detiene la captura de logs y sincroniza las escrituras pendientes."""
         self.active = False
+        if self._sqlite is not None:
+            self._sqlite.flush()
+        self.sync()
     
     @property
     def is_active(self) -> bool:
@@ -77,11 +220,11 @@ class LogManager:
         if not self.config_manager:
             return True
 
-        # Obtener filtros de URL de la configuración
-        url_filters = self.config_manager.get_url_filters()
+        # Filtros precompilados en el snapshot de configuración
+        url_matcher = self.config_manager.snapshot.url_matcher
 
         # Si no hay filtros configurados, aceptar todos los logs
-        if not url_filters:
+        if url_matcher is None:
             return True
 
         # Obtener la URL del log
@@ -91,12 +234,8 @@ class LogManager:
         if not log_url:
             return False
 
-        # Verificar si la URL contiene alguno de los filtros (whitelist)
-        for filter_term in url_filters:
-            if filter_term.strip() and filter_term.strip().lower() in log_url.lower():
-                return True  # Aceptar este log porque coincide con el filtro
-
-        return False  # Rechazar el log porque no coincide con ningún filtro
+        # Aceptar solo si la URL contiene alguno de los filtros (whitelist)
+        return url_matcher.search(log_url.lower()) is not None
 
     def set_log_directory_token(self, token: Optional[str]) -> bool:
         """
@@ -138,82 +277,166 @@ class LogManager:
         Returns:
             bool: True si el log fue escrito correctamente
         """
+        return self.write_logs([log_data]) == 1
+
+    def write_logs(self, logs: List[Dict[str, Any]]) -> int:
+        """
+        Escribe un lote de logs abriendo el archivo una sola vez.
+
+        Args:
+            logs: Lista de datos de logs a escribir
+
+        Returns:
+            int: Número de logs escritos (los filtrados no cuentan)
+        """
         if not self.active:
-            return False
-            
-        if not self.should_accept_log(log_data):
-            return False
+            return 0
+
+        accepted = [log_data for log_data in logs if self.should_accept_log(log_data)]
+        if not accepted:
+            return 0
         
+        start = time.perf_counter()
         try:
-            log_file = self._get_log_file()
-            
-            # Verificar tamaño del archivo
-            if os.path.exists(log_file):
-                if os.path.getsize(log_file) >= self.max_file_size:
-                    # Rotar archivo
-                    self._rotate_log_file(log_file)
-            
             # Añadir timestamp de servidor
-            log_data["server_timestamp"] = datetime.now().isoformat()
+            self._stamp(accepted)
             
-            # Escribir log
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_data) + "\n")
-            
-            return True
+            # Escribir logs; el backend de archivos sella el segmento activo si está lleno
+            durability = self.get_durability()
+            written, sealed = self.get_backend().append_records(accepted, self.get_max_file_size(), durability)
+            if durability == "interval":
+                self._ensure_sync_thread()
+            if sealed:
+                ROTATIONS.inc()
+            self._invalidate_directory_info()
+            self.last_write_at = time.monotonic()
+            for listener in self._write_listeners:
+                try:
+                    listener(accepted, self.current_token)
+                except Exception as e:
+                    print(f"Error notificando logs escritos: {e}")
+
+            WRITE_LATENCY.observe(time.perf_counter() - start)
+            RECORDS_WRITTEN.inc(len(accepted))
+            BYTES_WRITTEN.inc(written)
+            return len(accepted)
         except Exception as e:
+            WRITE_ERRORS.inc()
             print(f"Error escribiendo log: {e}")
-            return False
+            return 0
     
-    def _rotate_log_file(self, log_file: str):
+    def _stamp(self, logs: List[Dict[str, Any]]) -> None:
         """
-        Rota el archivo de log cuando alcanza el tamaño máximo.
-        
+        Asigna a cada log un server_timestamp único y creciente.
+
+        Los registros de un lote (y de lotes en el mismo microsegundo) se
+        separan por SERVER_TIMESTAMP_STEP, de modo que el server_timestamp
+        identifica un registro concreto (por ejemplo con
+        /logs/query?from=<ts>&to=<ts>).
+
         Args:
-            log_file: Ruta al archivo de log
+            logs: Logs aceptados del lote
         """
-        if os.path.exists(log_file):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup = f"{log_file}.{timestamp}"
-            os.rename(log_file, backup)
-    
-    def get_recent_logs(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._timestamp_lock:
+            stamp = max(datetime.now(), self._last_server_timestamp + SERVER_TIMESTAMP_STEP)
+            for log_data in logs:
+                log_data["server_timestamp"] = stamp.isoformat()
+                stamp += SERVER_TIMESTAMP_STEP
+            self._last_server_timestamp = stamp - SERVER_TIMESTAMP_STEP
+
+    def add_write_listener(self, listener: Callable[[List[Dict[str, Any]], Optional[str]], None]) -> None:
+        """
+        Registra un callback que recibe cada lote escrito.
+
+        Se llama en el hilo de la petición después de escribir, así que debe
+        ser rápido; un error en el callback no afecta a la escritura.
+
+        Args:
+            listener: Función (logs, token) con los logs aceptados y el token del directorio actual
         """
-        Obtiene los logs más recientes.
+        self._write_listeners.append(listener)
+
+    def _invalidate_directory_info(self) -> None:
+        """Descarta la información cacheada del directorio personalizado actual."""
+        if self.current_token:
+            self.directory_manager.invalidate(self.current_token)
+
+    def get_recent_logs(self, limit: int = 10, start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene los logs más recientes de todos los segmentos.
         
         Args:
             limit: Número máximo de logs a retornar
+            start: Si se indica, solo logs recibidos desde esa fecha (hora local)
+            end: Si se indica, solo logs recibidos hasta esa fecha (hora local)
             
         Returns:
             List[Dict]: Lista de logs
         """
         logs: List[Dict[str, Any]] = []
-        log_file = self._get_log_file()
-        
-        if not os.path.exists(log_file):
-            return logs
-        
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                # Leer las últimas 'limit' líneas
-                lines = f.readlines()[-limit:]
-                for line in lines:
-                    try:
-                        log = json.loads(line.strip())
-                        logs.append(log)
-                    except:
-                        continue
+            for line in self.get_backend().iter_lines(to_store_timestamp(start), to_store_timestamp(end), limit):
+                try:
+                    logs.append(json.loads(line))
+                except ValueError:
+                    continue
         except Exception as e:
             print(f"Error leyendo logs: {e}")
         
         return logs
     
+    def query_logs(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   level: Optional[str] = None, url: Optional[str] = None,
+                   limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Busca logs del directorio actual, del más reciente al más antiguo.
+
+        Args:
+            start: Desde esa fecha de recepción (hora local)
+            end: Hasta esa fecha de recepción (hora local)
+            level: Nivel exacto
+            url: Prefijo de la URL
+            limit: Máximo de logs
+            offset: Logs a saltar
+
+        Returns:
+            List[Dict]: Logs encontrados
+        """
+        return self.get_backend().query(to_store_timestamp(start), to_store_timestamp(end), level, url,
+                                        limit, offset)
+
+    def count_logs(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   level: Optional[str] = None, url: Optional[str] = None,
+                   group_by: Optional[str] = None) -> Union[int, Dict[str, int]]:
+        """
+        Cuenta logs del directorio actual con los filtros de query_logs.
+
+        Args:
+            group_by: 'level' o 'url' para contar por valor
+
+        Returns:
+            int o Dict[str, int]: Total o conteo por valor
+        """
+        return self.get_backend().count(to_store_timestamp(start), to_store_timestamp(end), level, url,
+                                        group_by)
+
     def clear_logs(self):
-        """Limpia todos los logs."""
-        log_file = self._get_log_file()
-        if os.path.exists(log_file):
-            os.remove(log_file)
+        """Limpia todos los logs del directorio actual (todos los segmentos o sus filas en SQLite)."""
+        self.get_backend().clear()
+        self._invalidate_directory_info()
     
+    def get_max_file_size(self) -> int:
+        """
+        Obtiene el tamaño máximo del archivo de logs.
+
+        Returns:
+            int: Tamaño en bytes (el del snapshot de configuración si hay ConfigManager)
+        """
+        if self.config_manager:
+            return self.config_manager.snapshot.max_file_size_bytes
+        return self.max_file_size
+
     def set_max_file_size(self, size_in_kb: int):
         """
         Establece el tamaño máximo del archivo de logs.
@@ -254,7 +477,7 @@ class LogManager:
         Obtiene información sobre el archivo de log actual.
         
         Returns:
-            Dict: Información del archivo
+            Dict: Información del archivo activo y resumen de todos los segmentos
         """
         log_file = self._get_log_file()
         info: Dict[str, Any] = {
@@ -262,7 +485,8 @@ class LogManager:
             "exists": os.path.exists(log_file),
             "size": 0,
             "size_kb": 0,
-            "last_modified": None
+            "last_modified": None,
+            **self.get_backend().stats()
         }
         
         if info["exists"]:
@@ -0,0 +1,463 @@
+import json
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from dateutil import parser as date_parser
+
+# (timestamp, nivel, mensaje) de una línea que inicia un registro
+ParsedLine = Tuple[Optional[datetime], str, str]
+LineParser = Callable[[str, Optional[str]], Optional[ParsedLine]]
+
+DEFAULT_LEVEL = 'external'
+
+# Tamaño máximo de un registro multilínea (trazas de PHP, errores fatales)
+MAX_RECORD_BYTES = 64 * 1024
+MAX_RECORD_LINES = 1000
+
+# Formatos rápidos probados antes de recurrir a dateutil
+_WORDPRESS_FORMATS = ('%d-%b-%Y %H:%M:%S %Z', '%d-%b-%Y %H:%M:%S')
+_NGINX_ACCESS_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+_NGINX_ERROR_FORMAT = '%Y/%m/%d %H:%M:%S'
+
+_NGINX_ACCESS_RE = re.compile(r'^(\S+) \S+ \S+ \[([^\]]+)\] "([^"]*)" (\d{3}) (\S+)')
+_NGINX_ERROR_RE = re.compile(r'^(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}) \[(\w+)\] (.*)$')
+_NODE_ISO_RE = re.compile(r'^\[?(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\]?\s*(.*)$')
+_NODE_LEVEL_RE = re.compile(r'^\[?(trace|debug|info|warn|warning|error|fatal)\]?:?\s+', re.IGNORECASE)
+
+_PHP_LEVELS = (
+    ('PHP Fatal error', 'error'),
+    ('PHP Parse error', 'error'),
+    ('PHP Warning', 'warning'),
+    ('PHP Notice', 'notice'),
+    ('PHP Deprecated', 'notice'),
+)
+
+# Zonas de %Z que strptime acepta y que corresponden a UTC
+_UTC_ZONE_NAMES = ('UTC', 'GMT', 'Z')
+
+_PINO_LEVELS = {10: 'trace', 20: 'debug', 30: 'info', 40: 'warn', 50: 'error', 60: 'fatal'}
+
+
+def normalize_timestamp(value: datetime) -> datetime:
+    """
+    Convierte un timestamp con zona horaria a hora local sin zona.
+
+    Así los timestamps de todas las fuentes se pueden comparar entre sí.
+
+    Args:
+        value: Timestamp a normalizar
+
+    Returns:
+        datetime: Timestamp sin zona horaria
+    """
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def parse_timestamp(text: str, timestamp_format: Optional[str] = None,
+                    fallback_formats: Tuple[str, ...] = ()) -> Optional[datetime]:
+    """
+    Parsea un timestamp con un formato explícito o, si no hay, con dateutil.
+
+    Args:
+        text: Texto del timestamp
+        timestamp_format: Formato strptime configurado para la fuente
+        fallback_formats: Formatos strptime a probar antes de dateutil
+
+    Returns:
+        Optional[datetime]: Timestamp normalizado o None si no se pudo parsear
+    """
+    text = text.strip()
+    if not text:
+        return None
+    return _parse_timestamp_cached(text, timestamp_format, fallback_formats)
+
+
+def _strptime(text: str, fmt: str) -> datetime:
+    """
+    strptime que respeta las zonas UTC/GMT de %Z.
+
+    strptime devuelve un datetime sin zona aunque el formato lleve %Z, con lo
+    que '19-Oct-2026 12:00:00 UTC' se leería como hora local; se marca como
+    UTC para que normalize_timestamp lo convierta.
+
+    Raises:
+        ValueError: Si el texto no encaja con el formato
+    """
+    value = datetime.strptime(text, fmt)
+    if '%Z' in fmt and value.tzinfo is None and text.rsplit(None, 1)[-1].upper() in _UTC_ZONE_NAMES:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp_cached(text: str, timestamp_format: Optional[str],
+                            fallback_formats: Tuple[str, ...]) -> Optional[datetime]:
+    """Parseo con caché: las líneas consecutivas suelen compartir el mismo segundo."""
+    if timestamp_format:
+        try:
+            return normalize_timestamp(_strptime(text, timestamp_format))
+        except ValueError:
+            return None
+
+    for fmt in fallback_formats:
+        try:
+            return normalize_timestamp(_strptime(text, fmt))
+        except ValueError:
+            continue
+
+    try:
+        return normalize_timestamp(date_parser.parse(text))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _split_bracket_timestamp(line: str, timestamp_format: Optional[str],
+                             fallback_formats: Tuple[str, ...]) -> Optional[Tuple[datetime, str]]:
+    """Separa un prefijo `[timestamp]` del resto de la línea."""
+    if not line.startswith('[') or ']' not in line:
+        return None
+    timestamp_end = line.find(']')
+    parsed_ts = parse_timestamp(line[1:timestamp_end], timestamp_format, fallback_formats)
+    if parsed_ts is None:
+        return None
+    return parsed_ts, line[timestamp_end + 1:].strip()
+
+
+def parse_wordpress_line(line: str, timestamp_format: Optional[str] = None) -> Optional[ParsedLine]:
+    """
+    Parsea una línea de debug.log de WordPress / error_log de PHP.
+
+    Formato: [19-Oct-2026 12:00:00 UTC] PHP Warning:  mensaje
+    """
+    split = _split_bracket_timestamp(line, timestamp_format, _WORDPRESS_FORMATS)
+    if split is None:
+        return None
+    parsed_ts, message = split
+
+    level = DEFAULT_LEVEL
+    for prefix, php_level in _PHP_LEVELS:
+        if message.startswith(prefix):
+            level = php_level
+            break
+    return parsed_ts, level, message
+
+
+def parse_php_fpm_slow_line(line: str, timestamp_format: Optional[str] = None) -> Optional[ParsedLine]:
+    """
+    Parsea una línea del slow log (o error log) de PHP-FPM.
+
+    Formato: [19-Oct-2026 12:00:00]  [pool www] pid 1234
+    Las líneas de traza (`[0x00007f...] funcion() archivo:linea`) no inician registro.
+    """
+    split = _split_bracket_timestamp(line, timestamp_format, _WORDPRESS_FORMATS)
+    if split is None:
+        return None
+    parsed_ts, message = split
+
+    level = 'slow'
+    for fpm_level in ('ERROR', 'WARNING', 'NOTICE'):
+        if message.startswith(f'{fpm_level}:'):
+            level = fpm_level.lower()
+            break
+    return parsed_ts, level, message
+
+
+def parse_nginx_access_line(line: str, timestamp_format: Optional[str] = None) -> Optional[ParsedLine]:
+    """
+    Parsea una línea del access log de nginx en formato combined.
+
+    Formato: 10.0.0.1 - - [19/Oct/2026:12:00:00 +0000] "GET / HTTP/1.1" 200 612 ...
+    """
+    match = _NGINX_ACCESS_RE.match(line)
+    if not match:
+        return None
+    parsed_ts = parse_timestamp(match.group(2), timestamp_format or _NGINX_ACCESS_FORMAT)
+    if parsed_ts is None:
+        return None
+
+    status = int(match.group(4))
+    if status >= 500:
+        level = 'error'
+    elif status >= 400:
+        level = 'warning'
+    else:
+        level = 'info'
+    return parsed_ts, level, line
+
+
+def parse_nginx_error_line(line: str, timestamp_format: Optional[str] = None) -> Optional[ParsedLine]:
+    """
+    Parsea una línea del error log de nginx.
+
+    Formato: 2026/10/19 12:00:00 [error] 1234#0: *5 mensaje
+    """
+    match = _NGINX_ERROR_RE.match(line)
+    if not match:
+        return None
+    parsed_ts = parse_timestamp(match.group(1), timestamp_format or _NGINX_ERROR_FORMAT)
+    if parsed_ts is None:
+        return None
+    return parsed_ts, match.group(2).lower(), match.group(3)
+
+
+def _parse_node_json_line(line: str, timestamp_format: Optional[str]) -> Optional[ParsedLine]:
+    """Parsea una línea JSON (pino, winston) de un servidor Node."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    raw_ts = data.get('time', data.get('timestamp'))
+    if isinstance(raw_ts, (int, float)):
+        # Epoch en milisegundos (pino) o en segundos
+        seconds = raw_ts / 1000 if raw_ts > 1e11 else raw_ts
+        parsed_ts: Optional[datetime] = datetime.fromtimestamp(seconds)
+    elif isinstance(raw_ts, str):
+        parsed_ts = parse_timestamp(raw_ts, timestamp_format)
+    else:
+        parsed_ts = None
+    if parsed_ts is None:
+        return None
+
+    raw_level = data.get('level', 'info')
+    if isinstance(raw_level, int):
+        level = _PINO_LEVELS.get(raw_level, 'info')
+    else:
+        level = str(raw_level).lower()
+    message = str(data.get('msg', data.get('message', line)))
+    return parsed_ts, level, message
+
+
+def parse_node_line(line: str, timestamp_format: Optional[str] = None) -> Optional[ParsedLine]:
+    """
+    Parsea una línea de log de un servidor Node (SSR).
+
+    Acepta líneas JSON con `time`/`timestamp` y líneas de texto con un
+    timestamp ISO 8601 al inicio, opcionalmente seguido del nivel.
+    """
+    if line.startswith('{'):
+        return _parse_node_json_line(line, timestamp_format)
+
+    match = _NODE_ISO_RE.match(line)
+    if not match:
+        return None
+    parsed_ts = parse_timestamp(match.group(1), timestamp_format)
+    if parsed_ts is None:
+        return None
+
+    message = match.group(2)
+    level = 'info'
+    level_match = _NODE_LEVEL_RE.match(message)
+    if level_match:
+        level = level_match.group(1).lower()
+        message = message[level_match.end():]
+    return parsed_ts, level, message
+
+
+PARSERS: Dict[str, LineParser] = {
+    'wordpress': parse_wordpress_line,
+    'php-fpm-slow': parse_php_fpm_slow_line,
+    'nginx-access': parse_nginx_access_line,
+    'nginx-error': parse_nginx_error_line,
+    'node': parse_node_line,
+}
+
+DEFAULT_PARSER = 'wordpress'
+
+
+def get_parser(name: Optional[str]) -> LineParser:
+    """
+    Obtiene la función de parseo registrada con un nombre.
+
+    Args:
+        name: Nombre del parser (None = parser por defecto)
+
+    Returns:
+        LineParser: Función de parseo
+
+    Raises:
+        ValueError: Si el parser no existe
+    """
+    parser_name = name or DEFAULT_PARSER
+    if parser_name not in PARSERS:
+        raise ValueError(f"Parser desconocido: {parser_name}")
+    return PARSERS[parser_name]
+
+
+def get_parser_names() -> List[str]:
+    """
+    Obtiene los nombres de los parsers disponibles.
+
+    Returns:
+        List[str]: Nombres de los parsers
+    """
+    return list(PARSERS.keys())
+
+
+class AssembledRecord(NamedTuple):
+    """Registro lógico formado por una línea inicial y sus líneas de continuación."""
+    timestamp: Optional[datetime]
+    level: str
+    message: str
+    line_count: int
+
+
+class MultilineAssembler:
+    """
+    Agrupa en streaming las líneas de continuación con el registro anterior.
+
+    Una línea inicia un registro cuando el parser de la fuente reconoce su
+    timestamp; cualquier otra línea (frames de una traza, `Stack trace:`,
+    `thrown in ...`) se adjunta al registro en curso. Los registros se limitan
+    a `max_record_bytes` y `max_record_lines`; el exceso se descarta y se
+    indica al final del mensaje.
+    """
+
+    def __init__(self, parse_line: LineParser, timestamp_format: Optional[str] = None,
+                 max_record_bytes: int = MAX_RECORD_BYTES, max_record_lines: int = MAX_RECORD_LINES):
+        """
+        Inicializa el ensamblador.
+
+        Args:
+            parse_line: Parser de la fuente
+            timestamp_format: Formato de timestamp configurado para la fuente
+            max_record_bytes: Tamaño máximo del mensaje de un registro
+            max_record_lines: Número máximo de líneas de un registro
+        """
+        self.parse_line = parse_line
+        self.timestamp_format = timestamp_format
+        self.max_record_bytes = max_record_bytes
+        self.max_record_lines = max_record_lines
+        self._timestamp: Optional[datetime] = None
+        self._level = DEFAULT_LEVEL
+        self._lines: List[str] = []
+        self._size = 0
+        self._line_count = 0
+        self._dropped = 0
+        # Líneas de continuación leídas antes del primer registro
+        self._orphan = False
+
+    def _append(self, line: str) -> None:
+        """Añade una línea al registro en curso respetando los límites."""
+        self._line_count += 1
+        if len(self._lines) >= self.max_record_lines or self._size + len(line) + 1 > self.max_record_bytes:
+            self._dropped += 1
+            return
+        self._lines.append(line)
+        self._size += len(line) + 1
+
+    def _start(self, timestamp: Optional[datetime], level: str, message: str, orphan: bool = False) -> None:
+        """Comienza un registro nuevo."""
+        self._timestamp = timestamp
+        self._level = level
+        self._lines = []
+        self._size = 0
+        self._line_count = 0
+        self._dropped = 0
+        self._orphan = orphan
+        self._append(message)
+
+    def _take(self) -> Optional[AssembledRecord]:
+        """Cierra el registro en curso y lo retorna."""
+        if not self._lines:
+            return None
+        message = "\n".join(self._lines)
+        if self._dropped:
+            message += f"\n... [{self._dropped} líneas omitidas]"
+        record = AssembledRecord(self._timestamp, self._level, message, self._line_count)
+        self._lines = []
+        return record
+
+    def feed(self, line: str) -> Optional[AssembledRecord]:
+        """
+        Procesa una línea física.
+
+        Args:
+            line: Línea sin salto de línea final
+
+        Returns:
+            Optional[AssembledRecord]: Registro completado por esta línea, si lo hay
+        """
+        if not line.strip():
+            return None
+
+        parsed = self.parse_line(line, self.timestamp_format)
+        if parsed is None or parsed[0] is None:
+            if not self._lines:
+                self._start(None, DEFAULT_LEVEL, line, orphan=True)
+            else:
+                self._append(line)
+            return None
+
+        timestamp, level, message = parsed
+        if self._orphan:
+            # Las líneas huérfanas iniciales toman el timestamp del primer registro
+            self._timestamp = timestamp
+        completed = self._take()
+        self._start(timestamp, level, message)
+        return completed
+
+    def flush(self) -> Optional[AssembledRecord]:
+        """
+        Cierra el registro pendiente al final de la entrada.
+
+        Returns:
+            Optional[AssembledRecord]: Último registro, si lo hay
+        """
+        return self._take()
+
+
+def assemble_records(lines: Iterable[str], parse_line: LineParser,
+                     timestamp_format: Optional[str] = None,
+                     max_record_bytes: int = MAX_RECORD_BYTES,
+                     max_record_lines: int = MAX_RECORD_LINES) -> Iterator[AssembledRecord]:
+    """
+    Convierte líneas físicas en registros lógicos multilínea.
+
+    Args:
+        lines: Líneas del archivo
+        parse_line: Parser de la fuente
+        timestamp_format: Formato de timestamp configurado para la fuente
+        max_record_bytes: Tamaño máximo del mensaje de un registro
+        max_record_lines: Número máximo de líneas de un registro
+
+    Yields:
+        AssembledRecord: Registros en orden de archivo
+    """
+    assembler = MultilineAssembler(parse_line, timestamp_format, max_record_bytes, max_record_lines)
+    for line in lines:
+        record = assembler.feed(line.rstrip('\r\n'))
+        if record is not None:
+            yield record
+    record = assembler.flush()
+    if record is not None:
+        yield record
+
+
+def build_external_log(record: AssembledRecord, source_name: str, fallback_ts: datetime) -> Dict[str, Any]:
+    """
+    Convierte un registro ensamblado en la estructura de log usada por el merge.
+
+    Args:
+        record: Registro ensamblado
+        source_name: Nombre de la fuente
+        fallback_ts: Timestamp a usar si el registro no tiene uno propio
+
+    Returns:
+        Dict: Log externo con timestamp parseado
+    """
+    parsed_ts = record.timestamp or fallback_ts
+    return {
+        'level': record.level,
+        'message': record.message,
+        'timestamp': parsed_ts.isoformat(),
+        'parsed_timestamp': parsed_ts,
+        'source_type': 'SERVIDOR',
+        'source': source_name,
+        'line_count': record.line_count
+    }
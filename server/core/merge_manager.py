@@ -1,8 +1,103 @@
 import os
+import glob
 import json
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 from dateutil import parser
+from .config_manager import INTERNAL_SOURCE_NAME
+from .log_parsers import get_parser, normalize_timestamp, assemble_records, build_external_log
+from .parallel_parser import parse_file_parallel, iter_sorted
+from .line_counter import LineCounter
+from .merged_tail import MergedTail
+from .file_watcher import is_glob_pattern
+from .metrics import MERGE_DURATION, MERGE_RECORDS
+
+# user_agent de los registros que el FileWatcher copia desde fuentes externas
+WATCHER_USER_AGENT = 'file_watcher'
+
+# Tamaño a partir del cual una fuente completa se parsea en paralelo
+DEFAULT_PARALLEL_THRESHOLD_MB = 64
+
+# Tamaño aproximado de cada bloque enviado en las descargas en streaming
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Registros por bloque y bloques en cola por cada lector concurrente
+PREFETCH_CHUNK_SIZE = 256
+PREFETCH_MAX_CHUNKS = 16
+
+_END_OF_SOURCE = object()
+_sort_key = itemgetter('parsed_timestamp')
+
+
+class _PrefetchedSource:
+    """Lee una fuente en un hilo propio y entrega sus registros por bloques."""
+
+    def __init__(self, records: Iterable[Dict[str, Any]], name: str):
+        """
+        Inicia la lectura concurrente de una fuente.
+
+        Args:
+            records: Iterable de registros de la fuente
+            name: Nombre de la fuente (para mensajes de error)
+        """
+        self.name = name
+        self._queue: queue.Queue = queue.Queue(maxsize=PREFETCH_MAX_CHUNKS)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, args=(records,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Any) -> bool:
+        """Encola un elemento esperando mientras el consumidor siga activo."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Hilo lector: agrupa registros en bloques y los encola."""
+        count = 0
+        try:
+            chunk: List[Dict[str, Any]] = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= PREFETCH_CHUNK_SIZE:
+                    count += len(chunk)
+                    if not self._put(chunk):
+                        return
+                    chunk = []
+            if chunk:
+                count += len(chunk)
+                self._put(chunk)
+        except Exception as e:
+            print(f"Error leyendo fuente {self.name}: {e}")
+        finally:
+            # Cerrar el generador libera sus archivos temporales si se abandona la lectura
+            close = getattr(records, 'close', None)
+            if close is not None:
+                close()
+            MERGE_RECORDS.inc(count, source=self.name)
+            self._put(_END_OF_SOURCE)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            chunk = self._queue.get()
+            if chunk is _END_OF_SOURCE:
+                return
+            yield from chunk
+
+    def close(self) -> None:
+        """Detiene el hilo lector si el consumidor abandona la lectura."""
+        self._stop.set()
 
 
 class MergeManager:
@@ -17,6 +112,7 @@ class MergeManager:
         self.log_manager = log_manager
         self.config_manager = config_manager
         self.merged_file_name = "devpipe_merged.log"
+        self.line_counter = LineCounter()
     
     def get_external_log_path(self) -> str:
         """Obtiene la ruta del archivo de logs externos desde configuración."""
@@ -30,6 +126,43 @@ class MergeManager:
             return self.config_manager.set_external_log_path(path)
         return False
 
+    def get_external_sources(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene las fuentes de logs externos configuradas.
+
+        Args:
+            names: Nombres de las fuentes a incluir (None = todas)
+
+        Returns:
+            Lista de fuentes ({name, path, parser, timestampFormat})
+        """
+        if self.config_manager:
+            return self.config_manager.get_external_sources(names)
+        return []
+
+    def get_source_files(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene las fuentes externas con los patrones glob expandidos a archivos.
+
+        Una fuente con una ruta como `/var/www/*/wp-content/debug.log` produce
+        una entrada por archivo, todas con el nombre y el parser de la fuente.
+
+        Args:
+            names: Nombres de las fuentes a incluir (None = todas)
+
+        Returns:
+            Lista de fuentes, una por archivo
+        """
+        files: List[Dict[str, Any]] = []
+        for source in self.get_external_sources(names):
+            if is_glob_pattern(source['path']):
+                for path in sorted(glob.glob(source['path'], recursive=True)):
+                    if os.path.isfile(path):
+                        files.append({**source, 'path': path})
+            else:
+                files.append(source)
+        return files
+
     def get_merged_file_path(self) -> str:
         """Obtiene la ruta del archivo merged desde configuración."""
         if self.config_manager:
@@ -58,6 +191,72 @@ class MergeManager:
             return self.config_manager.set_merged_log_path(path)
         return False
     
+    def _parse_internal_line(self, line: str, fallback_ts: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Convierte una línea de devpipe.log en un registro para el merge.
+
+        Args:
+            line: Línea JSON del log interno
+            fallback_ts: Timestamp si ni 'timestamp' ni 'server_timestamp' son
+                válidos (normalmente el del registro anterior; None = datetime.min)
+
+        Returns:
+            Registro con timestamp parseado o None si la línea es inválida
+        """
+        try:
+            log = json.loads(line.strip())
+        except ValueError:
+            return None
+        if not isinstance(log, dict):
+            return None
+        if log.get('user_agent') == WATCHER_USER_AGENT:
+            # Copia de una línea externa ingerida por el FileWatcher: la fuente se lee directamente
+            return None
+
+        # Añadir timestamp parseado para ordenamiento: el del cliente, si no el
+        # de recepción y si no el de reserva, para que el orden sea reproducible
+        log['parsed_timestamp'] = fallback_ts or datetime.min
+        for key in ('timestamp', 'server_timestamp'):
+            timestamp_str = log.get(key)
+            if not timestamp_str:
+                continue
+            try:
+                log['parsed_timestamp'] = normalize_timestamp(parser.parse(timestamp_str))
+                break
+            except (ValueError, OverflowError, TypeError):
+                continue
+
+        log['source_type'] = 'CONSOLA'
+        return log
+
+    def iter_internal_logs(self, limit: Optional[int] = None, sort_by_time: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Itera los logs internos (de devpipe.js) de todos los segmentos.
+
+        devpipe.log está en orden de llegada, no en el de los timestamps de
+        los clientes, así que para un merge por tiempo hay que ordenarlo.
+
+        Args:
+            limit: Número máximo de logs a obtener (None = todos)
+            sort_by_time: Si True, en orden de timestamp (ordenamiento externo
+                con memoria acotada); si False, en orden de escritura
+        """
+        if not self.log_manager:
+            return
+        if sort_by_time:
+            yield from iter_sorted(self.iter_internal_logs(limit))
+            return
+
+        try:
+            previous_ts: Optional[datetime] = None
+            for line in self.log_manager.get_backend().iter_lines(limit=limit):
+                log = self._parse_internal_line(line, previous_ts)
+                if log is not None:
+                    previous_ts = log['parsed_timestamp']
+                    yield log
+        except Exception as e:
+            print(f"Error leyendo logs internos: {e}")
+
     def get_internal_logs(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Obtiene logs internos (de devpipe.js).
@@ -68,124 +267,188 @@ class MergeManager:
         Returns:
             Lista de logs internos con timestamp parseado
         """
-        logs = []
-        if not self.log_manager:
-            return logs
-            
-        log_file = self.log_manager._get_log_file()
-        if not os.path.exists(log_file):
-            return logs
-        
+        return list(self.iter_internal_logs(limit))
+
+    def iter_source_logs(self, source: Dict[str, Any], limit: Optional[int] = None,
+                         sort_by_time: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Itera los registros de una fuente externa usando su parser.
+
+        Las líneas sin timestamp inicial (trazas de PHP, continuación de errores
+        fatales) se adjuntan al registro anterior en lugar de formar registros propios.
+
+        Args:
+            source: Definición de la fuente ({name, path, parser, timestampFormat})
+            limit: Número máximo de registros a obtener (None = todos)
+            sort_by_time: Si True, en orden de timestamp aunque el archivo no lo
+                esté (el parseo paralelo ya lo devuelve ordenado)
+        """
+        path = source.get('path', '')
+        if not path or not os.path.exists(path):
+            return
+
+        if limit is None and self._should_parse_in_parallel(path):
+            yield from self._iter_source_logs_parallel(source, path)
+            return
+        records = self._iter_source_logs_sequential(source, path, limit)
+        yield from (iter_sorted(records) if sort_by_time else records)
+
+    def _iter_source_logs_sequential(self, source: Dict[str, Any], path: str,
+                                     limit: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """Parsea una fuente en este hilo, en orden de archivo."""
+        parse_line = get_parser(source.get('parser'))
+        timestamp_format = source.get('timestampFormat') or None
+        source_name = source.get('name', '')
+
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+            # Registros sin ningún timestamp en el archivo usan su fecha de modificación
+            fallback_ts = datetime.fromtimestamp(os.path.getmtime(path))
+            with open(path, "r", encoding="utf-8", errors='ignore') as f:
+                records = assemble_records(f, parse_line, timestamp_format)
                 if limit:
-                    lines = lines[-limit:]
-                
-                for line in lines:
-                    try:
-                        log = json.loads(line.strip())
-                        # Añadir timestamp parseado para ordenamiento
-                        timestamp_str = log.get('timestamp') or log.get('server_timestamp', '')
-                        if timestamp_str:
-                            try:
-                                log['parsed_timestamp'] = parser.parse(timestamp_str)
-                            except:
-                                log['parsed_timestamp'] = datetime.now()
-                        else:
-                            log['parsed_timestamp'] = datetime.now()
-                        
-                        log['source_type'] = 'CONSOLA'
-                        logs.append(log)
-                    except:
-                        continue
+                    records = deque(records, maxlen=limit)
+
+                for record in records:
+                    yield build_external_log(record, source_name, fallback_ts)
         except Exception as e:
-            print(f"Error leyendo logs internos: {e}")
-        
-        return logs
-    
-    def get_external_logs(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+            print(f"Error leyendo logs externos ({source_name}): {e}")
+
+    def _should_parse_in_parallel(self, path: str) -> bool:
+        """Indica si el archivo supera el umbral de parseo paralelo configurado."""
+        threshold_mb = DEFAULT_PARALLEL_THRESHOLD_MB
+        if self.config_manager:
+            threshold_mb = self.config_manager.get_config().get("parallelParseThresholdMB", threshold_mb)
+        if not threshold_mb or threshold_mb <= 0 or (os.cpu_count() or 1) < 2:
+            return False
+        try:
+            return os.path.getsize(path) >= threshold_mb * 1024 * 1024
+        except OSError:
+            return False
+
+    def _iter_source_logs_parallel(self, source: Dict[str, Any], path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Parsea una fuente completa en un pool de procesos.
+
+        Cada bloque del archivo vuelve como una secuencia ya ordenada por
+        tiempo, volcada a un archivo temporal; aquí solo se combinan con un
+        k-way merge que los lee en streaming.
+        """
+        try:
+            result = parse_file_parallel(source, path)
+        except Exception as e:
+            print(f"Error en parseo paralelo ({source.get('name', '')}): {e}")
+            return
+        try:
+            yield from heapq.merge(*result.runs, key=_sort_key)
+        finally:
+            result.close()
+
+    def get_external_logs(self, limit: Optional[int] = None,
+                          sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
-        Obtiene logs externos (WordPress).
+        Obtiene logs externos de todas las fuentes configuradas.
 
         Args:
-            limit: Número máximo de logs a obtener (None = todos)
+            limit: Número máximo de logs a obtener por fuente (None = todos)
+            sources: Nombres de las fuentes a incluir (None = todas)
 
         Returns:
-            Lista de logs externos con timestamp parseado
+            Lista de logs externos con timestamp parseado, ordenada por tiempo
         """
-        logs = []
-        external_log_path = self.get_external_log_path()
-        if not external_log_path or not os.path.exists(external_log_path):
-            return logs
-        
+        external_sources = self.get_source_files(sources)
+        return list(heapq.merge(
+            *(self.iter_source_logs(source, limit, sort_by_time=True) for source in external_sources),
+            key=_sort_key
+        ))
+
+    @staticmethod
+    def includes_internal(sources: Optional[List[str]]) -> bool:
+        """Indica si una selección de fuentes incluye los logs internos."""
+        return sources is None or INTERNAL_SOURCE_NAME in sources
+
+    def iter_merged_logs(self, internal_limit: Optional[int] = None,
+                         external_limit: Optional[int] = None,
+                         sort_by_time: bool = True,
+                         sources: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Combina logs internos y de las fuentes externas en una sola pasada.
+
+        Cada fuente se lee en su propio hilo, de modo que la latencia total es
+        la de la fuente más lenta y no la suma de todas. Con sort_by_time cada
+        hilo ordena su fuente (devpipe.log está en orden de llegada y un log
+        externo puede tener saltos de reloj) con un ordenamiento externo de
+        memoria acotada, y el merge por tiempo es un k-way merge.
+
+        Args:
+            internal_limit: Límite de logs internos (None = todos)
+            external_limit: Límite de logs por fuente externa (None = todos)
+            sort_by_time: Si True, ordena por tiempo. Si False, primero internos luego externos
+            sources: Fuentes a incluir; 'devpipe' selecciona los internos (None = todas)
+        """
+        readers: List[_PrefetchedSource] = []
+        if self.includes_internal(sources):
+            readers.append(_PrefetchedSource(self.iter_internal_logs(internal_limit, sort_by_time),
+                                             INTERNAL_SOURCE_NAME))
+        for source in self.get_source_files(sources):
+            readers.append(_PrefetchedSource(self.iter_source_logs(source, external_limit, sort_by_time),
+                                             source['name']))
+
+        start = time.perf_counter()
+        completed = False
         try:
-            with open(external_log_path, "r", encoding="utf-8", errors='ignore') as f:
-                lines = f.readlines()
-                if limit:
-                    lines = lines[-limit:]
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Crear estructura de log para líneas externas
-                    log = {
-                        'level': 'external',
-                        'message': line,
-                        'timestamp': datetime.now().isoformat(),
-                        'parsed_timestamp': datetime.now(),
-                        'source_type': 'SERVIDOR',
-                        'source': 'wordpress'
-                    }
-                    
-                    # Intentar extraer timestamp si existe en la línea
-                    # Formato común: [2024-01-01 12:00:00] mensaje
-                    if line.startswith('[') and ']' in line:
-                        try:
-                            timestamp_end = line.find(']')
-                            timestamp_str = line[1:timestamp_end]
-                            parsed_ts = parser.parse(timestamp_str)
-                            log['timestamp'] = parsed_ts.isoformat()
-                            log['parsed_timestamp'] = parsed_ts
-                            log['message'] = line[timestamp_end + 1:].strip()
-                        except:
-                            pass
-                    
-                    logs.append(log)
-        except Exception as e:
-            print(f"Error leyendo logs externos: {e}")
-        
-        return logs
-    
+            if sort_by_time:
+                yield from heapq.merge(*readers, key=_sort_key)
+            else:
+                yield from itertools.chain.from_iterable(readers)
+            completed = True
+        finally:
+            for reader in readers:
+                reader.close()
+            if completed:
+                MERGE_DURATION.observe(time.perf_counter() - start, sorted=str(sort_by_time).lower())
+
     def merge_logs(self, internal_limit: Optional[int] = None, 
                    external_limit: Optional[int] = None, 
-                   sort_by_time: bool = True) -> List[Dict[str, Any]]:
+                   sort_by_time: bool = True,
+                   sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Combina logs internos y externos.
         
         Args:
             internal_limit: Límite de logs internos (None = todos)
-            external_limit: Límite de logs externos (None = todos)
+            external_limit: Límite de logs por fuente externa (None = todos)
             sort_by_time: Si True, ordena por tiempo. Si False, primero internos luego externos
+            sources: Fuentes a incluir; 'devpipe' selecciona los internos (None = todas)
             
         Returns:
             Lista de logs combinados
         """
-        internal_logs = self.get_internal_logs(internal_limit)
-        external_logs = self.get_external_logs(external_limit)
-        
-        if sort_by_time:
-            # Combinar y ordenar por timestamp
-            all_logs = internal_logs + external_logs
-            all_logs.sort(key=lambda x: x.get('parsed_timestamp', datetime.min))
-        else:
-            # Primero internos, luego externos
-            all_logs = internal_logs + external_logs
-        
-        return all_logs
+        return list(self.iter_merged_logs(internal_limit, external_limit, sort_by_time, sources))
     
+    def open_live_tail(self, sources: Optional[List[str]] = None,
+                       max_lateness_ms: Optional[int] = None) -> MergedTail:
+        """
+        Crea un tail en vivo, ordenado por tiempo, de los logs internos y externos.
+
+        Args:
+            sources: Fuentes a incluir; 'devpipe' selecciona los internos (None = todas)
+            max_lateness_ms: Demora máxima de reordenamiento (None = configuración)
+
+        Returns:
+            MergedTail listo para iterar
+        """
+        stream_config: Dict[str, Any] = {}
+        if self.config_manager:
+            stream_config = self.config_manager.get_config().get("stream", {})
+        if max_lateness_ms is None:
+            max_lateness_ms = stream_config.get("maxLatenessMs", 2000)
+        return MergedTail(
+            self,
+            sources=sources,
+            max_lateness_ms=max_lateness_ms,
+            poll_interval_ms=stream_config.get("pollIntervalMs", 250)
+        )
+
     def format_log_for_merged_file(self, log: Dict[str, Any]) -> str:
         """
         Formatea un log para el archivo merged con cabeceras.
@@ -203,21 +466,61 @@ class MergeManager:
         # Formato: [TIMESTAMP] [TIPO] mensaje
         return f"[{timestamp}] [{source_type:>8}] {message}"
     
+    def serialize_log(self, log: Dict[str, Any]) -> str:
+        """
+        Serializa un log como una línea NDJSON.
+
+        Args:
+            log: Diccionario del log
+
+        Returns:
+            Línea JSON sin el timestamp parseado interno
+        """
+        return json.dumps({key: value for key, value in log.items() if key != 'parsed_timestamp'},
+                          default=str, ensure_ascii=False)
+
+    def iter_export_chunks(self, logs: Iterable[Dict[str, Any]], output_format: str = 'text') -> Iterator[str]:
+        """
+        Formatea logs para una descarga en streaming, agrupados en bloques.
+
+        Args:
+            logs: Logs a exportar (normalmente de iter_merged_logs)
+            output_format: 'text' (formato del archivo merged) o 'ndjson'
+
+        Yields:
+            Bloques de texto de ~EXPORT_CHUNK_BYTES
+        """
+        formatter = self.serialize_log if output_format == 'ndjson' else self.format_log_for_merged_file
+        buffer: List[str] = []
+        buffered = 0
+        for log in logs:
+            line = formatter(log) + '\n'
+            buffer.append(line)
+            buffered += len(line)
+            if buffered >= EXPORT_CHUNK_BYTES:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield ''.join(buffer)
+
     def create_merged_file(self, internal_limit: Optional[int] = None,
                           external_limit: Optional[int] = None,
-                          sort_by_time: bool = True) -> str:
+                          sort_by_time: bool = True,
+                          sources: Optional[List[str]] = None) -> str:
         """
         Crea el archivo devpipe_merged.log.
         
         Args:
             internal_limit: Límite de logs internos
-            external_limit: Límite de logs externos  
+            external_limit: Límite de logs por fuente externa
             sort_by_time: Si ordenar por tiempo o no
+            sources: Fuentes a incluir (None = todas)
             
         Returns:
             Ruta del archivo creado
         """
-        merged_logs = self.merge_logs(internal_limit, external_limit, sort_by_time)
+        merged_logs = self.iter_merged_logs(internal_limit, external_limit, sort_by_time, sources)
         merged_file_path = self.get_merged_file_path()
         
         # Asegurar que existe el directorio
@@ -234,6 +537,29 @@ class MergeManager:
         
         return merged_file_path
     
+    def _get_file_stats(self, path: str) -> Dict[str, Any]:
+        """
+        Obtiene existencia, tamaño y líneas de un archivo.
+
+        Las líneas se cuentan con el contador incremental, así que un archivo
+        sin cambios solo cuesta un `os.stat`.
+        """
+        file_stats = {'exists': False, 'size_kb': 0, 'lines': 0}
+        if not path:
+            return file_stats
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return file_stats
+
+        file_stats['exists'] = True
+        file_stats['size_kb'] = round(size / 1024, 2)
+        try:
+            file_stats['lines'] = self.line_counter.count_lines(path)
+        except OSError:
+            pass
+        return file_stats
+
     def get_merged_stats(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas de los archivos de logs.
@@ -241,59 +567,49 @@ class MergeManager:
         Returns:
             Diccionario con estadísticas
         """
-        stats = {
+        stats: Dict[str, Any] = {
             'internal_log': {'exists': False, 'size_kb': 0, 'lines': 0},
-            'external_log': {'exists': False, 'size_kb': 0, 'lines': 0},
-            'merged_log': {'exists': False, 'size_kb': 0, 'lines': 0}
+            'external_log': self._get_file_stats(self.get_external_log_path()),
+            'merged_log': self._get_file_stats(self.get_merged_file_path())
         }
-        
-        # Estadísticas del log interno
+
         if self.log_manager:
-            internal_file = self.log_manager._get_log_file()
-            if os.path.exists(internal_file):
-                stats['internal_log']['exists'] = True
-                stats['internal_log']['size_kb'] = round(os.path.getsize(internal_file) / 1024, 2)
-                try:
-                    with open(internal_file, 'r', encoding='utf-8') as f:
-                        stats['internal_log']['lines'] = sum(1 for _ in f)
-                except:
-                    pass
-        
-        # Estadísticas del log externo
-        external_log_path = self.get_external_log_path()
-        if external_log_path and os.path.exists(external_log_path):
-            stats['external_log']['exists'] = True
-            stats['external_log']['size_kb'] = round(os.path.getsize(external_log_path) / 1024, 2)
-            try:
-                with open(external_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    stats['external_log']['lines'] = sum(1 for _ in f)
-            except:
-                pass
-        
-        # Estadísticas del archivo merged
-        merged_file = self.get_merged_file_path()
-        if os.path.exists(merged_file):
-            stats['merged_log']['exists'] = True
-            stats['merged_log']['size_kb'] = round(os.path.getsize(merged_file) / 1024, 2)
-            try:
-                with open(merged_file, 'r', encoding='utf-8') as f:
-                    stats['merged_log']['lines'] = sum(1 for _ in f)
-            except:
-                pass
+            store_stats = self.log_manager.get_backend().stats()
+            stats['internal_log'] = {
+                'exists': store_stats['records'] > 0 or store_stats['bytes'] > 0,
+                'size_kb': round(store_stats['bytes'] / 1024, 2),
+                'lines': store_stats['records'],
+                'segments': store_stats['segments']
+            }
+
+        # Estadísticas por fuente externa
+        stats['sources'] = {}
+        for source in self.get_external_sources():
+            stats['sources'][source['name']] = {
+                **self._get_file_stats(source['path']),
+                'path': source['path'],
+                'parser': source['parser']
+            }
         
         return stats
     
     def clear_all_logs(self) -> Dict[str, bool]:
         """
         Borra todos los archivos de logs.
+
+        Se vacían los logs internos, el archivo de cada fuente externa
+        configurada (incluida la ruta heredada externalLogPath y los archivos
+        que coincidan con las rutas glob) y se elimina el archivo merged.
         
         Returns:
-            Diccionario con el resultado de cada operación
+            Diccionario con el resultado de cada operación; 'sources_cleared'
+            lista las rutas externas vaciadas
         """
         results = {
             'internal_cleared': False,
             'external_cleared': False,
-            'merged_cleared': False
+            'merged_cleared': False,
+            'sources_cleared': []
         }
         
         # Limpiar log interno
@@ -304,15 +620,19 @@ class MergeManager:
             except:
                 pass
         
-        # Limpiar log externo
-        external_log_path = self.get_external_log_path()
-        if external_log_path and os.path.exists(external_log_path):
+        # Limpiar los archivos de todas las fuentes externas
+        for source in self.get_source_files():
+            path = source['path']
+            if path in results['sources_cleared'] or not os.path.exists(path):
+                continue
             try:
-                with open(external_log_path, 'w', encoding='utf-8') as f:
+                with open(path, 'w', encoding='utf-8') as f:
                     f.write('')
-                results['external_cleared'] = True
-            except:
-                pass
+                self.line_counter.forget(path)
+                results['sources_cleared'].append(path)
+            except OSError as e:
+                print(f"Error vaciando {path}: {e}")
+        results['external_cleared'] = bool(results['sources_cleared'])
         
         # Limpiar archivo merged
         merged_file = self.get_merged_file_path()
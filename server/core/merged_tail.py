@@ -0,0 +1,336 @@
+import heapq
+import itertools
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .log_parsers import MultilineAssembler, build_external_log, get_parser
+
+# Máximo de bytes leídos por archivo en cada sondeo
+MAX_READ_BYTES = 1024 * 1024
+# Máximo de registros leídos de la base SQLite en cada sondeo
+MAX_READ_RECORDS = 5000
+# Intervalo de comentarios keep-alive del stream SSE
+KEEPALIVE_SECONDS = 15.0
+# Sondeos sin datos nuevos tras los que se cierra un registro multilínea pendiente
+FLUSH_IDLE_POLLS = 4
+
+
+class ReorderBuffer:
+    """
+    Buffer de reordenamiento por watermark.
+
+    Los registros se retienen hasta que el watermark (el mayor timestamp visto
+    menos la demora máxima permitida) los supera, de modo que registros que
+    llegan un poco tarde desde otra fuente todavía salen en orden. Si no llegan
+    registros durante la demora máxima, se vacía el buffer completo.
+    """
+
+    def __init__(self, max_lateness: timedelta):
+        """
+        Inicializa el buffer.
+
+        Args:
+            max_lateness: Demora máxima tolerada para un registro tardío
+        """
+        self.max_lateness = max_lateness
+        self._heap: List[Tuple[datetime, int, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._max_seen: Optional[datetime] = None
+        self._last_emitted: Optional[datetime] = None
+        self._last_push = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, log: Dict[str, Any]) -> None:
+        """
+        Añade un registro al buffer.
+
+        Args:
+            log: Registro con 'parsed_timestamp'
+        """
+        timestamp = log['parsed_timestamp']
+        if self._max_seen is None or timestamp > self._max_seen:
+            self._max_seen = timestamp
+        heapq.heappush(self._heap, (timestamp, next(self._sequence), log))
+        self._last_push = time.monotonic()
+
+    def pop_ready(self) -> List[Dict[str, Any]]:
+        """
+        Retira los registros que ya se pueden emitir en orden.
+
+        Returns:
+            List[Dict]: Registros ordenados por tiempo; los que llegaron después
+            de la demora máxima se marcan con 'late'
+        """
+        if not self._heap or self._max_seen is None:
+            return []
+
+        idle = time.monotonic() - self._last_push >= self.max_lateness.total_seconds()
+        watermark = self._max_seen - self.max_lateness
+
+        ready: List[Dict[str, Any]] = []
+        while self._heap and (idle or self._heap[0][0] <= watermark):
+            timestamp, _, log = heapq.heappop(self._heap)
+            if self._last_emitted is not None and timestamp < self._last_emitted:
+                log['late'] = True
+            else:
+                self._last_emitted = timestamp
+            ready.append(log)
+        return ready
+
+
+class _TailReader:
+    """Lee las líneas completas añadidas a un archivo desde la última lectura."""
+
+    def __init__(self, path: str):
+        """
+        Inicia la lectura al final actual del archivo.
+
+        Args:
+            path: Ruta del archivo
+        """
+        self.path = path
+        self.offset = 0
+        self.inode: Optional[Tuple[int, int]] = None
+        self._partial = b''
+        try:
+            stat = os.stat(path)
+            self.offset = stat.st_size
+            self.inode = (stat.st_dev, stat.st_ino)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _find_by_inode(directory: str, dev: int, ino: int) -> Optional[str]:
+        """Busca en el directorio el archivo rotado con el inodo indicado."""
+        try:
+            with os.scandir(directory or '.') as entries:
+                for entry in entries:
+                    if entry.inode() == ino and entry.is_file(follow_symlinks=False):
+                        if entry.stat(follow_symlinks=False).st_dev == dev:
+                            return entry.path
+        except OSError:
+            pass
+        return None
+
+    def _read(self, path: str, size: int) -> bytes:
+        """Lee desde el offset actual hasta `size` (como máximo MAX_READ_BYTES) y avanza el offset."""
+        with open(path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, MAX_READ_BYTES))
+        self.offset += len(data)
+        return data
+
+    def _drain_rotated(self) -> List[str]:
+        """
+        Lee hasta el final el archivo anterior a una rotación por renombrado.
+
+        Returns:
+            List[str]: Líneas pendientes del inodo anterior, incluida la última sin salto de línea
+        """
+        if self.inode is None:
+            return []
+        old_path = self._find_by_inode(os.path.dirname(self.path), *self.inode)
+        if old_path is None:
+            return []
+        data = b''
+        try:
+            size = os.stat(old_path).st_size
+            while self.offset < size:
+                chunk = self._read(old_path, size)
+                if not chunk:
+                    break
+                data += chunk
+        except OSError:
+            pass
+        data = self._partial + data
+        self._partial = b''
+        if not data:
+            return []
+        return data.rstrip(b'\n').decode('utf-8', errors='replace').split('\n')
+
+    def read_lines(self) -> List[str]:
+        """
+        Lee las líneas nuevas.
+
+        Returns:
+            List[str]: Líneas completas añadidas (vacío si no hay cambios)
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+
+        lines: List[str] = []
+        inode = (stat.st_dev, stat.st_ino)
+        if inode != self.inode:
+            # Rotado o recreado: vaciar primero el inodo anterior y leer el nuevo desde el inicio
+            lines = self._drain_rotated()
+            self.inode = inode
+            self.offset = 0
+            self._partial = b''
+        elif stat.st_size < self.offset:
+            # Truncado: leer desde el inicio
+            self.offset = 0
+            self._partial = b''
+
+        if stat.st_size == self.offset:
+            return lines
+
+        data = self._partial + self._read(self.path, stat.st_size)
+        end = data.rfind(b'\n')
+        if end < 0:
+            self._partial = data
+            return lines
+        self._partial = data[end + 1:]
+        return lines + data[:end].decode('utf-8', errors='replace').split('\n')
+
+
+class _SqliteTailReader:
+    """Lee los registros añadidos a la base SQLite desde la última lectura."""
+
+    def __init__(self, store):
+        """
+        Inicia la lectura tras el último registro confirmado.
+
+        Args:
+            store: SqliteStore del directorio
+        """
+        self.store = store
+        self.last_id = store.last_id()
+
+    def read_lines(self) -> List[str]:
+        """
+        Lee los registros nuevos.
+
+        Returns:
+            List[str]: Líneas JSON de los registros nuevos
+        """
+        self.last_id, lines = self.store.read_since(self.last_id, MAX_READ_RECORDS)
+        return lines
+
+
+class MergedTail:
+    """
+    Tail en vivo de los logs internos (devpipe.log o la base SQLite, según el
+    backend) y las fuentes externas en un solo stream ordenado.
+    """
+
+    def __init__(self, merge_manager, sources: Optional[List[str]] = None,
+                 max_lateness_ms: int = 2000, poll_interval_ms: int = 250):
+        """
+        Inicializa el tail combinado.
+
+        Args:
+            merge_manager: MergeManager con acceso a logs internos y fuentes
+            sources: Fuentes a incluir; 'devpipe' selecciona los internos (None = todas)
+            max_lateness_ms: Demora máxima tolerada para reordenar registros
+            poll_interval_ms: Intervalo de sondeo de los archivos
+        """
+        self.merge_manager = merge_manager
+        self.poll_interval = max(poll_interval_ms, 10) / 1000
+        self.buffer = ReorderBuffer(timedelta(milliseconds=max(max_lateness_ms, 0)))
+        self.include_internal = merge_manager.log_manager is not None and merge_manager.includes_internal(sources)
+        self._internal_reader: Optional[Union[_TailReader, _SqliteTailReader]] = None
+        self._internal_key: Optional[Tuple[str, str]] = None
+        if self.include_internal:
+            self._open_internal_reader()
+
+        self._external: List[Dict[str, Any]] = []
+        for source in merge_manager.get_source_files(sources):
+            self._external.append({
+                "name": source["name"],
+                "reader": _TailReader(source["path"]),
+                "assembler": MultilineAssembler(get_parser(source.get("parser")),
+                                                source.get("timestampFormat") or None),
+                "last_data": time.monotonic()
+            })
+
+    def _open_internal_reader(self) -> None:
+        """
+        Abre el lector de logs internos del backend y directorio actuales.
+
+        Con el backend 'segments' se sigue devpipe.log; con 'sqlite' se leen
+        las filas nuevas de la base. Si cambia el backend o el directorio se
+        vuelve a abrir desde el final.
+        """
+        log_manager = self.merge_manager.log_manager
+        if log_manager.get_backend_name() == "sqlite":
+            store = log_manager.get_backend()
+            key = ("sqlite", f"{store.database.path}#{store.token}")
+            if key != self._internal_key:
+                self._internal_reader = _SqliteTailReader(store)
+        else:
+            key = ("segments", log_manager._get_log_file())
+            if key != self._internal_key:
+                self._internal_reader = _TailReader(key[1])
+        self._internal_key = key
+
+    def _poll_internal(self) -> None:
+        """Lee los registros internos nuevos del backend configurado."""
+        self._open_internal_reader()
+        for line in self._internal_reader.read_lines():
+            log = self.merge_manager._parse_internal_line(line)
+            if log is not None:
+                self.buffer.push(log)
+
+    def _poll_external(self, source: Dict[str, Any]) -> None:
+        """Lee los registros nuevos de una fuente externa."""
+        assembler: MultilineAssembler = source["assembler"]
+        lines = source["reader"].read_lines()
+        for line in lines:
+            record = assembler.feed(line)
+            if record is not None:
+                self.buffer.push(build_external_log(record, source["name"], datetime.now()))
+
+        now = time.monotonic()
+        if lines:
+            source["last_data"] = now
+        elif now - source["last_data"] >= FLUSH_IDLE_POLLS * self.poll_interval:
+            # Varios sondeos sin datos: el registro pendiente ya no recibirá continuaciones
+            record = assembler.flush()
+            if record is not None:
+                self.buffer.push(build_external_log(record, source["name"], datetime.now()))
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """
+        Lee todas las fuentes una vez.
+
+        Returns:
+            List[Dict]: Registros listos para emitir, ordenados por tiempo
+        """
+        if self.include_internal:
+            try:
+                self._poll_internal()
+            except Exception as e:
+                print(f"Error leyendo logs internos en vivo: {e}")
+        for source in self._external:
+            try:
+                self._poll_external(source)
+            except Exception as e:
+                print(f"Error leyendo fuente {source['name']} en vivo: {e}")
+        return self.buffer.pop_ready()
+
+    def iter_sse(self, serialize: Callable[[Dict[str, Any]], str]) -> Iterator[str]:
+        """
+        Genera el stream Server-Sent Events.
+
+        Args:
+            serialize: Función que convierte un registro en JSON
+
+        Yields:
+            Eventos SSE ('log') y comentarios keep-alive
+        """
+        last_sent = time.monotonic()
+        yield ": connected\n\n"
+        while True:
+            ready = self.poll()
+            if ready:
+                yield ''.join(f"event: log\ndata: {serialize(log)}\n\n" for log in ready)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            time.sleep(self.poll_interval)
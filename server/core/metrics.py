@@ -0,0 +1,319 @@
+import bisect
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Buckets por defecto de los histogramas de latencia (segundos)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Shards fijos entre los que se reparten los hilos
+SHARD_COUNT = 16
+
+LabelValues = Tuple[str, ...]
+
+
+class _Shard:
+    """Valores acumulados por un grupo de hilos, protegidos por su propio lock."""
+
+    __slots__ = ("lock", "values")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (métrica, etiquetas) -> float, o [cuentas por bucket..., suma, total] en histogramas
+        self.values: Dict[Tuple[str, LabelValues], object] = {}
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas con un número fijo de shards.
+
+    Cada hilo recibe al empezar uno de los SHARD_COUNT shards (por turnos) y
+    solo toma su lock, así que los hilos que escriben a la vez casi nunca
+    compiten. Como los shards no son por hilo, la memoria no crece con los
+    hilos de corta vida del servidor (uno por petición) y no hay que plegar
+    los de hilos terminados. Al exportar se suman todos los shards.
+    """
+
+    def __init__(self):
+        """Inicializa el registro vacío."""
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._shards: Tuple[_Shard, ...] = tuple(_Shard() for _ in range(SHARD_COUNT))
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._collectors: List[Tuple[str, str, Callable[[], Dict[LabelValues, float]], Sequence[str]]] = []
+
+    def _shard(self) -> _Shard:
+        """Obtiene el shard asignado al hilo actual, asignándolo la primera vez."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # next() sobre itertools.count es atómico con el GIL
+            shard = self._local.shard = self._shards[next(self._next_shard) % SHARD_COUNT]
+        return shard
+
+    @staticmethod
+    def _merge_into(target: Dict[Tuple[str, LabelValues], object], key, value) -> None:
+        """Suma un valor (escalar o de histograma) en un acumulado."""
+        current = target.get(key)
+        if isinstance(value, list):
+            if current is None:
+                target[key] = list(value)
+            else:
+                for i, item in enumerate(value):
+                    current[i] += item
+        else:
+            target[key] = (current or 0) + value
+
+    def _register(self, metric: "_Metric") -> "_Metric":
+        """Registra una métrica; si ya existe se devuelve la registrada."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> "Counter":
+        """Crea o recupera un contador."""
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> "Gauge":
+        """Crea o recupera un gauge que se puede incrementar y decrementar."""
+        return self._register(Gauge(self, name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> "Histogram":
+        """Crea o recupera un histograma."""
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def register_collector(self, name: str, help_text: str,
+                           collect: Callable[[], Dict[LabelValues, float]],
+                           labelnames: Sequence[str] = ()) -> None:
+        """
+        Registra un gauge cuyo valor se calcula al exportar (p. ej. tamaños de colas).
+
+        Args:
+            name: Nombre de la métrica
+            help_text: Descripción
+            collect: Función que devuelve {valores de etiquetas: valor}
+            labelnames: Nombres de las etiquetas
+        """
+        with self._lock:
+            self._collectors = [c for c in self._collectors if c[0] != name]
+            self._collectors.append((name, help_text, collect, tuple(labelnames)))
+
+    def _aggregate(self) -> Dict[Tuple[str, LabelValues], object]:
+        """Suma los valores de todos los shards."""
+        totals: Dict[Tuple[str, LabelValues], object] = {}
+        for shard in self._shards:
+            with shard.lock:
+                for key, value in shard.values.items():
+                    self._merge_into(totals, key, value)
+        return totals
+
+    def get_value(self, name: str, **labels: str) -> float:
+        """
+        Obtiene el valor agregado de un contador o gauge.
+
+        Returns:
+            float: Valor actual (0 si no se ha registrado nada)
+        """
+        metric = self._metrics[name]
+        value = self._aggregate().get((name, metric.label_values(labels)), 0)
+        return value[-1] if isinstance(value, list) else value
+
+    def render(self) -> str:
+        """
+        Exporta todas las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            str: Texto de exposición
+        """
+        totals = self._aggregate()
+        by_metric: Dict[str, List[Tuple[LabelValues, object]]] = {}
+        for (name, labels), value in totals.items():
+            by_metric.setdefault(name, []).append((labels, value))
+
+        lines: List[str] = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help_text}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(by_metric.get(name, []), key=lambda item: item[0]):
+                lines.extend(metric.render_samples(labels, value))
+
+        for name, help_text, collect, labelnames in list(self._collectors):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                samples = collect()
+            except Exception as e:
+                print(f"Error calculando la métrica {name}: {e}")
+                continue
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base de las métricas del registro."""
+
+    kind = "untyped"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help_text: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+
+    def label_values(self, labels: Dict[str, str]) -> LabelValues:
+        """Ordena los valores de etiquetas según `labelnames`."""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render_samples(self, labels: LabelValues, value) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Incrementa el contador en el shard del hilo actual.
+
+        Args:
+            amount: Cantidad a sumar
+            labels: Valores de las etiquetas
+        """
+        shard = self.registry._shard()
+        key = (self.name, self.label_values(labels) if labels else ("",) * len(self.labelnames))
+        with shard.lock:
+            shard.values[key] = shard.values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    """Valor que sube y baja (p. ej. peticiones en curso); se suma entre hilos."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrementa el gauge."""
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos."""
+
+    kind = "histogram"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help_text: str, labelnames: Sequence[str],
+                 buckets: Sequence[float]):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Registra una observación en el shard del hilo actual.
+
+        Args:
+            value: Valor observado
+            labels: Valores de las etiquetas
+        """
+        shard = self.registry._shard()
+        key = (self.name, self.label_values(labels) if labels else ("",) * len(self.labelnames))
+        bucket = bisect.bisect_left(self.buckets, value)
+        with shard.lock:
+            data = shard.values.get(key)
+            if data is None:
+                # Un contador por bucket, más +Inf, suma y total
+                data = [0] * (len(self.buckets) + 1) + [0.0, 0]
+                shard.values[key] = data
+            data[bucket] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def time(self, **labels: str) -> "_Timer":
+        """Mide la duración de un bloque `with` y la registra."""
+        return _Timer(self, labels)
+
+    def render_samples(self, labels: LabelValues, value) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), value):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', le))} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(value[-2])}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {value[-1]}"
+
+
+class _Timer:
+    """Context manager que registra la duración de un bloque en un histograma."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+# Registro compartido por todo el servidor
+metrics = MetricsRegistry()
+
+LOG_REQUESTS = metrics.counter(
+    "devpipe_log_requests_total", "Peticiones a /log por resultado", ("result",))
+INGEST_IN_FLIGHT = metrics.gauge(
+    "devpipe_ingest_in_flight", "Peticiones de ingesta en curso")
+WRITE_LATENCY = metrics.histogram(
+    "devpipe_write_log_seconds", "Duración de LogManager.write_logs por lote")
+RECORDS_WRITTEN = metrics.counter(
+    "devpipe_records_written_total", "Registros escritos en devpipe.log")
+BYTES_WRITTEN = metrics.counter(
+    "devpipe_bytes_written_total", "Bytes escritos en devpipe.log")
+WRITE_ERRORS = metrics.counter(
+    "devpipe_write_errors_total", "Lotes que no se pudieron escribir en devpipe.log")
+ROTATIONS = metrics.counter(
+    "devpipe_rotations_total", "Rotaciones de devpipe.log")
+FSYNC_LATENCY = metrics.histogram(
+    "devpipe_fsync_seconds", "Duración de los fsync del almacenamiento de logs por motivo", ("reason",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+COMPACTED_SEGMENTS = metrics.counter(
+    "devpipe_compacted_segments_total", "Segmentos sellados absorbidos por la compactación")
+COMPACTION_BYTES = metrics.counter(
+    "devpipe_compaction_bytes_total", "Bytes sin comprimir copiados por la compactación")
+MERGE_DURATION = metrics.histogram(
+    "devpipe_merge_seconds", "Duración de un merge completo de logs", ("sorted",))
+MERGE_RECORDS = metrics.counter(
+    "devpipe_merge_records_total", "Registros procesados por los merges", ("source",))
+WATCHER_EVENTS = metrics.counter(
+    "devpipe_watcher_events_total", "Eventos del FileWatcher por origen", ("origin",))
+WATCHER_LINES = metrics.counter(
+    "devpipe_watcher_lines_total", "Líneas nuevas leídas por el FileWatcher")
+WATCHER_LAG = metrics.histogram(
+    "devpipe_watcher_lag_seconds",
+    "Retraso entre la última modificación de un archivo y la lectura de sus datos nuevos")
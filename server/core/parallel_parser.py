@@ -0,0 +1,321 @@
+import heapq
+import math
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .log_parsers import (
+    MAX_RECORD_BYTES, MAX_RECORD_LINES, MultilineAssembler, assemble_records, build_external_log, get_parser
+)
+
+# Tamaño mínimo de cada bloque; bloques más pequeños no compensan el envío entre procesos
+MIN_CHUNK_BYTES = 8 * 1024 * 1024
+# Tamaño máximo de cada bloque: acota la memoria de cada worker al ordenar su bloque
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+# Bloques por worker, para repartir mejor la carga entre núcleos
+CHUNKS_PER_WORKER = 4
+# Registros por secuencia ordenada en memoria al ordenar una fuente completa
+SORT_RUN_RECORDS = 100000
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_sort_key = itemgetter('parsed_timestamp')
+
+# Resultado de un bloque: (líneas de continuación iniciales, timestamp del primer
+# registro, último registro del bloque en orden de archivo, archivo temporal con
+# el resto de registros ordenados por tiempo)
+ChunkResult = Tuple[List[str], Optional[datetime], Optional[Dict[str, Any]], Optional[str]]
+
+
+def _get_executor() -> Executor:
+    """
+    Obtiene el pool de procesos compartido, creándolo la primera vez.
+
+    Se usa el método 'spawn' porque el servidor tiene hilos activos y hacer
+    fork de un proceso con hilos puede dejar locks tomados en el hijo. Cada
+    worker importa de nuevo el módulo principal (como '__mp_main__'), por eso
+    main.py solo crea los managers y el FileWatcher dentro de init_server().
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def split_file_ranges(path: str, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Divide un archivo en rangos de bytes alineados a inicios de línea.
+
+    Args:
+        path: Ruta del archivo
+        chunks: Número de rangos deseado
+
+    Returns:
+        List[Tuple[int, int]]: Rangos (inicio, fin) contiguos que cubren el archivo
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    chunks = max(1, chunks)
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, chunks):
+            target = size * i // chunks
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target)
+            # Avanzar hasta el inicio de la siguiente línea
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _parse_range(path: str, start: int, end: int, source: Dict[str, Any],
+                 fallback_ts: datetime, spill_dir: str) -> ChunkResult:
+    """
+    Parsea un rango del archivo en un proceso del pool.
+
+    Las líneas de continuación al inicio del rango pertenecen al último
+    registro del rango anterior y se devuelven aparte para unirlas después.
+    Ese último registro también se devuelve aparte (el siguiente rango puede
+    ampliarlo); el resto se ordena por tiempo y se vuelca a un archivo
+    temporal, de modo que el proceso principal los lee en streaming.
+
+    Returns:
+        ChunkResult: Líneas iniciales, timestamp del primer registro, último
+        registro y archivo con los demás registros (None si no hay)
+    """
+    parse_line = get_parser(source.get('parser'))
+    timestamp_format = source.get('timestampFormat') or None
+    source_name = source.get('name', '')
+    assembler = MultilineAssembler(parse_line, timestamp_format)
+
+    head: List[str] = []
+    records: List[Dict[str, Any]] = []
+    # El primer rango no tiene registro anterior: sus líneas huérfanas se ensamblan normalmente
+    in_head = start > 0
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            raw = f.readline()
+            if not raw:
+                break
+            position += len(raw)
+            line = raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+
+            if in_head:
+                if not line.strip():
+                    continue
+                parsed = parse_line(line, timestamp_format)
+                if parsed is None or parsed[0] is None:
+                    head.append(line)
+                    continue
+                in_head = False
+
+            record = assembler.feed(line)
+            if record is not None:
+                records.append(build_external_log(record, source_name, fallback_ts))
+
+    record = assembler.flush()
+    if record is not None:
+        records.append(build_external_log(record, source_name, fallback_ts))
+
+    if not records:
+        return head, None, None, None
+
+    first_ts = records[0]['parsed_timestamp']
+    last = records.pop()
+    if not records:
+        return head, first_ts, last, None
+
+    records.sort(key=_sort_key)
+    return head, first_ts, last, _spill(records, spill_dir, f"chunk-{start}-")
+
+
+def _spill(records: List[Dict[str, Any]], spill_dir: str, prefix: str) -> str:
+    """Vuelca una secuencia de registros a un archivo temporal y retorna su ruta."""
+    fd, spill_path = tempfile.mkstemp(prefix=prefix, suffix=".pickle", dir=spill_dir)
+    with os.fdopen(fd, 'wb') as f:
+        pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        for log in records:
+            pickler.dump(log)
+            # Sin memo: cada registro se escribe y se libera por separado
+            pickler.clear_memo()
+    return spill_path
+
+
+def _iter_spilled(path: str) -> Iterator[Dict[str, Any]]:
+    """Lee los registros de un bloque volcado por _parse_range y borra el archivo al terminar."""
+    try:
+        with open(path, 'rb') as f:
+            unpickler = pickle.Unpickler(f)
+            while True:
+                try:
+                    yield unpickler.load()
+                except EOFError:
+                    return
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def iter_sorted(records: Iterable[Dict[str, Any]],
+                key: Callable[[Dict[str, Any]], Any] = _sort_key,
+                run_records: int = SORT_RUN_RECORDS) -> Iterator[Dict[str, Any]]:
+    """
+    Ordena registros por tiempo con memoria acotada (merge sort externo).
+
+    Se ordenan en memoria secuencias de `run_records` registros; si la fuente
+    no cabe en una sola, cada secuencia se vuelca a un archivo temporal y se
+    combinan con un k-way merge. El orden es estable: con el mismo timestamp
+    se respeta el orden de lectura.
+
+    Args:
+        records: Registros en cualquier orden
+        key: Clave de ordenamiento
+        run_records: Registros máximos en memoria
+
+    Yields:
+        Registros ordenados
+    """
+    run: List[Dict[str, Any]] = []
+    spill_dir: Optional[str] = None
+    spill_paths: List[str] = []
+    try:
+        for record in records:
+            run.append(record)
+            if len(run) >= run_records:
+                if spill_dir is None:
+                    spill_dir = tempfile.mkdtemp(prefix="devpipe-sort-")
+                run.sort(key=key)
+                spill_paths.append(_spill(run, spill_dir, f"run-{len(spill_paths)}-"))
+                run = []
+        run.sort(key=key)
+        if not spill_paths:
+            yield from run
+            return
+        yield from heapq.merge(*(_iter_spilled(path) for path in spill_paths), iter(run), key=key)
+    finally:
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def _attach_lines(log: Dict[str, Any], lines: List[str]) -> None:
+    """Añade líneas de continuación a un registro respetando su tamaño máximo."""
+    message = log['message']
+    kept = 0
+    for line in lines:
+        if log.get('line_count', 1) + kept >= MAX_RECORD_LINES or len(message) + len(line) + 1 > MAX_RECORD_BYTES:
+            break
+        message += '\n' + line
+        kept += 1
+    dropped = len(lines) - kept
+    if dropped:
+        message += f"\n... [{dropped} líneas omitidas]"
+    log['message'] = message
+    log['line_count'] = log.get('line_count', 1) + len(lines)
+
+
+class ParallelParseResult:
+    """
+    Secuencias ordenadas por tiempo de un parseo paralelo.
+
+    Cada bloque se lee en streaming desde su archivo temporal, así que la
+    memoria del proceso principal no depende del tamaño del archivo. Los
+    archivos temporales se borran al leerlos o al llamar a close().
+    """
+
+    def __init__(self, spill_dir: str, spill_paths: List[str], tail_records: List[Dict[str, Any]]):
+        """
+        Args:
+            spill_dir: Directorio temporal del parseo
+            spill_paths: Archivos de los bloques, en orden de archivo
+            tail_records: Registros devueltos en memoria (uno por bloque como máximo)
+        """
+        self.spill_dir = spill_dir
+        self.spill_paths = spill_paths
+        self.tail_records = sorted(tail_records, key=_sort_key)
+
+    @property
+    def runs(self) -> List[Iterator[Dict[str, Any]]]:
+        """Iteradores de cada secuencia ordenada, para un k-way merge."""
+        return [iter(self.tail_records)] + [_iter_spilled(path) for path in self.spill_paths]
+
+    def close(self) -> None:
+        """Borra los archivos temporales que queden."""
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def parse_file_parallel(source: Dict[str, Any], path: Optional[str] = None,
+                        executor: Optional[Executor] = None) -> ParallelParseResult:
+    """
+    Parsea un archivo de log externo por bloques en un pool de procesos.
+
+    Args:
+        source: Definición de la fuente ({name, path, parser, timestampFormat})
+        path: Ruta del archivo (por defecto la de la fuente)
+        executor: Pool a usar (por defecto el pool de procesos compartido)
+
+    Returns:
+        ParallelParseResult: Secuencias de registros, cada una ordenada por tiempo
+    """
+    path = path or source['path']
+    size = os.path.getsize(path)
+    executor = executor or _get_executor()
+    workers = os.cpu_count() or 1
+    chunks = max(1, min(size // MIN_CHUNK_BYTES, workers * CHUNKS_PER_WORKER),
+                 math.ceil(size / MAX_CHUNK_BYTES))
+    fallback_ts = datetime.fromtimestamp(os.path.getmtime(path))
+    spill_dir = tempfile.mkdtemp(prefix="devpipe-parse-")
+
+    try:
+        futures = [
+            executor.submit(_parse_range, path, start, end, source, fallback_ts, spill_dir)
+            for start, end in split_file_ranges(path, chunks)
+        ]
+
+        spill_paths: List[str] = []
+        tail_records: List[Dict[str, Any]] = []
+        last_log: Optional[Dict[str, Any]] = None
+        for future in futures:
+            head, first_ts, last, spill_path = future.result()
+            if head:
+                if last_log is not None:
+                    _attach_lines(last_log, head)
+                else:
+                    # Sin registro anterior: registros propios, con el timestamp
+                    # del primer registro del bloque como en el parseo secuencial
+                    orphans = [build_external_log(record, source.get('name', ''), first_ts or fallback_ts)
+                               for record in assemble_records(head, get_parser(source.get('parser')),
+                                                              source.get('timestampFormat') or None)]
+                    tail_records.extend(orphans)
+                    last_log = orphans[-1] if orphans else None
+            if spill_path is not None:
+                spill_paths.append(spill_path)
+            if last is not None:
+                tail_records.append(last)
+                last_log = last
+    except BaseException:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        raise
+    return ParallelParseResult(spill_dir, spill_paths, tail_records)
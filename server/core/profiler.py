@@ -0,0 +1,311 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+# Intervalo de muestreo por defecto del profiler
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+# Duración máxima de un perfil
+MAX_PROFILE_SECONDS = 300
+# Muestras de latencia guardadas por ruta
+ROUTE_SAMPLES = 1024
+
+
+def _frame_label(frame) -> str:
+    """Etiqueta 'módulo:función:línea' de un frame."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class SamplingProfiler:
+    """
+    Profiler de muestreo de todos los hilos del proceso.
+
+    Un hilo propio lee `sys._current_frames()` a intervalos fijos y cuenta las
+    pilas completas, sin instrumentar el código perfilado; el costo es el de
+    recorrer las pilas en cada muestra.
+    """
+
+    def __init__(self):
+        """Inicializa el profiler detenido."""
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.interval = DEFAULT_SAMPLE_INTERVAL_MS / 1000
+
+    @property
+    def running(self) -> bool:
+        """Indica si hay un perfil en curso."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval_ms: int = DEFAULT_SAMPLE_INTERVAL_MS) -> bool:
+        """
+        Inicia un perfil en segundo plano.
+
+        Args:
+            seconds: Duración del perfil (máximo MAX_PROFILE_SECONDS)
+            interval_ms: Intervalo entre muestras
+
+        Returns:
+            bool: False si ya había un perfil en curso
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self.samples = 0
+            self.interval = max(interval_ms, 1) / 1000
+            self.started_at = time.time()
+            self.finished_at = None
+            self._stop.clear()
+            duration = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+            self._thread = threading.Thread(target=self._run, args=(duration,), name="SamplingProfiler",
+                                            daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        """Detiene el perfil en curso."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, duration: float) -> None:
+        """Hilo de muestreo."""
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.finished_at = time.time()
+
+    def collapsed(self) -> str:
+        """
+        Obtiene las pilas en formato 'collapsed' (entrada de flamegraph.pl / speedscope).
+
+        Returns:
+            str: Una línea 'hilo;frame;...;frame cuenta' por pila
+        """
+        stacks = self._stacks.copy()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def top(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Resume las muestras por función, como la tabla de pstats.
+
+        Args:
+            limit: Número de funciones a devolver
+
+        Returns:
+            List[Dict]: Funciones con muestras propias (self) y acumuladas
+            (cumulative) y su tiempo estimado, ordenadas por 'self'
+        """
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self._stacks.copy().items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                cumulative[frame] += count
+
+        return [
+            {
+                "function": function,
+                "self": own[function],
+                "cumulative": cumulative[function],
+                "selfSeconds": round(own[function] * self.interval, 4),
+                "cumulativeSeconds": round(cumulative[function] * self.interval, 4)
+            }
+            for function, _ in sorted(cumulative.items(), key=lambda item: (-own[item[0]], -item[1]))[:limit]
+        ]
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado del perfil actual o del último.
+
+        Returns:
+            Dict: Si está en curso, muestras tomadas e intervalo
+        """
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "intervalMs": self.interval * 1000,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+
+
+class MemoryTracker:
+    """Snapshots de tracemalloc y diferencias entre ellos."""
+
+    def __init__(self):
+        """Inicializa el tracker sin snapshots."""
+        self._snapshots: Deque[tracemalloc.Snapshot] = deque(maxlen=2)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _format_stats(stats, limit: int) -> List[Dict[str, Any]]:
+        result = []
+        for stat in stats[:limit]:
+            frame = stat.traceback[0]
+            entry = {
+                "location": f"{frame.filename}:{frame.lineno}",
+                "sizeBytes": stat.size,
+                "count": stat.count
+            }
+            if hasattr(stat, "size_diff"):
+                entry["sizeDiffBytes"] = stat.size_diff
+                entry["countDiff"] = stat.count_diff
+            result.append(entry)
+        return result
+
+    def start(self, frames: int = 1) -> None:
+        """
+        Activa tracemalloc.
+
+        Args:
+            frames: Frames guardados por asignación
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(frames, 1))
+
+    def stop(self) -> None:
+        """Desactiva tracemalloc y descarta los snapshots."""
+        with self._lock:
+            self._snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def snapshot(self, limit: int = 30) -> Dict[str, Any]:
+        """
+        Toma un snapshot y devuelve las líneas con más memoria asignada.
+
+        Args:
+            limit: Número de líneas a devolver
+
+        Returns:
+            Dict: Memoria trazada actual y máxima, y las líneas principales
+
+        Raises:
+            RuntimeError: Si tracemalloc no está activo
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc no está activo")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with self._lock:
+            self._snapshots.append(snapshot)
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracedBytes": current,
+            "peakBytes": peak,
+            "top": self._format_stats(snapshot.statistics("lineno"), limit)
+        }
+
+    def diff(self, limit: int = 30) -> Dict[str, Any]:
+        """
+        Compara los dos últimos snapshots.
+
+        Args:
+            limit: Número de líneas a devolver
+
+        Returns:
+            Dict: Líneas con mayor crecimiento de memoria entre ambos
+
+        Raises:
+            RuntimeError: Si no hay dos snapshots
+        """
+        with self._lock:
+            if len(self._snapshots) < 2:
+                raise RuntimeError("Se necesitan dos snapshots para comparar")
+            previous, latest = self._snapshots
+        stats = latest.compare_to(previous, "lineno")
+        return {
+            "sizeDiffBytes": sum(stat.size_diff for stat in stats),
+            "top": self._format_stats(stats, limit)
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """Indica si tracemalloc está activo y cuántos snapshots hay."""
+        return {"tracing": tracemalloc.is_tracing(), "snapshots": len(self._snapshots)}
+
+
+class RouteTimings:
+    """Últimas latencias de cada ruta para calcular percentiles."""
+
+    def __init__(self, samples: int = ROUTE_SAMPLES):
+        """
+        Inicializa los registros de latencia.
+
+        Args:
+            samples: Latencias guardadas por ruta
+        """
+        self.samples = samples
+        self._routes: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        """
+        Registra la latencia de una petición.
+
+        Args:
+            route: 'MÉTODO regla' de la ruta
+            seconds: Duración de la petición
+        """
+        timings = self._routes.get(route)
+        if timings is None:
+            timings = self._routes.setdefault(route, deque(maxlen=self.samples))
+        # append en un deque es atómico
+        timings.append(seconds)
+        self._counts[route] = self._counts.get(route, 0) + 1
+
+    def reset(self) -> None:
+        """Descarta todas las latencias."""
+        self._routes = {}
+        self._counts = {}
+
+    def percentiles(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Calcula los percentiles de cada ruta sobre sus últimas muestras.
+
+        Returns:
+            Dict: Ruta -> {count, p50, p90, p99, max} en milisegundos
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for route, timings in list(self._routes.items()):
+            values = sorted(timings)
+            if not values:
+                continue
+
+            def percentile(p: float) -> float:
+                return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 3)
+
+            result[route] = {
+                "count": self._counts.get(route, len(values)),
+                "samples": len(values),
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": round(values[-1] * 1000, 3)
+            }
+        return result
@@ -0,0 +1,290 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Intervalo por defecto entre pasadas del janitor
+DEFAULT_INTERVAL_SECONDS = 300
+
+MB = 1024 * 1024
+
+
+class RetentionJanitor:
+    """
+    Aplica las cuotas de retención de los directorios de logs en segundo plano.
+
+    Por directorio (el base y uno por token) y en total se limitan los bytes
+    y la antigüedad de los segmentos sellados. Cuando se supera una cuota de
+    bytes se comprimen primero los segmentos más antiguos y, si no basta, se
+    borran empezando por el más antiguo. El segmento activo nunca se toca.
+    Todo se decide con el manifiesto de cada SegmentStore, sin escanear los
+    directorios.
+
+    Con el backend 'sqlite' las mismas cuotas se aplican además a las filas de
+    la base (por token y en total), borrando los registros más antiguos; no
+    hay compresión.
+    """
+
+    def __init__(self, log_manager, directory_manager, config_manager):
+        """
+        Inicializa el janitor.
+
+        Args:
+            log_manager: LogManager con el directorio base de logs
+            directory_manager: DirectoryManager con los directorios por token
+            config_manager: ConfigManager con la sección 'retention'
+        """
+        self.log_manager = log_manager
+        self.directory_manager = directory_manager
+        self.config_manager = config_manager
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.total_reclaimed_bytes = 0
+        self.runs = 0
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de retención.
+
+        Returns:
+            Dict: Sección 'retention' de la configuración (0 = sin límite)
+        """
+        return self.config_manager.get_config().get("retention", {})
+
+    def _get_directories(self) -> Dict[str, Optional[str]]:
+        """
+        Obtiene los directorios de logs a revisar.
+
+        Returns:
+            Dict[str, Optional[str]]: Ruta absoluta -> token (None para el directorio base)
+        """
+        directories: Dict[str, Optional[str]] = {os.path.abspath(self.log_manager.base_dir): None}
+        for token, path in list(self.directory_manager.directory_tokens.items()):
+            directories.setdefault(os.path.abspath(path), token)
+        return directories
+
+    def _scan_directory(self, directory: str) -> Dict[str, Any]:
+        """
+        Obtiene del manifiesto el segmento activo y los sellados de un directorio.
+
+        Returns:
+            Dict: Store, bytes del segmento activo y segmentos sellados ordenados
+            del más antiguo al más reciente
+        """
+        store = self.log_manager.get_store(directory)
+        segments = store.segments(include_active=False)
+        for segment in segments:
+            segment["directory"] = directory
+        return {"store": store, "active_bytes": store.active_bytes(), "segments": segments}
+
+    @staticmethod
+    def _directory_limits(settings: Dict[str, Any], token: Optional[str]) -> Tuple[float, int]:
+        """
+        Obtiene los límites de antigüedad y bytes de un directorio.
+
+        Args:
+            settings: Sección 'retention'
+            token: Token del directorio (None = directorio base)
+
+        Returns:
+            Tuple[float, int]: Segundos de antigüedad y bytes máximos (0 = sin límite)
+        """
+        override = settings.get("directories", {}).get(token, {}) if token else {}
+        # Un override explícito (incluido 0) sustituye al límite global
+        max_age_hours = override.get("maxAgeHours")
+        if max_age_hours is None:
+            max_age_hours = settings.get("maxAgeHours", 0)
+        max_directory_mb = override.get("maxDirectoryMB")
+        if max_directory_mb is None:
+            max_directory_mb = settings.get("maxDirectoryMB", 0)
+        return max_age_hours * 3600, int(max_directory_mb * MB)
+
+    def _run_sqlite(self, settings: Dict[str, Any], now: float, result: Dict[str, Any]) -> None:
+        """
+        Aplica las cuotas de retención a la base SQLite.
+
+        Args:
+            settings: Sección 'retention'
+            now: Hora actual (epoch)
+            result: Resultado de la pasada, que se completa
+        """
+        database = self.log_manager.get_sqlite_database()
+
+        def record(deleted: Tuple[int, int], token: Optional[str], reason: str) -> None:
+            records, freed = deleted
+            if records:
+                result["reclaimedBytes"] += freed
+                result["deleted"].append({"path": f"{database.path}#{token or 'default'}",
+                                          "records": records, "bytes": freed, "reason": reason})
+
+        tokens: List[Optional[str]] = [None] + list(self.directory_manager.directory_tokens.keys())
+        for token in tokens:
+            age_limit, bytes_limit = self._directory_limits(settings, token)
+            try:
+                if age_limit:
+                    cutoff = datetime.fromtimestamp(now - age_limit).isoformat()
+                    record(database.delete_before(cutoff, token or ""), token, "age")
+                if bytes_limit:
+                    used = database.data_bytes(token or "")
+                    record(database.delete_oldest(used - bytes_limit, token or ""), token, "directory_quota")
+            except Exception as e:
+                result["errors"].append(f"{database.path}#{token or 'default'}: {e}")
+
+        max_total_bytes = int(settings.get("maxTotalMB", 0) * MB)
+        try:
+            if max_total_bytes:
+                used = database.data_bytes()
+                record(database.delete_oldest(used - max_total_bytes), None, "total_quota")
+            result["sqlite"] = {"path": database.path, "bytes": database.size_bytes(),
+                                "dataBytes": database.data_bytes()}
+        except Exception as e:
+            result["errors"].append(f"{database.path}: {e}")
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Ejecuta una pasada de retención.
+
+        Returns:
+            Dict: Bytes recuperados, segmentos borrados y comprimidos, y el uso
+            final de cada directorio
+        """
+        with self._run_lock:
+            settings = self.get_settings()
+            max_total_bytes = int(settings.get("maxTotalMB", 0) * MB)
+            compress = settings.get("compress", True)
+            now = time.time()
+
+            result: Dict[str, Any] = {
+                "startedAt": datetime.now().isoformat(),
+                "reclaimedBytes": 0,
+                "deleted": [],
+                "compressed": [],
+                "errors": [],
+                "directories": {}
+            }
+
+            scanned: Dict[str, Dict[str, Any]] = {}
+
+            def path_of(segment: Dict[str, Any]) -> str:
+                return os.path.join(segment["directory"], segment["file"])
+
+            def delete(segment: Dict[str, Any], reason: str) -> bool:
+                try:
+                    scanned[segment["directory"]]["store"].drop(segment["seq"])
+                except OSError as e:
+                    result["errors"].append(f"{path_of(segment)}: {e}")
+                    return False
+                result["reclaimedBytes"] += segment["bytes"]
+                result["deleted"].append({"path": path_of(segment), "bytes": segment["bytes"], "reason": reason})
+                return True
+
+            for directory, token in self._get_directories().items():
+                scan = scanned[directory] = self._scan_directory(directory)
+                age_limit, bytes_limit = self._directory_limits(settings, token)
+
+                # Antigüedad
+                if age_limit:
+                    scan["segments"] = [segment for segment in scan["segments"]
+                                        if now - segment["sealedAt"] <= age_limit or not delete(segment, "age")]
+
+                # Cuota del directorio: comprimir y después borrar los más antiguos
+                if bytes_limit:
+                    used = scan["active_bytes"] + sum(segment["bytes"] for segment in scan["segments"])
+                    if compress and used > bytes_limit:
+                        for segment in scan["segments"]:
+                            if used <= bytes_limit:
+                                break
+                            if segment["compressed"]:
+                                continue
+                            original = path_of(segment)
+                            try:
+                                reclaimed = scan["store"].compress(segment["seq"])
+                            except OSError as e:
+                                result["errors"].append(f"{original}: {e}")
+                                continue
+                            segment["bytes"] -= reclaimed
+                            segment["compressed"] = True
+                            used -= reclaimed
+                            result["reclaimedBytes"] += reclaimed
+                            result["compressed"].append({"path": original, "bytes": reclaimed})
+                    while used > bytes_limit and scan["segments"]:
+                        segment = scan["segments"].pop(0)
+                        if delete(segment, "directory_quota"):
+                            used -= segment["bytes"]
+
+                if token:
+                    self.directory_manager.invalidate(token)
+
+            # Cuota global: borrar los segmentos más antiguos de cualquier directorio
+            if max_total_bytes:
+                used = sum(scan["active_bytes"] + sum(segment["bytes"] for segment in scan["segments"])
+                           for scan in scanned.values())
+                oldest = sorted((segment for scan in scanned.values() for segment in scan["segments"]),
+                                key=lambda segment: (segment["sealedAt"], segment["seq"]))
+                for segment in oldest:
+                    if used <= max_total_bytes:
+                        break
+                    if delete(segment, "total_quota"):
+                        used -= segment["bytes"]
+                        scanned[segment["directory"]]["segments"].remove(segment)
+
+            if self.log_manager.get_backend_name() == "sqlite":
+                self._run_sqlite(settings, now, result)
+
+            for directory, scan in scanned.items():
+                result["directories"][directory] = {
+                    "activeBytes": scan["active_bytes"],
+                    "segments": len(scan["segments"]),
+                    "segmentBytes": sum(segment["bytes"] for segment in scan["segments"])
+                }
+
+            result["finishedAt"] = datetime.now().isoformat()
+            self.last_result = result
+            self.total_reclaimed_bytes += result["reclaimedBytes"]
+            self.runs += 1
+            return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado del janitor.
+
+        Returns:
+            Dict: Configuración, si está activo, totales y la última pasada
+        """
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "settings": self.config_manager.snapshot.to_dict().get("retention", {}),
+            "runs": self.runs,
+            "totalReclaimedBytes": self.total_reclaimed_bytes,
+            "lastRun": self.last_result
+        }
+
+    def _loop(self) -> None:
+        """Hilo del janitor: una pasada cada 'intervalSeconds'."""
+        while True:
+            settings = self.get_settings()
+            if settings.get("enabled", True):
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"Error aplicando retención: {e}")
+            interval = max(settings.get("intervalSeconds", DEFAULT_INTERVAL_SECONDS), 1)
+            if self._stop.wait(interval):
+                return
+
+    def start(self) -> None:
+        """Inicia el hilo del janitor."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="RetentionJanitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo del janitor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,337 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Resoluciones de los agregados: nombre -> segundos por bucket
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+# Campos por los que se agrupan los conteos (orden de la clave de cada contador)
+ROLLUP_FIELDS = ("level", "path", "source", "token")
+# Archivo donde se persisten los agregados
+DEFAULT_ROLLUPS_PATH = "config/rollups.json"
+# Intervalo por defecto entre guardados
+DEFAULT_PERSIST_INTERVAL_SECONDS = 60
+# Ruta que agrupa las URLs nuevas cuando un bucket ya tiene demasiadas claves
+OTHER_PATH = "<other>"
+# Token del directorio base en las claves
+DEFAULT_TOKEN = "default"
+# Fuente de los logs recibidos por /log
+DEFAULT_SOURCE = "devpipe"
+
+# Segmentos de ruta que son identificadores: números, UUIDs y hashes hexadecimales
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                         r'|[0-9a-fA-F]{16,})$')
+
+RollupKey = Tuple[str, str, str, str]
+
+
+def normalize_path(url: Any) -> str:
+    """
+    Normaliza una URL a su ruta para agrupar: sin esquema, host ni query, y con
+    los identificadores sustituidos por ':id'.
+
+    Args:
+        url: URL del log
+
+    Returns:
+        str: Ruta normalizada (por ejemplo '/posts/:id/edit')
+    """
+    path = urlsplit(str(url or "")).path or "/"
+    return "/".join(":id" if _ID_SEGMENT.match(part) else part for part in path.split("/"))
+
+
+class RollupRing:
+    """
+    Contadores de una resolución en buckets de tiempo acotados.
+
+    Cada bucket guarda un contador por clave (level, path, source, token).
+    Solo se conservan los buckets de los últimos `max_buckets` intervalos y,
+    por bucket, hasta `max_keys` rutas distintas; las demás cuentan como
+    OTHER_PATH para que la memoria no crezca con URLs de alta cardinalidad.
+    """
+
+    def __init__(self, bucket_seconds: int, max_buckets: int, max_keys: int):
+        """
+        Inicializa el anillo.
+
+        Args:
+            bucket_seconds: Segundos por bucket
+            max_buckets: Buckets que se conservan
+            max_keys: Claves máximas por bucket
+        """
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self.max_keys = max_keys
+        # Inicio del bucket (epoch) -> clave -> conteo, del más antiguo al más reciente
+        self.buckets: "OrderedDict[int, Dict[RollupKey, int]]" = OrderedDict()
+
+    def add(self, epoch: float, key: RollupKey, count: int = 1) -> None:
+        """Suma `count` a la clave en el bucket que contiene `epoch`."""
+        start = int(epoch // self.bucket_seconds) * self.bucket_seconds
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            newest = next(reversed(self.buckets)) if self.buckets else start
+            if start <= newest - self.max_buckets * self.bucket_seconds:
+                # Más antiguo que lo que conserva el anillo
+                return
+            bucket = self.buckets[start] = {}
+            if start < newest:
+                # Registro fuera de orden (reloj ajustado): reordenar
+                self.buckets = OrderedDict(sorted(self.buckets.items()))
+            self._prune(max(newest, start))
+        if key not in bucket and len(bucket) >= self.max_keys:
+            key = (key[0], OTHER_PATH, key[2], key[3])
+        bucket[key] = bucket.get(key, 0) + count
+
+    def _prune(self, newest: int) -> None:
+        """Descarta los buckets que quedaron fuera de los últimos `max_buckets` intervalos."""
+        cutoff = newest - self.max_buckets * self.bucket_seconds
+        while self.buckets and next(iter(self.buckets)) <= cutoff:
+            self.buckets.popitem(last=False)
+
+    def coverage_start(self) -> Optional[int]:
+        """Inicio del bucket más antiguo que aún se conserva."""
+        return next(iter(self.buckets)) if self.buckets else None
+
+    def to_list(self) -> List[Any]:
+        """Representación serializable: [[inicio, [[level, path, source, token, conteo], ...]], ...]"""
+        return [[start, [[*key, count] for key, count in bucket.items()]] for start, bucket in self.buckets.items()]
+
+    def load_list(self, data: List[Any]) -> None:
+        """Carga la representación de to_list()."""
+        for start, rows in sorted(data, key=lambda item: item[0]):
+            bucket = self.buckets.setdefault(int(start), {})
+            for row in rows:
+                key = tuple(str(value) for value in row[:4])
+                bucket[key] = bucket.get(key, 0) + int(row[4])
+        if self.buckets:
+            self._prune(next(reversed(self.buckets)))
+
+
+class RollupAggregator:
+    """
+    Agregados incrementales de los logs escritos, por minuto y por hora.
+
+    Se alimenta como listener de LogManager.write_logs, así que cada lote
+    cuesta un incremento por registro y una consulta recorre solo los
+    buckets del rango en lugar de releer devpipe.log y los logs externos
+    (que también se ingieren por write_logs). Los anillos se guardan
+    periódicamente en un archivo JSON y se cargan al arrancar; una caída
+    pierde como mucho lo contado desde el último guardado.
+    """
+
+    def __init__(self, config_manager):
+        """
+        Inicializa los agregados y carga los guardados.
+
+        Args:
+            config_manager: ConfigManager con la sección 'rollups' (el tamaño
+                de los anillos se lee al arrancar)
+        """
+        self.config_manager = config_manager
+        settings = self.get_settings()
+        max_keys = settings.get("maxKeysPerBucket", 2000)
+        self.rings: Dict[str, RollupRing] = {
+            "minute": RollupRing(RESOLUTIONS["minute"], settings.get("minuteBuckets", 1440), max_keys),
+            "hour": RollupRing(RESOLUTIONS["hour"], settings.get("hourBuckets", 720), max_keys)
+        }
+        self.path = settings.get("persistPath") or DEFAULT_ROLLUPS_PATH
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_saved_at: Optional[str] = None
+        self.load()
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de los agregados.
+
+        Returns:
+            Dict: Sección 'rollups' de la configuración
+        """
+        return self.config_manager.get_config().get("rollups", {})
+
+    def observe(self, logs: List[Dict[str, Any]], token: Optional[str]) -> None:
+        """
+        Cuenta un lote de logs escritos (listener de LogManager).
+
+        Args:
+            logs: Logs escritos, con server_timestamp
+            token: Token del directorio donde se escribieron
+        """
+        if not self.get_settings().get("enabled", True):
+            return
+        token = token or DEFAULT_TOKEN
+        counts: Dict[Tuple[str, RollupKey], int] = {}
+        for log_data in logs:
+            key = (str(log_data.get("level") or "unknown"), normalize_path(log_data.get("url")),
+                   str(log_data.get("source") or DEFAULT_SOURCE), token)
+            # Los anillos tienen resolución de minuto: basta el prefijo 'YYYY-MM-DDTHH:MM'
+            bucket_key = (str(log_data.get("server_timestamp", ""))[:16], key)
+            counts[bucket_key] = counts.get(bucket_key, 0) + 1
+
+        epochs: Dict[str, float] = {}
+        with self._lock:
+            for (minute, key), count in counts.items():
+                epoch = epochs.get(minute)
+                if epoch is None:
+                    try:
+                        epoch = datetime.fromisoformat(minute).timestamp()
+                    except (TypeError, ValueError):
+                        epoch = time.time()
+                    epochs[minute] = epoch
+                for ring in self.rings.values():
+                    ring.add(epoch, key, count)
+            self._dirty = True
+
+    def choose_resolution(self, start: Optional[datetime]) -> str:
+        """
+        Elige la resolución de una consulta: por minuto si el inicio del
+        rango sigue dentro del anillo de minutos, si no por hora.
+        """
+        ring = self.rings["minute"]
+        if start is None:
+            return "hour"
+        oldest_kept = time.time() - ring.max_buckets * ring.bucket_seconds
+        return "minute" if start.timestamp() >= oldest_kept else "hour"
+
+    def query(self, group_by: Sequence[str], start: Optional[datetime] = None, end: Optional[datetime] = None,
+              resolution: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Conteos por bucket en un rango, agrupados por los campos indicados.
+
+        Args:
+            group_by: Campos de ROLLUP_FIELDS (vacío = solo totales)
+            start: Fecha local mínima (inclusive, se amplía al inicio de su bucket)
+            end: Fecha local máxima (inclusive)
+            resolution: 'minute', 'hour' o None para elegirla según el rango
+
+        Returns:
+            Dict: Resolución, buckets no vacíos con sus conteos y totales del rango
+        """
+        resolution = resolution or self.choose_resolution(start)
+        ring = self.rings[resolution]
+        indexes = [ROLLUP_FIELDS.index(field) for field in group_by]
+        start_epoch = start.timestamp() // ring.bucket_seconds * ring.bucket_seconds if start else None
+        end_epoch = end.timestamp() if end else None
+
+        def rows(counts: Dict[Tuple[str, ...], int]) -> List[Dict[str, Any]]:
+            ordered = sorted(counts.items(), key=lambda item: -item[1])
+            return [{**dict(zip(group_by, values)), "count": count} for values, count in ordered]
+
+        buckets = []
+        totals: Dict[Tuple[str, ...], int] = {}
+        with self._lock:
+            for bucket_start, bucket in ring.buckets.items():
+                if start_epoch is not None and bucket_start < start_epoch:
+                    continue
+                if end_epoch is not None and bucket_start > end_epoch:
+                    break
+                grouped: Dict[Tuple[str, ...], int] = {}
+                for key, count in bucket.items():
+                    values = tuple(key[index] for index in indexes)
+                    grouped[values] = grouped.get(values, 0) + count
+                    totals[values] = totals.get(values, 0) + count
+                buckets.append((bucket_start, grouped))
+
+        return {
+            "resolution": resolution,
+            "bucketSeconds": ring.bucket_seconds,
+            "groupBy": list(group_by),
+            "buckets": [{
+                "start": datetime.fromtimestamp(bucket_start).isoformat(),
+                "total": sum(grouped.values()),
+                "counts": rows(grouped)
+            } for bucket_start, grouped in buckets],
+            "total": sum(totals.values()),
+            "totals": rows(totals)
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado de los agregados.
+
+        Returns:
+            Dict: Buckets y claves por resolución, cobertura y último guardado
+        """
+        with self._lock:
+            rings = {
+                name: {
+                    "bucketSeconds": ring.bucket_seconds,
+                    "buckets": len(ring.buckets),
+                    "maxBuckets": ring.max_buckets,
+                    "keys": sum(len(bucket) for bucket in ring.buckets.values()),
+                    "from": (datetime.fromtimestamp(ring.coverage_start()).isoformat()
+                             if ring.coverage_start() is not None else None)
+                }
+                for name, ring in self.rings.items()
+            }
+        return {"path": self.path, "lastSavedAt": self.last_saved_at, "rings": rings}
+
+    def load(self) -> None:
+        """Carga los agregados guardados, si existen."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for name, ring in self.rings.items():
+                ring.load_list(data.get("rings", {}).get(name, []))
+        except Exception as e:
+            print(f"Error cargando agregados de {self.path}: {e}")
+
+    def save(self) -> bool:
+        """
+        Guarda los agregados de forma atómica si cambiaron.
+
+        Returns:
+            bool: True si se guardaron
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = {"version": 1, "rings": {name: ring.to_list() for name, ring in self.rings.items()}}
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.path}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.path)
+            self.last_saved_at = datetime.now().isoformat()
+            return True
+        except Exception as e:
+            self._dirty = True
+            print(f"Error guardando agregados en {self.path}: {e}")
+            return False
+
+    def _loop(self) -> None:
+        """Hilo de guardado: cada 'persistIntervalSeconds' si hubo cambios."""
+        while True:
+            interval = self.get_settings().get("persistIntervalSeconds", DEFAULT_PERSIST_INTERVAL_SECONDS)
+            if self._stop.wait(max(interval, 1)):
+                return
+            self.save()
+
+    def start(self) -> None:
+        """Inicia el hilo de guardado."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="RollupPersist", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo de guardado y guarda lo pendiente."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
@@ -0,0 +1,828 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .metrics import FSYNC_LATENCY
+
+# Segmento activo: el único que recibe escrituras (y el que siguen los tails)
+ACTIVE_SEGMENT_NAME = "devpipe.log"
+# Manifiesto con la información de los segmentos sellados
+MANIFEST_NAME = "devpipe.manifest.json"
+# Segmentos sellados: devpipe.log.<secuencia>[.gz]; los archivos compactados
+# llevan el rango de secuencias que contienen: devpipe.log.<primera>-<última>[.gz]
+SEGMENT_PATTERN = re.compile(r'^devpipe\.log\.(\d{8})(?:-(\d{8}))?(\.gz)?$')
+# Copias de la rotación anterior por fecha: devpipe.log.<YYYYmmdd_HHMMSS>[.gz]
+LEGACY_SEGMENT_PATTERN = re.compile(r'^devpipe\.log\.\d{8}_\d{6}(\.gz)?$')
+# Entradas del journal a partir de las cuales se compacta el manifiesto
+MANIFEST_COMPACT_ENTRIES = 500
+# Tamaño de bloque al comprimir segmentos
+COPY_BUFFER_SIZE = 1024 * 1024
+# Campos por los que se puede agrupar un conteo
+GROUP_FIELDS = ("level", "url")
+# Políticas de fsync del escritor: none (buffer del SO), interval (fsync agrupado
+# cada N ms), batch (un fsync por lote ingerido) y always (un fsync por registro)
+DURABILITY_MODES = ("none", "interval", "batch", "always")
+
+_SERVER_TS_KEY = '"server_timestamp": "'
+_SERVER_TS_KEY_BYTES = _SERVER_TS_KEY.encode()
+
+
+def _line_timestamp(line: str) -> Optional[str]:
+    """Extrae el server_timestamp de una línea JSON sin parsearla completa."""
+    start = line.rfind(_SERVER_TS_KEY)
+    if start < 0:
+        return None
+    start += len(_SERVER_TS_KEY)
+    end = line.find('"', start)
+    return line[start:end] if end > start else None
+
+
+def _in_range(timestamp: Optional[str], start: Optional[str], end: Optional[str]) -> bool:
+    """Compara timestamps ISO como texto: mismo formato, mismo orden."""
+    if timestamp is None:
+        return False
+    return (start is None or timestamp >= start) and (end is None or timestamp <= end)
+
+
+def _matches(log: Dict[str, Any], level: Optional[str], url: Optional[str]) -> bool:
+    """Filtros de query(): nivel exacto y prefijo de URL."""
+    if level and log.get("level") != level:
+        return False
+    if url and not str(log.get("url") or "").startswith(url):
+        return False
+    return True
+
+
+def fsync_fd(fd: int, reason: str) -> None:
+    """fsync de un descriptor, registrando su latencia por motivo."""
+    start = time.perf_counter()
+    os.fsync(fd)
+    FSYNC_LATENCY.observe(time.perf_counter() - start, reason=reason)
+
+
+def _last_seq(segment: Dict[str, Any]) -> int:
+    """Última secuencia contenida en un segmento (mayor que 'seq' en los compactados)."""
+    return segment.get("lastSeq", segment["seq"])
+
+
+def to_store_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """
+    Convierte un datetime local al formato de server_timestamp.
+
+    Args:
+        value: Fecha local sin zona horaria
+
+    Returns:
+        Optional[str]: Fecha ISO comparable con los límites del manifiesto
+    """
+    return value.isoformat() if value is not None else None
+
+
+class SegmentStore:
+    """
+    Almacenamiento de un directorio de logs en segmentos de tamaño fijo.
+
+    Los registros se añaden a `devpipe.log`; al alcanzar el tamaño máximo se
+    sella como `devpipe.log.<secuencia>` y su número de registros, bytes y
+    rango de server_timestamp quedan en el manifiesto. Las lecturas descartan
+    segmentos completos con el manifiesto sin abrirlos, y rotar, comprimir o
+    borrar un segmento es una operación sobre el manifiesto, no un escaneo del
+    directorio. El manifiesto se persiste como los tokens del DirectoryManager:
+    un archivo atómico más un journal de cambios que se compacta periódicamente.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Abre (o crea) el almacenamiento de un directorio.
+
+        Args:
+            directory: Directorio de logs
+        """
+        self.directory = directory
+        self.active_path = os.path.join(directory, ACTIVE_SEGMENT_NAME)
+        self.manifest_file = os.path.join(directory, MANIFEST_NAME)
+        self.journal_file = f"{self.manifest_file}.journal"
+        self._segments: Dict[int, Dict[str, Any]] = {}
+        self._next_seq = 1
+        self._journal_entries = 0
+        self._lock = threading.RLock()
+        self._active: Dict[str, Any] = {}
+        # Hay datos escritos en el segmento activo que aún no pasaron por fsync
+        self._dirty = False
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Manifiesto
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _scan_file(path: str, compressed: bool = False) -> Dict[str, Any]:
+        """
+        Cuenta los registros y el rango de timestamps de un archivo.
+
+        Solo se usa al adoptar archivos que no están en el manifiesto y al
+        abrir el segmento activo.
+        """
+        records = 0
+        min_ts: Optional[str] = None
+        max_ts: Optional[str] = None
+        opener = gzip.open if compressed else open
+        with opener(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    continue
+                records += 1
+                start = line.rfind(_SERVER_TS_KEY_BYTES)
+                if start < 0:
+                    continue
+                start += len(_SERVER_TS_KEY_BYTES)
+                timestamp = line[start:line.find(b'"', start)].decode('ascii', errors='replace')
+                if min_ts is None or timestamp < min_ts:
+                    min_ts = timestamp
+                if max_ts is None or timestamp > max_ts:
+                    max_ts = timestamp
+        return {"records": records, "minTs": min_ts, "maxTs": max_ts}
+
+    def _load(self) -> None:
+        """Carga el manifiesto y el journal y los concilia con los archivos del directorio."""
+        try:
+            if os.path.exists(self.manifest_file):
+                with open(self.manifest_file, 'r') as f:
+                    manifest = json.load(f)
+                self._next_seq = manifest.get("nextSeq", 1)
+                self._segments = {entry["seq"]: entry for entry in manifest.get("segments", [])}
+        except Exception as e:
+            print(f"Error cargando manifiesto de {self.directory}: {e}")
+            self._segments = {}
+
+        if os.path.exists(self.journal_file):
+            try:
+                with open(self.journal_file, 'r') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # Última línea a medio escribir por una caída
+                            continue
+                        if entry.get("op") in ("add", "update", "merge"):
+                            segment = entry["segment"]
+                            for seq in entry.get("removed", []):
+                                self._segments.pop(seq, None)
+                            self._segments[segment["seq"]] = segment
+                            self._next_seq = max(self._next_seq, _last_seq(segment) + 1)
+                        elif entry.get("op") == "remove":
+                            self._segments.pop(entry["seq"], None)
+                        self._journal_entries += 1
+            except Exception as e:
+                print(f"Error cargando journal del manifiesto de {self.directory}: {e}")
+
+        changed = self._reconcile()
+        if changed or self._journal_entries:
+            self._save_manifest()
+
+        self._active = {"records": 0, "minTs": None, "maxTs": None}
+        if os.path.exists(self.active_path):
+            try:
+                self._active = self._scan_file(self.active_path)
+            except OSError as e:
+                print(f"Error leyendo {self.active_path}: {e}")
+
+    def _reconcile(self) -> bool:
+        """
+        Ajusta el manifiesto a los archivos presentes.
+
+        Adopta los segmentos sellados que falten (caída entre el rename y el
+        journal) y las copias con fecha de la rotación anterior, y olvida las
+        entradas cuyos archivos ya no existen. Los archivos cuyas secuencias
+        ya están en el manifiesto son restos de una compresión o compactación
+        interrumpida y se borran: sus registros están en el segmento conocido.
+
+        Returns:
+            bool: True si el manifiesto cambió
+        """
+        try:
+            with os.scandir(self.directory) as entries:
+                files = {entry.name: entry for entry in entries if entry.is_file(follow_symlinks=False)}
+        except OSError:
+            return False
+
+        changed = False
+        for seq, segment in list(self._segments.items()):
+            if segment["file"] not in files:
+                del self._segments[seq]
+                changed = True
+
+        known = {segment["file"] for segment in self._segments.values()}
+        covered = [(segment["seq"], _last_seq(segment)) for segment in self._segments.values()]
+        orphans = [name for name in files if SEGMENT_PATTERN.match(name) and name not in known]
+        for name in sorted(orphans):
+            match = SEGMENT_PATTERN.match(name)
+            seq = int(match.group(1))
+            last_seq = int(match.group(2) or seq)
+            if any(seq <= last and first <= last_seq for first, last in covered):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError as e:
+                    print(f"Error borrando el segmento duplicado {name}: {e}")
+                continue
+            self._segments[seq] = self._adopt(name, seq, files[name].stat().st_mtime, last_seq)
+            covered.append((seq, last_seq))
+            self._next_seq = max(self._next_seq, last_seq + 1)
+            changed = True
+
+        legacy = sorted((name for name in files if LEGACY_SEGMENT_PATTERN.match(name)),
+                        key=lambda name: (files[name].stat().st_mtime, name))
+        for name in legacy:
+            seq = self._next_seq
+            self._next_seq += 1
+            mtime = files[name].stat().st_mtime
+            target = f"{ACTIVE_SEGMENT_NAME}.{seq:08d}" + (".gz" if name.endswith(".gz") else "")
+            try:
+                os.rename(os.path.join(self.directory, name), os.path.join(self.directory, target))
+            except OSError as e:
+                print(f"Error adoptando {name}: {e}")
+                continue
+            self._segments[seq] = self._adopt(target, seq, mtime)
+            changed = True
+        return changed
+
+    def _adopt(self, name: str, seq: int, mtime: float, last_seq: Optional[int] = None) -> Dict[str, Any]:
+        """Crea la entrada del manifiesto de un archivo existente."""
+        path = os.path.join(self.directory, name)
+        compressed = name.endswith(".gz")
+        try:
+            scan = self._scan_file(path, compressed)
+        except (OSError, EOFError) as e:
+            print(f"Error leyendo {path}: {e}")
+            scan = {"records": 0, "minTs": None, "maxTs": None}
+        segment = {
+            "seq": seq,
+            "file": name,
+            "records": scan["records"],
+            "bytes": os.path.getsize(path),
+            "minTs": scan["minTs"],
+            "maxTs": scan["maxTs"],
+            "compressed": compressed,
+            "sealedAt": mtime
+        }
+        if last_seq is not None and last_seq != seq:
+            segment["lastSeq"] = last_seq
+        return segment
+
+    def _save_manifest(self) -> None:
+        """Guarda el manifiesto completo de forma atómica y vacía el journal."""
+        with self._lock:
+            try:
+                temp_file = f"{self.manifest_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump({
+                        "nextSeq": self._next_seq,
+                        "segments": [self._segments[seq] for seq in sorted(self._segments)]
+                    }, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.manifest_file)
+
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+                self._journal_entries = 0
+            except Exception as e:
+                print(f"Error guardando manifiesto de {self.directory}: {e}")
+
+    def _persist_change(self, entry: Dict[str, Any]) -> None:
+        """
+        Añade un cambio del manifiesto al journal.
+
+        Args:
+            entry: Operación {"op": "add"|"update", "segment"}, {"op": "remove", "seq"}
+                o {"op": "merge", "segment", "removed"}
+        """
+        with self._lock:
+            try:
+                with open(self.journal_file, 'a') as f:
+                    f.write(json.dumps(entry) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_entries += 1
+            except Exception as e:
+                print(f"Error escribiendo journal del manifiesto: {e}")
+                self._save_manifest()
+                return
+
+            if self._journal_entries >= MANIFEST_COMPACT_ENTRIES:
+                self._save_manifest()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def append(self, data: bytes, records: int, min_ts: str, max_ts: str, max_bytes: int,
+               durability: str = "none") -> bool:
+        """
+        Añade registros al segmento activo, sellándolo antes si está lleno.
+
+        Args:
+            data: Líneas JSON codificadas, terminadas en salto de línea
+            records: Número de registros en `data`
+            min_ts: Menor server_timestamp de los registros
+            max_ts: Mayor server_timestamp de los registros
+            max_bytes: Tamaño a partir del cual se sella el segmento activo
+            durability: 'batch' y 'always' hacen fsync antes de volver;
+                'interval' deja el segmento pendiente para sync()
+
+        Returns:
+            bool: True si se selló un segmento antes de escribir
+        """
+        with self._lock:
+            sealed = False
+            try:
+                size = os.path.getsize(self.active_path)
+            except OSError:
+                # Borrado desde fuera: empezar un segmento activo nuevo
+                size = 0
+                self._active = {"records": 0, "minTs": None, "maxTs": None}
+            if size >= max_bytes:
+                sealed = self.seal(durability) is not None
+
+            with open(self.active_path, "ab") as f:
+                f.write(data)
+                if durability in ("batch", "always"):
+                    f.flush()
+                    fsync_fd(f.fileno(), "record" if durability == "always" else "batch")
+                elif durability == "interval":
+                    self._dirty = True
+
+            active = self._active
+            active["records"] += records
+            if active["minTs"] is None or min_ts < active["minTs"]:
+                active["minTs"] = min_ts
+            if active["maxTs"] is None or max_ts > active["maxTs"]:
+                active["maxTs"] = max_ts
+            return sealed
+
+    def append_records(self, logs: List[Dict[str, Any]], max_bytes: int,
+                       durability: str = "none") -> Tuple[int, bool]:
+        """
+        Serializa un lote de registros y lo añade al segmento activo.
+
+        Args:
+            logs: Registros con server_timestamp crecientes (LogManager asigna
+                uno distinto a cada registro), así que el rango del lote va del
+                primero al último
+            max_bytes: Tamaño a partir del cual se sella el segmento activo
+            durability: Política de fsync (ver DURABILITY_MODES); con 'always'
+                cada registro se escribe y sincroniza por separado
+
+        Returns:
+            Tuple[int, bool]: Bytes escritos y si se selló un segmento antes
+        """
+        if durability == "always":
+            written = 0
+            sealed = False
+            for log in logs:
+                data = (json.dumps(log) + "\n").encode("utf-8")
+                timestamp = log["server_timestamp"]
+                sealed = self.append(data, 1, timestamp, timestamp, max_bytes, durability) or sealed
+                written += len(data)
+            return written, sealed
+
+        data = "".join(json.dumps(log) + "\n" for log in logs).encode("utf-8")
+        sealed = self.append(data, len(logs), logs[0]["server_timestamp"], logs[-1]["server_timestamp"],
+                             max_bytes, durability)
+        return len(data), sealed
+
+    def sync(self) -> bool:
+        """
+        Hace fsync del segmento activo si tiene escrituras pendientes (modo 'interval').
+
+        El fsync se hace fuera del lock para no frenar la ingesta; si el
+        segmento se sella mientras tanto, el descriptor sigue apuntando al
+        mismo archivo.
+
+        Returns:
+            bool: True si hubo que sincronizar
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            try:
+                fd = os.open(self.active_path, os.O_RDONLY)
+            except OSError:
+                return False
+            self._dirty = False
+        try:
+            fsync_fd(fd, "interval")
+        finally:
+            os.close(fd)
+        return True
+
+    def _sync_directory(self) -> None:
+        """fsync del directorio para que un rename sobreviva a una caída."""
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            fsync_fd(fd, "directory")
+        finally:
+            os.close(fd)
+
+    def seal(self, durability: str = "none") -> Optional[Dict[str, Any]]:
+        """
+        Sella el segmento activo con el siguiente número de secuencia.
+
+        Args:
+            durability: Con 'interval' se sincronizan antes los datos
+                pendientes; con 'always' además el rename en el directorio
+
+        Returns:
+            Optional[Dict]: Entrada del manifiesto del segmento sellado, o None
+            si el segmento activo estaba vacío
+        """
+        with self._lock:
+            try:
+                size = os.path.getsize(self.active_path)
+            except OSError:
+                return None
+            if size == 0:
+                return None
+
+            if self._dirty:
+                self.sync()
+
+            seq = self._next_seq
+            name = f"{ACTIVE_SEGMENT_NAME}.{seq:08d}"
+            os.rename(self.active_path, os.path.join(self.directory, name))
+            if durability == "always":
+                self._sync_directory()
+            segment = {
+                "seq": seq,
+                "file": name,
+                "records": self._active["records"],
+                "bytes": size,
+                "minTs": self._active["minTs"],
+                "maxTs": self._active["maxTs"],
+                "compressed": False,
+                "sealedAt": time.time()
+            }
+            self._segments[seq] = segment
+            self._next_seq = seq + 1
+            self._active = {"records": 0, "minTs": None, "maxTs": None}
+            self._persist_change({"op": "add", "segment": segment})
+            return dict(segment)
+
+    def compress(self, seq: int) -> int:
+        """
+        Comprime un segmento sellado con gzip.
+
+        Args:
+            seq: Secuencia del segmento
+
+        Returns:
+            int: Bytes recuperados (0 si no existe o ya estaba comprimido)
+        """
+        with self._lock:
+            segment = self._segments.get(seq)
+            if segment is None or segment["compressed"]:
+                return 0
+            source = os.path.join(self.directory, segment["file"])
+
+        # La compresión se hace fuera del lock: el segmento sellado ya no cambia
+        target = f"{source}.gz"
+        temp = f"{target}.tmp"
+        with open(source, 'rb') as f_in, gzip.open(temp, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, COPY_BUFFER_SIZE)
+        os.utime(temp, (segment["sealedAt"], segment["sealedAt"]))
+
+        with self._lock:
+            if self._segments.get(seq) is not segment:
+                # Borrado mientras se comprimía
+                os.remove(temp)
+                return 0
+            os.replace(temp, target)
+            os.remove(source)
+            new_size = os.path.getsize(target)
+            reclaimed = segment["bytes"] - new_size
+            segment = {**segment, "file": os.path.basename(target), "bytes": new_size,
+                       "rawBytes": segment.get("rawBytes", segment["bytes"]), "compressed": True}
+            self._segments[seq] = segment
+            self._persist_change({"op": "update", "segment": segment})
+            return reclaimed
+
+    def merge(self, seqs: List[int], compress: bool = True,
+              pace: Optional[Callable[[int], None]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Compacta segmentos sellados consecutivos en un único archivo.
+
+        Los registros se copian en orden de secuencia, que es el orden de
+        escritura, así que el archivo resultante sigue ordenado por tiempo. La
+        copia se hace fuera del lock; el archivo nuevo se sincroniza en disco,
+        se sustituyen las entradas en el manifiesto con un único cambio del
+        journal y solo después se borran los originales. Si una caída deja
+        ambos, _reconcile descarta el que no esté en el manifiesto.
+
+        Args:
+            seqs: Secuencias de los segmentos, consecutivas en el manifiesto
+            compress: Si el archivo resultante se comprime con gzip
+            pace: Se llama con los bytes copiados de cada bloque; permite
+                limitar el ritmo de la copia bloqueando el hilo
+
+        Returns:
+            Optional[Dict]: Entrada del manifiesto del segmento compactado, o
+            None si los segmentos no son consecutivos o cambiaron durante la copia
+        """
+        with self._lock:
+            ordered = sorted(self._segments)
+            parts = [self._segments.get(seq) for seq in sorted(seqs)]
+            if len(parts) < 2 or any(part is None for part in parts):
+                return None
+            first_index = ordered.index(parts[0]["seq"])
+            if ordered[first_index:first_index + len(parts)] != [part["seq"] for part in parts]:
+                return None
+
+        first_seq = parts[0]["seq"]
+        last_seq = _last_seq(parts[-1])
+        name = f"{ACTIVE_SEGMENT_NAME}.{first_seq:08d}-{last_seq:08d}" + (".gz" if compress else "")
+        target = os.path.join(self.directory, name)
+        temp = f"{target}.tmp"
+        raw_bytes = 0
+        try:
+            with open(temp, 'wb') as f:
+                out = gzip.GzipFile(fileobj=f, mode='wb') if compress else f
+                for part in parts:
+                    source = os.path.join(self.directory, part["file"])
+                    opener = gzip.open if part["compressed"] else open
+                    last_byte = b'\n'
+                    with opener(source, 'rb') as f_in:
+                        while True:
+                            chunk = f_in.read(COPY_BUFFER_SIZE)
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                            raw_bytes += len(chunk)
+                            last_byte = chunk[-1:]
+                            if pace is not None:
+                                pace(len(chunk))
+                    if last_byte != b'\n':
+                        # Última línea a medio escribir: que no se pegue a la siguiente
+                        out.write(b'\n')
+                        raw_bytes += 1
+                if compress:
+                    out.close()
+                f.flush()
+                fsync_fd(f.fileno(), "compaction")
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+        sealed_at = max(part["sealedAt"] for part in parts)
+        os.utime(temp, (sealed_at, sealed_at))
+        min_values = [part["minTs"] for part in parts if part["minTs"] is not None]
+        max_values = [part["maxTs"] for part in parts if part["maxTs"] is not None]
+
+        with self._lock:
+            if any(self._segments.get(part["seq"]) is not part for part in parts):
+                # Comprimido o borrado mientras se copiaba
+                os.remove(temp)
+                return None
+            os.replace(temp, target)
+            self._sync_directory()
+            segment = {
+                "seq": first_seq,
+                "lastSeq": last_seq,
+                "file": name,
+                "records": sum(part["records"] for part in parts),
+                "bytes": os.path.getsize(target),
+                "rawBytes": raw_bytes,
+                "minTs": min(min_values) if min_values else None,
+                "maxTs": max(max_values) if max_values else None,
+                "compressed": compress,
+                # El más reciente: la retención por antigüedad no adelanta el borrado de ningún registro
+                "sealedAt": sealed_at
+            }
+            removed = [part["seq"] for part in parts[1:]]
+            for seq in removed:
+                del self._segments[seq]
+            self._segments[first_seq] = segment
+            self._persist_change({"op": "merge", "segment": segment, "removed": removed})
+
+            for part in parts:
+                try:
+                    os.remove(os.path.join(self.directory, part["file"]))
+                except FileNotFoundError:
+                    pass
+            return dict(segment)
+
+    def drop(self, seq: int) -> int:
+        """
+        Borra un segmento sellado.
+
+        Args:
+            seq: Secuencia del segmento
+
+        Returns:
+            int: Bytes liberados (0 si no existía)
+        """
+        with self._lock:
+            segment = self._segments.get(seq)
+            if segment is None:
+                return 0
+            try:
+                os.remove(os.path.join(self.directory, segment["file"]))
+            except FileNotFoundError:
+                pass
+            del self._segments[seq]
+            self._persist_change({"op": "remove", "seq": seq})
+            return segment["bytes"]
+
+    def clear(self) -> None:
+        """Borra el segmento activo y todos los sellados."""
+        with self._lock:
+            for seq in list(self._segments):
+                segment = self._segments.pop(seq)
+                try:
+                    os.remove(os.path.join(self.directory, segment["file"]))
+                except FileNotFoundError:
+                    pass
+            if os.path.exists(self.active_path):
+                os.remove(self.active_path)
+            self._active = {"records": 0, "minTs": None, "maxTs": None}
+            self._save_manifest()
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def active_bytes(self) -> int:
+        """Tamaño actual del segmento activo."""
+        try:
+            return os.path.getsize(self.active_path)
+        except OSError:
+            return 0
+
+    def segments(self, start: Optional[str] = None, end: Optional[str] = None,
+                 include_active: bool = True) -> List[Dict[str, Any]]:
+        """
+        Lista los segmentos, del más antiguo al más reciente, que pueden
+        contener registros en el rango indicado.
+
+        Args:
+            start: server_timestamp mínimo (ISO, inclusive)
+            end: server_timestamp máximo (ISO, inclusive)
+            include_active: Si incluir el segmento activo (nunca se descarta por rango)
+
+        Returns:
+            List[Dict]: Copias de las entradas del manifiesto; el activo lleva "active": True
+        """
+        with self._lock:
+            selected = []
+            for seq in sorted(self._segments):
+                segment = self._segments[seq]
+                if start is not None and segment["maxTs"] is not None and segment["maxTs"] < start:
+                    continue
+                if end is not None and segment["minTs"] is not None and segment["minTs"] > end:
+                    continue
+                selected.append(dict(segment))
+            if include_active:
+                selected.append({
+                    "seq": self._next_seq,
+                    "file": ACTIVE_SEGMENT_NAME,
+                    "records": self._active["records"],
+                    "bytes": self.active_bytes(),
+                    "minTs": self._active["minTs"],
+                    "maxTs": self._active["maxTs"],
+                    "compressed": False,
+                    "active": True
+                })
+            return selected
+
+    def _iter_segment_lines(self, segment: Dict[str, Any], start: Optional[str],
+                            end: Optional[str]) -> Iterator[str]:
+        """Líneas de un segmento; filtra por timestamp si no cae entero en el rango."""
+        path = os.path.join(self.directory, segment["file"])
+        inside = (segment.get("minTs") is not None and not segment.get("active")
+                  and (start is None or segment["minTs"] >= start)
+                  and (end is None or segment["maxTs"] <= end))
+        try:
+            if segment["compressed"]:
+                f = gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+            else:
+                f = open(path, 'r', encoding='utf-8', errors='replace')
+        except FileNotFoundError:
+            # Borrado o sellado entre el listado y la lectura
+            return
+        with f:
+            if inside or (start is None and end is None):
+                yield from f
+            else:
+                for line in f:
+                    if _in_range(_line_timestamp(line), start, end):
+                        yield line
+
+    def iter_lines(self, start: Optional[str] = None, end: Optional[str] = None,
+                   limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Itera las líneas de todos los segmentos en orden de escritura.
+
+        Args:
+            start: server_timestamp mínimo (ISO, inclusive)
+            end: server_timestamp máximo (ISO, inclusive)
+            limit: Si se indica, solo las últimas N líneas
+
+        Yields:
+            Líneas JSON de los registros
+        """
+        segments = self.segments(start, end)
+        if limit and start is None and end is None:
+            # Con el conteo del manifiesto basta con los últimos segmentos
+            needed = 0
+            first = len(segments) - 1
+            while first > 0 and needed + segments[first]["records"] < limit:
+                needed += segments[first]["records"]
+                first -= 1
+            segments = segments[first:]
+
+        lines: Iterator[str] = (line for segment in segments
+                                for line in self._iter_segment_lines(segment, start, end))
+        if limit:
+            yield from deque(lines, maxlen=limit)
+        else:
+            yield from lines
+
+    def _iter_logs(self, start: Optional[str], end: Optional[str], level: Optional[str],
+                   url: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Registros que cumplen los filtros, en orden de escritura."""
+        for line in self.iter_lines(start, end):
+            try:
+                log = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(log, dict) and _matches(log, level, url):
+                yield log
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None, level: Optional[str] = None,
+              url: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Busca registros, del más reciente al más antiguo.
+
+        Los segmentos fuera del rango se descartan con el manifiesto; el resto
+        se recorre completo, así que es más lento que el backend SQLite.
+
+        Args:
+            start: server_timestamp mínimo (ISO, inclusive)
+            end: server_timestamp máximo (ISO, inclusive)
+            level: Nivel exacto
+            url: Prefijo de la URL
+            limit: Máximo de registros
+            offset: Registros a saltar
+
+        Returns:
+            List[Dict]: Registros encontrados
+        """
+        newest = deque(self._iter_logs(start, end, level, url), maxlen=limit + offset)
+        return list(reversed(newest))[offset:]
+
+    def count(self, start: Optional[str] = None, end: Optional[str] = None, level: Optional[str] = None,
+              url: Optional[str] = None, group_by: Optional[str] = None) -> Union[int, Dict[str, int]]:
+        """
+        Cuenta registros con los mismos filtros que query().
+
+        Args:
+            group_by: 'level' o 'url' para contar por valor
+
+        Returns:
+            int o Dict[str, int]: Total o conteo por valor
+        """
+        if group_by in GROUP_FIELDS:
+            counts: Dict[str, int] = {}
+            for log in self._iter_logs(start, end, level, url):
+                value = str(log.get(group_by))
+                counts[value] = counts.get(value, 0) + 1
+            return dict(sorted(counts.items(), key=lambda item: -item[1]))
+        if not level and not url and start is None and end is None:
+            return sum(segment["records"] for segment in self.segments())
+        return sum(1 for _ in self._iter_logs(start, end, level, url))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Resume el almacenamiento a partir del manifiesto.
+
+        Returns:
+            Dict: Segmentos (incluido el activo), registros, bytes y rango de timestamps
+        """
+        segments = self.segments()
+        timestamps = [segment[key] for segment in segments for key in ("minTs", "maxTs") if segment[key]]
+        return {
+            "backend": "segments",
+            "segments": len(segments),
+            "sealedSegments": len(segments) - 1,
+            "records": sum(segment["records"] for segment in segments),
+            "bytes": sum(segment["bytes"] for segment in segments),
+            "activeBytes": segments[-1]["bytes"],
+            "minTs": min(timestamps) if timestamps else None,
+            "maxTs": max(timestamps) if timestamps else None
+        }
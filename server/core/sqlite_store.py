@@ -0,0 +1,529 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .metrics import FSYNC_LATENCY, WRITE_ERRORS
+
+# Registros máximos por transacción del hilo escritor
+DEFAULT_BATCH_SIZE = 500
+# Lotes en cola antes de que write_logs espere al escritor
+WRITER_QUEUE_SIZE = 1000
+# Reintentos de una transacción fallida (p. ej. base bloqueada) antes de descartarla
+WRITE_RETRIES = 3
+# Espera inicial entre reintentos; se duplica en cada uno
+WRITE_RETRY_DELAY = 0.05
+# Campos por los que se puede agrupar un conteo
+GROUP_FIELDS = ("level", "url")
+# PRAGMA synchronous de cada política de durabilidad
+SYNCHRONOUS_LEVELS = {"none": "OFF", "interval": "NORMAL", "batch": "FULL", "always": "FULL"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    server_timestamp TEXT NOT NULL,
+    timestamp TEXT,
+    level TEXT,
+    url TEXT,
+    token TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_token_timestamp ON logs (token, server_timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_token_level ON logs (token, level, server_timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_token_url ON logs (token, url);
+"""
+
+_INSERT = ("INSERT INTO logs (server_timestamp, timestamp, level, url, token, data) "
+           "VALUES (?, ?, ?, ?, ?, ?)")
+
+Row = Tuple[str, Optional[str], Optional[str], Optional[str], str, str]
+
+_NO_ITEM = object()
+
+
+class SqliteDatabase:
+    """
+    Base de datos SQLite en modo WAL compartida por todos los directorios.
+
+    Las escrituras se encolan y un único hilo escritor las agrupa en
+    transacciones de hasta `batch_size` registros (group commit): con carga,
+    cada transacción recoge todo lo que llegó mientras se confirmaba la
+    anterior. Las lecturas usan una conexión por hilo y, gracias a WAL, no
+    bloquean ni son bloqueadas por el escritor.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Abre (o crea) la base de datos e inicia el hilo escritor.
+
+        Args:
+            path: Archivo de la base de datos
+            batch_size: Registros máximos por transacción
+        """
+        self.path = path
+        self.batch_size = max(batch_size, 1)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        connection.close()
+
+        self.synchronous = "NORMAL"
+        self._local = threading.local()
+        self._queue: queue.Queue = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="SqliteWriter", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión con los ajustes comunes."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        # Con WAL, NORMAL solo sincroniza en los checkpoints
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def reader(self) -> sqlite3.Connection:
+        """Conexión de lectura del hilo actual."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def submit(self, rows: List[Row], wait: bool = False) -> None:
+        """
+        Encola registros para el hilo escritor.
+
+        Args:
+            rows: Filas a insertar
+            wait: Esperar a que la transacción que las incluye se confirme
+
+        Raises:
+            sqlite3.Error: Con `wait`, si la transacción falló tras los reintentos
+        """
+        if not wait:
+            self._queue.put(("rows", rows, None))
+            return
+        done = threading.Event()
+        outcome: Dict[str, Any] = {}
+        self._queue.put(("rows", rows, (done, outcome)))
+        done.wait()
+        if "error" in outcome:
+            raise outcome["error"]
+
+    def call(self, function: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Ejecuta una función en el hilo escritor, después de las escrituras pendientes.
+
+        Args:
+            function: Recibe la conexión de escritura
+            timeout: Espera máxima
+
+        Returns:
+            Any: Resultado de la función
+
+        Raises:
+            TimeoutError: Si el escritor no la ejecutó a tiempo
+        """
+        done = threading.Event()
+        outcome: Dict[str, Any] = {}
+        self._queue.put(("call", function, done, outcome))
+        if not done.wait(timeout):
+            raise TimeoutError("El escritor de SQLite no respondió a tiempo")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Espera a que se confirmen las escrituras encoladas hasta ahora.
+
+        Returns:
+            bool: False si no terminaron dentro del timeout
+        """
+        try:
+            self.call(lambda connection: None, timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def _run(self) -> None:
+        """Hilo escritor: agrupa los registros encolados en transacciones."""
+        connection = self._connect()
+        while True:
+            item = self._queue.get()
+            rows: List[Row] = []
+            waiters: List[Tuple[threading.Event, Dict[str, Any]]] = []
+            batches = 0
+            # Group commit: todo lo que ya esté en cola va en la misma transacción
+            while item is not None and item is not _NO_ITEM and item[0] == "rows":
+                rows.extend(item[1])
+                batches += 1
+                if item[2] is not None:
+                    waiters.append(item[2])
+                if len(rows) >= self.batch_size:
+                    item = _NO_ITEM
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = _NO_ITEM
+
+            if rows:
+                error = self._write(connection, rows)
+                if error is not None:
+                    print(f"Error escribiendo en SQLite, se descartan {len(rows)} registros: {error}")
+                    # Los lotes con espera reciben el error y se cuentan en write_logs
+                    if batches > len(waiters):
+                        WRITE_ERRORS.inc(batches - len(waiters))
+                for done, outcome in waiters:
+                    if error is not None:
+                        outcome["error"] = error
+                    done.set()
+
+            if item is None:
+                connection.close()
+                return
+            if item is not _NO_ITEM:
+                _, function, done, outcome = item
+                try:
+                    with connection:
+                        outcome["result"] = function(connection)
+                except Exception as e:
+                    outcome["error"] = e
+                done.set()
+
+    def _write(self, connection: sqlite3.Connection, rows: List[Row]) -> Optional[sqlite3.Error]:
+        """
+        Inserta las filas en una transacción, reintentando los errores con espera creciente.
+
+        Returns:
+            Optional[sqlite3.Error]: El último error si no se pudo confirmar
+        """
+        delay = WRITE_RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                with connection:
+                    connection.executemany(_INSERT, rows)
+            except sqlite3.Error as e:
+                if attempt == WRITE_RETRIES:
+                    return e
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if self.synchronous == "FULL":
+                # Con FULL cada commit incluye el fsync del WAL
+                FSYNC_LATENCY.observe(time.perf_counter() - start, reason="sqlite_commit")
+            return None
+        return None
+
+    def set_durability(self, durability: str) -> None:
+        """
+        Ajusta PRAGMA synchronous del escritor a la política de durabilidad.
+
+        Args:
+            durability: 'none' (OFF), 'interval' (NORMAL, fsync en los
+                checkpoints) o 'batch'/'always' (FULL, fsync en cada commit)
+        """
+        level = SYNCHRONOUS_LEVELS.get(durability, "NORMAL")
+        if level != self.synchronous:
+            self.call(lambda connection: connection.execute(f"PRAGMA synchronous={level}"))
+            self.synchronous = level
+
+    def checkpoint(self) -> None:
+        """Pasa el WAL a la base (con fsync); en modo 'interval' acota la ventana de pérdida."""
+        start = time.perf_counter()
+        self.call(lambda connection: connection.execute("PRAGMA wal_checkpoint(PASSIVE)"))
+        FSYNC_LATENCY.observe(time.perf_counter() - start, reason="sqlite_checkpoint")
+
+    @staticmethod
+    def _token_filter(token: Optional[str]) -> Tuple[str, List[Any]]:
+        """Condición por token (None = todos los tokens)."""
+        if token is None:
+            return "1 = 1", []
+        return "token = ?", [token]
+
+    def data_bytes(self, token: Optional[str] = None) -> int:
+        """
+        Suma el tamaño de los registros guardados.
+
+        Args:
+            token: Token del directorio ('' = directorio base, None = todos)
+
+        Returns:
+            int: Bytes de JSON de los registros
+        """
+        where, params = self._token_filter(token)
+        return self.call(lambda connection: connection.execute(
+            f"SELECT COALESCE(SUM(length(CAST(data AS BLOB)) + 1), 0) FROM logs WHERE {where}",
+            params).fetchone()[0])
+
+    def delete_before(self, timestamp: str, token: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Borra los registros recibidos antes de un momento.
+
+        Args:
+            timestamp: server_timestamp límite (ISO, exclusivo)
+            token: Token del directorio ('' = directorio base, None = todos)
+
+        Returns:
+            Tuple[int, int]: Registros y bytes borrados
+        """
+        where, params = self._token_filter(token)
+
+        def delete(connection: sqlite3.Connection) -> Tuple[int, int]:
+            condition = f"{where} AND server_timestamp < ?"
+            freed = connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length(CAST(data AS BLOB)) + 1), 0) FROM logs WHERE {condition}",
+                params + [timestamp]).fetchone()
+            if freed[0]:
+                connection.execute(f"DELETE FROM logs WHERE {condition}", params + [timestamp])
+            return freed[0], freed[1]
+
+        return self.call(delete)
+
+    def delete_oldest(self, bytes_to_free: int, token: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Borra los registros más antiguos hasta liberar al menos `bytes_to_free`.
+
+        Las páginas liberadas se reutilizan en las escrituras siguientes, así
+        que la base deja de crecer aunque el archivo no encoja.
+
+        Args:
+            bytes_to_free: Bytes de JSON a liberar
+            token: Token del directorio ('' = directorio base, None = todos)
+
+        Returns:
+            Tuple[int, int]: Registros y bytes borrados
+        """
+        where, params = self._token_filter(token)
+
+        def delete(connection: sqlite3.Connection) -> Tuple[int, int]:
+            records = freed = 0
+            last_id = None
+            for row_id, size in connection.execute(
+                    f"SELECT id, length(CAST(data AS BLOB)) + 1 FROM logs WHERE {where} ORDER BY id", params):
+                records += 1
+                freed += size
+                last_id = row_id
+                if freed >= bytes_to_free:
+                    break
+            if last_id is not None:
+                connection.execute(f"DELETE FROM logs WHERE {where} AND id <= ?", params + [last_id])
+            return records, freed
+
+        if bytes_to_free <= 0:
+            return 0, 0
+        return self.call(delete)
+
+    def size_bytes(self) -> int:
+        """Tamaño en disco de la base de datos y su WAL."""
+        total = 0
+        for path in (self.path, f"{self.path}-wal"):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def close(self) -> None:
+        """Confirma lo pendiente y detiene el hilo escritor."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+class SqliteStore:
+    """
+    Logs de un directorio (token) dentro de la base SQLite.
+
+    Expone la misma interfaz de lectura y escritura que SegmentStore, de modo
+    que LogManager y MergeManager no distinguen el backend, y añade consultas
+    filtradas que se resuelven con los índices.
+    """
+
+    def __init__(self, database: SqliteDatabase, token: Optional[str] = None):
+        """
+        Args:
+            database: Base de datos compartida
+            token: Token del directorio (None = directorio base)
+        """
+        self.database = database
+        self.token = token or ""
+
+    def append_records(self, logs: List[Dict[str, Any]], max_bytes: int,
+                       durability: str = "none") -> Tuple[int, bool]:
+        """
+        Encola un lote de registros para el hilo escritor.
+
+        Args:
+            logs: Registros con server_timestamp
+            max_bytes: Sin efecto (la base no rota)
+            durability: Con 'batch' o 'always' espera a que el lote esté confirmado
+
+        Returns:
+            Tuple[int, bool]: Bytes de JSON encolados y False (no hubo rotación)
+
+        Raises:
+            sqlite3.Error: Con 'batch' o 'always', si el lote no se pudo confirmar
+        """
+        self.database.set_durability(durability)
+        rows: List[Row] = []
+        written = 0
+        for log in logs:
+            data = json.dumps(log)
+            written += len(data) + 1
+            url = log.get("url")
+            rows.append((log["server_timestamp"], str(log.get("timestamp") or "") or None,
+                         log.get("level"), url if isinstance(url, str) else None, self.token, data))
+        self.database.submit(rows, wait=durability in ("batch", "always"))
+        return written, False
+
+    def _where(self, start: Optional[str], end: Optional[str], level: Optional[str] = None,
+               url: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """Cláusula WHERE para los filtros; la URL se filtra por prefijo para usar el índice."""
+        clauses = ["token = ?"]
+        params: List[Any] = [self.token]
+        if start is not None:
+            clauses.append("server_timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("server_timestamp <= ?")
+            params.append(end)
+        if level:
+            clauses.append("level = ?")
+            params.append(level)
+        if url:
+            clauses.append("url >= ? AND url < ?")
+            params.extend([url, url + "\U0010ffff"])
+        return " AND ".join(clauses), params
+
+    def iter_lines(self, start: Optional[str] = None, end: Optional[str] = None,
+                   limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Itera los registros como líneas JSON en orden de escritura.
+
+        Args:
+            start: server_timestamp mínimo (ISO, inclusive)
+            end: server_timestamp máximo (ISO, inclusive)
+            limit: Si se indica, solo los últimos N
+        """
+        self.database.flush()
+        where, params = self._where(start, end)
+        connection = self.database.reader()
+        if limit:
+            rows = connection.execute(f"SELECT data FROM logs WHERE {where} ORDER BY id DESC LIMIT ?",
+                                      params + [limit]).fetchall()
+            for (data,) in reversed(rows):
+                yield data
+        else:
+            for (data,) in connection.execute(f"SELECT data FROM logs WHERE {where} ORDER BY id", params):
+                yield data
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None, level: Optional[str] = None,
+              url: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Busca registros con filtros indexados, del más reciente al más antiguo.
+
+        Args:
+            start: server_timestamp mínimo (ISO, inclusive)
+            end: server_timestamp máximo (ISO, inclusive)
+            level: Nivel exacto
+            url: Prefijo de la URL
+            limit: Máximo de registros
+            offset: Registros a saltar
+
+        Returns:
+            List[Dict]: Registros encontrados
+        """
+        self.database.flush()
+        where, params = self._where(start, end, level, url)
+        rows = self.database.reader().execute(
+            f"SELECT data FROM logs WHERE {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def count(self, start: Optional[str] = None, end: Optional[str] = None, level: Optional[str] = None,
+              url: Optional[str] = None, group_by: Optional[str] = None) -> Union[int, Dict[str, int]]:
+        """
+        Cuenta registros con los mismos filtros que query().
+
+        Args:
+            group_by: 'level' o 'url' para contar por valor
+
+        Returns:
+            int o Dict[str, int]: Total o conteo por valor
+        """
+        self.database.flush()
+        where, params = self._where(start, end, level, url)
+        connection = self.database.reader()
+        if group_by in GROUP_FIELDS:
+            rows = connection.execute(
+                f"SELECT {group_by}, COUNT(*) FROM logs WHERE {where} GROUP BY {group_by} ORDER BY COUNT(*) DESC",
+                params).fetchall()
+            return {str(value): count for value, count in rows}
+        return connection.execute(f"SELECT COUNT(*) FROM logs WHERE {where}", params).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Resume los registros del directorio.
+
+        Returns:
+            Dict: Mismas claves que SegmentStore.stats(); los bytes son los de la base completa
+        """
+        self.database.flush()
+        records, min_ts, max_ts = self.database.reader().execute(
+            "SELECT COUNT(*), MIN(server_timestamp), MAX(server_timestamp) FROM logs WHERE token = ?",
+            [self.token]).fetchone()
+        size = self.database.size_bytes()
+        return {
+            "backend": "sqlite",
+            "segments": 1,
+            "sealedSegments": 0,
+            "records": records,
+            "bytes": size,
+            "activeBytes": size,
+            "minTs": min_ts,
+            "maxTs": max_ts
+        }
+
+    def last_id(self) -> int:
+        """
+        Obtiene el id del último registro confirmado de cualquier directorio.
+
+        Returns:
+            int: Id (0 si la base está vacía)
+        """
+        self.database.flush()
+        row = self.database.reader().execute("SELECT MAX(id) FROM logs").fetchone()
+        return row[0] or 0
+
+    def read_since(self, after_id: int, limit: int) -> Tuple[int, List[str]]:
+        """
+        Lee los registros del directorio confirmados después de un id (tail en vivo).
+
+        No espera a las escrituras encoladas: lo que aún no se confirmó llega
+        en la lectura siguiente.
+
+        Args:
+            after_id: Último id ya leído
+            limit: Máximo de registros
+
+        Returns:
+            Tuple[int, List[str]]: Nuevo último id y líneas JSON en orden de escritura
+        """
+        rows = self.database.reader().execute(
+            # '+token' evita los índices por token: se recorre el rango de ids
+            "SELECT id, data FROM logs WHERE +token = ? AND id > ? ORDER BY id LIMIT ?",
+            [self.token, after_id, limit]).fetchall()
+        if not rows:
+            return after_id, []
+        return rows[-1][0], [data for _, data in rows]
+
+    def clear(self) -> None:
+        """Borra los registros del directorio."""
+        self.database.call(lambda connection: connection.execute("DELETE FROM logs WHERE token = ?", [self.token]))
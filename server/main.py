@@ -1,27 +1,48 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_file, stream_with_context
 from flask_cors import CORS
+import json
 import os
 import signal
 import socket
 import subprocess
 import sys
+import threading
 from datetime import datetime
+from typing import Optional
+from dateutil import parser as date_parser
 
 from core.log_manager import LogManager
 from core.config_manager import ConfigManager
-from core.file_watcher import FileWatcher
+from core.file_watcher import FileWatcher, is_glob_pattern
 from core.directory_manager import DirectoryManager
-from core.merge_manager import MergeManager
+from core.merge_manager import MergeManager, INTERNAL_SOURCE_NAME
+from core.merge_manager import WATCHER_USER_AGENT
+from core.log_parsers import get_parser, get_parser_names, MultilineAssembler, normalize_timestamp
 from api.directory_routes import directory_routes, init_directory_manager
-
-# Crear instancias compartidas
-directory_manager = DirectoryManager()
-config_manager = ConfigManager()
-log_manager = LogManager(directory_manager=directory_manager, config_manager=config_manager)
-merge_manager = MergeManager(log_manager=log_manager, config_manager=config_manager)
-
-# Inicializar el DirectoryManager en el módulo directory_routes
-init_directory_manager(directory_manager)
+from api.retention_routes import retention_routes, init_retention_janitor
+from api.compaction_routes import compaction_routes, init_segment_compactor
+from api.stats_routes import stats_routes, init_rollup_aggregator
+from api.error_routes import error_routes, init_error_group_index
+from api.debug_routes import debug_routes, init_debug
+from core.retention import RetentionJanitor
+from core.compactor import SegmentCompactor
+from core.rollups import RollupAggregator
+from core.error_groups import ErrorGroupIndex
+from core.segment_store import GROUP_FIELDS
+from core.metrics import metrics, LOG_REQUESTS, INGEST_IN_FLIGHT
+
+# Instancias compartidas: las crea init_server(). Los workers del parseo
+# paralelo (spawn) importan este módulo como '__mp_main__', así que importarlo
+# no debe crear managers, archivos de configuración ni hilos.
+directory_manager: Optional[DirectoryManager] = None
+config_manager: Optional[ConfigManager] = None
+log_manager: Optional[LogManager] = None
+merge_manager: Optional[MergeManager] = None
+retention_janitor: Optional[RetentionJanitor] = None
+segment_compactor: Optional[SegmentCompactor] = None
+rollup_aggregator: Optional[RollupAggregator] = None
+error_group_index: Optional[ErrorGroupIndex] = None
+file_watcher: Optional[FileWatcher] = None
 
 def kill_process_on_port(port: int) -> bool:
     """
@@ -151,35 +172,211 @@ def ensure_port_available(port: int) -> bool:
 app = Flask(__name__)
 CORS(app)  # Habilitar CORS para desarrollo
 
-# Los managers ya fueron inicializados al principio del archivo
-
 # Registrar el blueprint de directorios
 app.register_blueprint(directory_routes)
-file_watcher = FileWatcher()
+app.register_blueprint(retention_routes)
+app.register_blueprint(compaction_routes)
+app.register_blueprint(stats_routes)
+app.register_blueprint(error_routes)
+app.register_blueprint(debug_routes)
+
+# Tamaño de cada bloque al descargar varios archivos concatenados
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Fuentes externas conectadas al FileWatcher, por ruta
+external_watch_sources = {}
+
+# Ensamblador multilínea de cada archivo externo vigilado, conservado entre
+# callbacks: una traza partida entre dos lecturas sigue siendo un solo registro
+external_assemblers = {}
+external_assemblers_lock = threading.Lock()
+# Segundos sin datos nuevos tras los que se escribe el registro multilínea pendiente
+EXTERNAL_FLUSH_IDLE_SECONDS = 1.0
+
+def build_watched_log(record, file_path: str, source_name: str) -> dict:
+    """Convierte un registro ensamblado de un archivo externo en un log de devpipe.log"""
+    return {
+        "level": record.level,
+        "message": record.message,
+        "url": f"file://{file_path}",
+        "timestamp": (record.timestamp or datetime.now()).isoformat(),
+        "user_agent": WATCHER_USER_AGENT,
+        "source": source_name
+    }
+
+def get_external_assembler(file_path: str, source: dict) -> dict:
+    """Obtiene (o crea) el estado de ensamblado de un archivo externo"""
+    with external_assemblers_lock:
+        state = external_assemblers.get(file_path)
+        if state is None:
+            state = external_assemblers[file_path] = {
+                "assembler": MultilineAssembler(get_parser(source.get("parser")),
+                                                source.get("timestampFormat") or None),
+                "source_name": source.get("name") or os.path.basename(file_path),
+                "lock": threading.Lock(),
+                "timer": None
+            }
+        return state
+
+def flush_external_assembler(file_path: str, force: bool = False) -> None:
+    """
+    Escribe el registro multilínea pendiente de un archivo externo.
+
+    Lo llama el temporizador de inactividad; si mientras tanto llegaron datos
+    nuevos, el temporizador ya fue reemplazado y no se hace nada.
 
-# Variable global eliminada - ahora se usa config_manager para persistencia
+    Args:
+        file_path: Ruta del archivo
+        force: Escribir aunque no lo llame el temporizador vigente (al dejar de vigilarlo)
+    """
+    with external_assemblers_lock:
+        state = external_assemblers.get(file_path)
+    if state is None:
+        return
+    with state["lock"]:
+        if not force and state["timer"] is not threading.current_thread():
+            return
+        if state["timer"] is not None:
+            state["timer"].cancel()
+        state["timer"] = None
+        record = state["assembler"].flush()
+    if record is not None and log_manager.is_active:
+        log_manager.write_logs([build_watched_log(record, file_path, state["source_name"])])
+
+def drop_external_assembler(file_path: str) -> None:
+    """Escribe lo pendiente y descarta el ensamblador de un archivo que ya no se vigila"""
+    flush_external_assembler(file_path, force=True)
+    with external_assemblers_lock:
+        external_assemblers.pop(file_path, None)
 
 def on_external_log(file_path: str) -> None:
     """Callback para cuando hay cambios en un archivo externo"""
     if not file_watcher.is_active or not log_manager.is_active:
         return
 
+    # El archivo puede estar en un directorio registrado
+    directory_manager.invalidate_path(file_path)
     new_lines = file_watcher.get_new_content(file_path)
-    for line in new_lines:
-        log_manager.write_log({
-            "level": "external",
-            "message": line,
-            "url": f"file://{file_path}",
-            "timestamp": datetime.now().isoformat(),
-            "user_agent": "file_watcher",
-            "source": os.path.basename(file_path)
-        })
+    if not new_lines:
+        return
+
+    source = external_watch_sources.get(file_path)
+    if source is None:
+        # Archivo descubierto por un patrón glob
+        pattern = file_watcher.watched_files.get(file_path, {}).get("pattern")
+        source = external_watch_sources.get(pattern, {})
+    state = get_external_assembler(file_path, source)
+
+    with state["lock"]:
+        records = [record for record in map(state["assembler"].feed, new_lines) if record is not None]
+        # El último registro puede recibir continuaciones en la próxima lectura:
+        # se escribe cuando el archivo lleva EXTERNAL_FLUSH_IDLE_SECONDS sin cambios
+        if state["timer"] is not None:
+            state["timer"].cancel()
+        state["timer"] = threading.Timer(EXTERNAL_FLUSH_IDLE_SECONDS, flush_external_assembler, args=(file_path,))
+        state["timer"].daemon = True
+        state["timer"].start()
+
+    # Un solo write_logs (y una sola apertura del archivo) por lote
+    if records:
+        log_manager.write_logs([build_watched_log(record, file_path, state["source_name"]) for record in records])
+
+def sync_external_watches() -> None:
+    """Conecta al FileWatcher las fuentes externas configuradas mientras el monitoreo está activo"""
+    desired = {}
+    if log_manager.is_active:
+        desired = {source["path"]: source for source in config_manager.get_external_sources()}
+
+    for path in list(external_watch_sources):
+        if path not in desired:
+            if is_glob_pattern(path):
+                file_watcher.remove_pattern(path)
+            else:
+                file_watcher.remove_file(path)
+            del external_watch_sources[path]
+
+    for path, source in desired.items():
+        external_watch_sources[path] = source
+        if is_glob_pattern(path):
+            if path not in file_watcher.patterns:
+                file_watcher.add_pattern(path, on_external_log)
+        elif path not in file_watcher.watched_files:
+            file_watcher.add_file(path, on_external_log)
+
+    # Ensambladores de archivos que ya no se vigilan
+    for path in list(external_assemblers):
+        if path not in file_watcher.watched_files:
+            drop_external_assembler(path)
+
+def apply_config() -> None:
+    """Aplica a los componentes en ejecución el snapshot de configuración actual"""
+    snapshot = config_manager.snapshot
+    log_manager.set_max_file_size(snapshot.config.get('maxFileSize', 50))
+    file_watcher.set_poll_interval(snapshot.config.get("monitoring", {}).get("intervalMs", 1000))
+    sync_external_watches()
+
+def on_config_file_changed(file_path: str) -> None:
+    """Callback para ediciones externas de config.json: recarga sin reiniciar"""
+    if config_manager.reload():
+        apply_config()
+
+def init_server() -> None:
+    """
+    Crea los managers compartidos, conecta los blueprints y empieza a vigilar config.json.
+
+    Se llama al arrancar el servidor (o desde quien importe este módulo para
+    usar la app, como los benchmarks); llamarla de nuevo no hace nada.
+    """
+    global directory_manager, config_manager, log_manager, merge_manager, retention_janitor
+    global segment_compactor, rollup_aggregator, error_group_index, file_watcher
+    if config_manager is not None:
+        return
+
+    directory_manager = DirectoryManager()
+    config_manager = ConfigManager()
+    log_manager = LogManager(directory_manager=directory_manager, config_manager=config_manager)
+    merge_manager = MergeManager(log_manager=log_manager, config_manager=config_manager)
+    retention_janitor = RetentionJanitor(log_manager, directory_manager, config_manager)
+    segment_compactor = SegmentCompactor(log_manager, directory_manager, config_manager)
+    rollup_aggregator = RollupAggregator(config_manager)
+    log_manager.add_write_listener(rollup_aggregator.observe)
+    error_group_index = ErrorGroupIndex(config_manager)
+    log_manager.add_write_listener(error_group_index.observe)
+
+    # Inicializar los managers de los blueprints
+    init_directory_manager(directory_manager)
+    init_retention_janitor(retention_janitor)
+    init_segment_compactor(segment_compactor)
+    init_rollup_aggregator(rollup_aggregator)
+    init_error_group_index(error_group_index)
+    init_debug(config_manager)
+
+    monitoring_config = config_manager.get_config().get("monitoring", {})
+    file_watcher = FileWatcher(
+        debounce_ms=monitoring_config.get("debounceMs", 50),
+        checkpoint_file="config/file_watcher_offsets.json",
+        backend=monitoring_config.get("backend", "auto"),
+        poll_interval_ms=monitoring_config.get("intervalMs", 1000)
+    )
+    metrics.register_collector("devpipe_watcher_pending_events",
+                               "Archivos con una notificación del FileWatcher pendiente",
+                               lambda: {(): file_watcher.pending_count})
+    metrics.register_collector("devpipe_watcher_files", "Archivos monitoreados por el FileWatcher",
+                               lambda: {(): len(file_watcher.watched_files)})
+
+    # Recargar la configuración cuando se edita el archivo a mano
+    file_watcher.add_file(os.path.abspath(config_manager.config_file), on_config_file_changed)
+
+# Logs máximos por petición a /log/batch
+MAX_BATCH_RECORDS = 1000
 
 @app.route('/log', methods=['POST'])
 def log():
+    INGEST_IN_FLIGHT.inc()
     try:
         log_data = request.json
         if not log_manager.is_active:
+            LOG_REQUESTS.inc(result="monitoring_disabled")
             return jsonify({
                 "status": "monitoring_disabled",
                 "message": "El monitoreo está desactivado"
@@ -187,32 +384,103 @@ def log():
 
         # Validar que log_data no sea None
         if log_data is None:
+            LOG_REQUESTS.inc(result="invalid")
             return jsonify({
                 "status": "error",
                 "message": "No se recibieron datos de log"
             }), 400
 
         if log_manager.write_log(log_data):
+            LOG_REQUESTS.inc(result="accepted")
             return jsonify({
                 "status": "success",
                 "message": "Log recibido correctamente"
             })
         else:
+            LOG_REQUESTS.inc(result="filtered")
             return jsonify({
                 "status": "filtered_out",
                 "message": "Log filtrado por configuración"
             })
     except Exception as e:
+        LOG_REQUESTS.inc(result="error")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+    finally:
+        INGEST_IN_FLIGHT.dec()
+
+@app.route('/log/batch', methods=['POST'])
+def log_batch():
+    """
+    Ingesta de un lote de logs en una sola petición.
+
+    Acepta una lista JSON de logs (o {"logs": [...]}) y los escribe con un
+    solo write_logs: con durability 'batch' el lote entero comparte un fsync.
+    """
+    INGEST_IN_FLIGHT.inc()
+    try:
+        payload = request.get_json(silent=True)
+        logs = payload.get('logs') if isinstance(payload, dict) else payload
+        if not isinstance(logs, list) or not all(isinstance(log_data, dict) for log_data in logs):
+            LOG_REQUESTS.inc(result="invalid")
+            return jsonify({
+                "status": "error",
+                "message": "Se esperaba una lista de logs"
+            }), 400
+        if len(logs) > MAX_BATCH_RECORDS:
+            LOG_REQUESTS.inc(len(logs), result="invalid")
+            return jsonify({
+                "status": "error",
+                "message": f"El lote supera el máximo de {MAX_BATCH_RECORDS} logs"
+            }), 413
+
+        if not log_manager.is_active:
+            LOG_REQUESTS.inc(len(logs), result="monitoring_disabled")
+            return jsonify({
+                "status": "monitoring_disabled",
+                "message": "El monitoreo está desactivado"
+            })
+
+        accepted = log_manager.write_logs(logs) if logs else 0
+        LOG_REQUESTS.inc(accepted, result="accepted")
+        LOG_REQUESTS.inc(len(logs) - accepted, result="filtered")
+        return jsonify({
+            "status": "success",
+            "data": {
+                "accepted": accepted,
+                "filtered": len(logs) - accepted
+            }
+        })
+    except Exception as e:
+        LOG_REQUESTS.inc(result="error")
         return jsonify({
             "status": "error",
             "message": str(e)
         }), 500
+    finally:
+        INGEST_IN_FLIGHT.dec()
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas del servidor en formato de texto de Prometheus"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/logs', methods=['GET'])
 def get_logs():
     try:
         limit = request.args.get('limit', default=10, type=int)
-        logs = log_manager.get_recent_logs(limit)
+        try:
+            # Rango opcional por fecha de recepción; los segmentos fuera del rango no se abren
+            start = normalize_timestamp(date_parser.parse(request.args['from'])) if request.args.get('from') else None
+            end = normalize_timestamp(date_parser.parse(request.args['to'])) if request.args.get('to') else None
+        except (ValueError, OverflowError) as e:
+            return jsonify({
+                "status": "error",
+                "message": f"Fecha inválida: {str(e)}"
+            }), 400
+        logs = log_manager.get_recent_logs(limit, start, end)
         return jsonify({
             "status": "success",
             "data": logs
@@ -223,6 +491,62 @@ def get_logs():
             "message": str(e)
         }), 500
 
+@app.route('/logs/query', methods=['GET'])
+def query_logs():
+    """
+    Búsqueda filtrada en los logs del directorio actual.
+
+    Parámetros: from, to (fecha de recepción), level (exacto), url (prefijo),
+    limit, offset; con count=true devuelve solo el total y con group_by=level|url
+    el conteo por valor. Con el backend sqlite se resuelve con índices.
+    """
+    try:
+        start = normalize_timestamp(date_parser.parse(request.args['from'])) if request.args.get('from') else None
+        end = normalize_timestamp(date_parser.parse(request.args['to'])) if request.args.get('to') else None
+    except (ValueError, OverflowError) as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Fecha inválida: {str(e)}"
+        }), 400
+
+    limit = request.args.get('limit', default=100, type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if limit < 0 or offset < 0:
+        return jsonify({
+            "status": "error",
+            "message": "limit y offset no pueden ser negativos"
+        }), 400
+
+    try:
+        level = request.args.get('level') or None
+        url = request.args.get('url') or None
+        group_by = request.args.get('group_by') or None
+        if group_by and group_by not in GROUP_FIELDS:
+            return jsonify({
+                "status": "error",
+                "message": f"group_by debe ser uno de: {', '.join(GROUP_FIELDS)}"
+            }), 400
+        if group_by or request.args.get('count', 'false').lower() == 'true':
+            return jsonify({
+                "status": "success",
+                "data": {
+                    "backend": log_manager.get_backend_name(),
+                    "count": log_manager.count_logs(start, end, level, url, group_by)
+                }
+            })
+        return jsonify({
+            "status": "success",
+            "data": {
+                "backend": log_manager.get_backend_name(),
+                "logs": log_manager.query_logs(start, end, level, url, limit, offset)
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 @app.route('/logs/clear', methods=['POST'])
 def clear_logs():
     try:
@@ -241,6 +565,7 @@ def clear_logs():
 def start_monitoring():
     try:
         log_manager.start()
+        sync_external_watches()
         return jsonify({
             "status": "success",
             "message": "Monitoreo iniciado"
@@ -254,7 +579,11 @@ def start_monitoring():
 @app.route('/monitoring/stop', methods=['POST'])
 def stop_monitoring():
     try:
+        # Escribir los registros multilínea pendientes mientras la captura sigue activa
+        for path in list(external_assemblers):
+            drop_external_assembler(path)
         log_manager.stop()
+        sync_external_watches()
         return jsonify({
             "status": "success",
             "message": "Monitoreo detenido"
@@ -285,7 +614,7 @@ def get_monitoring_status():
 @app.route('/config', methods=['GET'])
 def get_config():
     try:
-        config = config_manager.get_config()
+        config = config_manager.snapshot.to_dict()
         file_info = log_manager.get_log_file_info()
         return jsonify({
             "status": "success",
@@ -348,8 +677,7 @@ def update_config():
                 log_manager.set_log_directory_token(None)
 
         if config_manager.update_config(new_config):
-            # Actualizar configuración del log manager
-            log_manager.set_max_file_size(new_config.get('maxFileSize', 50))
+            apply_config()
             return jsonify({
                 "status": "success",
                 "message": "Configuración actualizada"
@@ -384,6 +712,7 @@ def set_external_log_path_config():
 
         # Usar config_manager para persistir la configuración
         success = config_manager.set_external_log_path(path)
+        sync_external_watches()
         if success:
             return jsonify({
                 "message": f"Ruta establecida: {path}"
@@ -478,6 +807,73 @@ def get_external_log_content():
             "message": f"Error: {str(e)}"
         }), 500
 
+def iter_files_chunks(paths):
+    """Lee varios archivos seguidos en bloques para una descarga en streaming"""
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(STREAM_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    yield chunk
+        except OSError as e:
+            print(f"Error leyendo {path}: {e}")
+
+@app.route('/api/external-log/content/stream', methods=['GET'])
+def stream_external_log_content():
+    """
+    Descarga el archivo de log externo en streaming (admite HTTP Range).
+
+    Con ?source=<nombre> se descarga el archivo de esa fuente; si su ruta es
+    un patrón glob se descargan concatenados (en orden de ruta) todos los
+    archivos que coinciden, sin Range.
+    """
+    try:
+        source_name = request.args.get('source')
+        if source_name:
+            if not config_manager.get_external_sources([source_name]):
+                return jsonify({
+                    "message": f"Fuente desconocida: {source_name}"
+                }), 404
+            files = [source["path"] for source in merge_manager.get_source_files([source_name])
+                     if os.path.isfile(source["path"])]
+            if not files:
+                return jsonify({
+                    "message": "Ningún archivo de la fuente existe"
+                }), 404
+            if len(files) > 1:
+                return Response(
+                    stream_with_context(iter_files_chunks(files)),
+                    mimetype='text/plain',
+                    headers={"Content-Disposition": f"attachment; filename={source_name}.log"}
+                )
+            external_log_path = files[0]
+        else:
+            external_log_path = config_manager.get_external_log_path()
+
+        if not external_log_path:
+            return jsonify({
+                "message": "No se ha establecido una ruta de archivo"
+            }), 400
+
+        if not os.path.exists(external_log_path):
+            return jsonify({
+                "message": "El archivo no existe"
+            }), 404
+
+        return send_file(
+            external_log_path,
+            mimetype='text/plain',
+            as_attachment=True,
+            download_name=os.path.basename(external_log_path),
+            conditional=True
+        )
+    except Exception as e:
+        return jsonify({
+            "message": f"Error: {str(e)}"
+        }), 500
+
 @app.route('/api/external-log/lines/<int:n>', methods=['GET'])
 def get_external_log_last_n_lines(n):
     """Obtiene las últimas N líneas del archivo de log externo"""
@@ -546,6 +942,20 @@ def clear_external_log():
             "message": f"Error: {str(e)}"
         }), 500
 
+def parse_sources_arg(value):
+    """
+    Convierte el parámetro `sources` (lista o texto separado por comas) en una lista de nombres.
+
+    Returns:
+        Lista de nombres de fuentes o None si no se especificó
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    names = [str(name).strip() for name in value if str(name).strip()]
+    return names or None
+
 # Endpoints para merge logs
 @app.route('/api/merge-logs/stats', methods=['GET'])
 def get_merge_stats():
@@ -573,14 +983,13 @@ def create_merged_logs():
         internal_limit = data.get('internal_limit')
         external_limit = data.get('external_limit')
         sort_by_time = data.get('sort_by_time', True)
-        
-        # La ruta externa ya está configurada en merge_manager a través de config_manager
-        # No necesitamos hacer nada adicional aquí
+        sources = parse_sources_arg(data.get('sources'))
         
         merged_file_path = merge_manager.create_merged_file(
             internal_limit=internal_limit,
             external_limit=external_limit,
-            sort_by_time=sort_by_time
+            sort_by_time=sort_by_time,
+            sources=sources
         )
         
         return jsonify({
@@ -604,15 +1013,14 @@ def get_merged_content():
         js_lines = request.args.get('js', type=int)  # Líneas de logs internos (JS)
         wp_lines = request.args.get('wp', type=int)  # Líneas de logs externos (WordPress)
         sort_by_time = request.args.get('sort_by_time', 'true').lower() == 'true'
-        
-        # La ruta externa ya está configurada en merge_manager a través de config_manager
-        # No necesitamos hacer nada adicional aquí
+        sources = parse_sources_arg(request.args.get('sources'))
         
         # Obtener logs combinados
-        merged_logs = merge_manager.merge_logs(
+        merged_logs = merge_manager.iter_merged_logs(
             internal_limit=js_lines,
             external_limit=wp_lines,
-            sort_by_time=sort_by_time
+            sort_by_time=sort_by_time,
+            sources=sources
         )
         
         # Formatear logs para respuesta
@@ -663,15 +1071,14 @@ def export_merged_logs():
         js_lines = request.args.get('js', type=int)
         wp_lines = request.args.get('wp', type=int)
         sort_by_time = request.args.get('sort_by_time', 'true').lower() == 'true'
-        
-        # La ruta externa ya está configurada en merge_manager a través de config_manager
-        # No necesitamos hacer nada adicional aquí
+        sources = parse_sources_arg(request.args.get('sources'))
         
         # Obtener logs combinados
-        merged_logs = merge_manager.merge_logs(
+        merged_logs = merge_manager.iter_merged_logs(
             internal_limit=js_lines,
             external_limit=wp_lines,
-            sort_by_time=sort_by_time
+            sort_by_time=sort_by_time,
+            sources=sources
         )
         
         # Crear texto plano
@@ -692,6 +1099,170 @@ def export_merged_logs():
             "message": str(e)
         }), 500
 
+@app.route('/api/merge-logs/export/stream', methods=['GET'])
+def stream_merged_logs():
+    """Exporta los logs merged en streaming como texto plano o NDJSON"""
+    try:
+        js_lines = request.args.get('js', type=int)
+        wp_lines = request.args.get('wp', type=int)
+        sort_by_time = request.args.get('sort_by_time', 'true').lower() == 'true'
+        sources = parse_sources_arg(request.args.get('sources'))
+        output_format = request.args.get('format', 'text').lower()
+
+        if output_format not in ('text', 'ndjson'):
+            return jsonify({
+                "status": "error",
+                "message": "Formato inválido: use 'text' o 'ndjson'"
+            }), 400
+
+        merged_logs = merge_manager.iter_merged_logs(
+            internal_limit=js_lines,
+            external_limit=wp_lines,
+            sort_by_time=sort_by_time,
+            sources=sources
+        )
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if output_format == 'ndjson':
+            mimetype = 'application/x-ndjson'
+            filename = f"devpipe_merged_{timestamp}.ndjson"
+        else:
+            mimetype = 'text/plain'
+            filename = f"devpipe_merged_{timestamp}.log"
+
+        return Response(
+            stream_with_context(merge_manager.iter_export_chunks(merged_logs, output_format)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/merge-logs/stream', methods=['GET'])
+def stream_live_merged_logs():
+    """Stream SSE en vivo de los logs internos y externos, ordenado por tiempo"""
+    try:
+        sources = parse_sources_arg(request.args.get('sources'))
+        max_lateness_ms = request.args.get('max_lateness_ms', type=int)
+        if max_lateness_ms is not None and max_lateness_ms < 0:
+            return jsonify({
+                "status": "error",
+                "message": "max_lateness_ms debe ser mayor o igual a 0"
+            }), 400
+
+        live_tail = merge_manager.open_live_tail(sources=sources, max_lateness_ms=max_lateness_ms)
+
+        def serialize(log):
+            return json.dumps({
+                **json.loads(merge_manager.serialize_log(log)),
+                "line": merge_manager.format_log_for_merged_file(log)
+            }, ensure_ascii=False)
+
+        return Response(
+            stream_with_context(live_tail.iter_sse(serialize)),
+            mimetype='text/event-stream',
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
+            }
+        )
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/merge-logs/download', methods=['GET'])
+def download_merged_file():
+    """Descarga el archivo merged generado (admite HTTP Range)"""
+    try:
+        merged_file_path = merge_manager.get_merged_file_path()
+        if not os.path.exists(merged_file_path):
+            return jsonify({
+                "status": "error",
+                "message": "El archivo merged no existe"
+            }), 404
+
+        return send_file(
+            os.path.abspath(merged_file_path),
+            mimetype='text/plain',
+            as_attachment=True,
+            download_name=os.path.basename(merged_file_path),
+            conditional=True
+        )
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+# Endpoints para fuentes de logs externos
+@app.route('/api/config/external-sources', methods=['GET'])
+def get_external_sources():
+    """Obtiene las fuentes de logs externos configuradas"""
+    try:
+        sources = []
+        for source in config_manager.get_external_sources():
+            sources.append({
+                **source,
+                "exists": os.path.exists(source["path"])
+            })
+        return jsonify({
+            "status": "success",
+            "data": {
+                "internal_source": INTERNAL_SOURCE_NAME,
+                "sources": sources,
+                "parsers": get_parser_names()
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/config/external-sources', methods=['POST'])
+def set_external_sources():
+    """Establece la lista de fuentes de logs externos"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('sources'), list):
+            return jsonify({
+                "status": "error",
+                "message": "No se proporcionó la lista de fuentes"
+            }), 400
+
+        try:
+            success = config_manager.set_external_sources(data['sources'])
+            sync_external_watches()
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400
+
+        if success:
+            return jsonify({
+                "status": "success",
+                "message": "Fuentes externas actualizadas",
+                "data": {
+                    "sources": config_manager.get_external_sources()
+                }
+            })
+        else:
+            return jsonify({
+                "status": "error",
+                "message": "Error al guardar la configuración"
+            }), 500
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 # Endpoints para configuración de rutas de archivos
 @app.route('/api/config/external-log-path', methods=['GET'])
 def api_get_external_log_path():
@@ -730,6 +1301,7 @@ def set_external_log_path_config_v2():
             }), 400
 
         success = config_manager.set_external_log_path(path)
+        sync_external_watches()
         if success:
             return jsonify({
                 "status": "success",
@@ -755,6 +1327,7 @@ def delete_external_log_path_config():
     """Borra la ruta del archivo de logs externos"""
     try:
         success = config_manager.set_external_log_path("")
+        sync_external_watches()
         if success:
             return jsonify({
                 "status": "success",
@@ -849,6 +1422,8 @@ def delete_merged_log_path():
             "message": str(e)
         }), 500
 if __name__ == '__main__':
+    init_server()
+
     # Obtener puerto de configuración
     port = int(os.environ.get('PORT', config_manager.get_config().get('port', 7845)))
 
@@ -865,7 +1440,9 @@ if __name__ == '__main__':
         print(f"   • GET  /config - Obtener configuración")
         print(f"   • POST /config - Actualizar configuración")
         print(f"   • POST /log - Enviar log")
-        print(f"   • GET  /logs - Obtener logs recientes")
+        print(f"   • POST /log/batch - Enviar un lote de logs")
+        print(f"   • GET  /logs - Obtener logs recientes (?limit, ?from, ?to)")
+        print(f"   • GET  /logs/query - Buscar y contar logs (?level, ?url, ?from, ?to, ?group_by)")
         print(f"   • POST /logs/clear - Limpiar logs")
         print(f"   • POST /monitoring/start - Iniciar monitoreo")
         print(f"   • POST /monitoring/stop - Detener monitoreo")
@@ -873,6 +1450,7 @@ if __name__ == '__main__':
         print(f"   • GET  /api/external-log/exists - Verificar archivo externo")
         print(f"   • GET  /api/external-log/stats - Estadísticas archivo externo")
         print(f"   • GET  /api/external-log/content - Contenido archivo externo")
+        print(f"   • GET  /api/external-log/content/stream - Descargar archivo externo (Range)")
         print(f"   • GET  /api/external-log/lines/<n> - Últimas N líneas")
         print(f"   • DELETE /api/external-log/clear - Borrar archivo externo")
         print(f"   • GET  /api/merge-logs/stats - Estadísticas de merge")
@@ -880,23 +1458,45 @@ if __name__ == '__main__':
         print(f"   • GET  /api/merge-logs/content - Contenido merged")
         print(f"   • DELETE /api/merge-logs/clear-all - Borrar todos los logs")
         print(f"   • GET  /api/merge-logs/export - Exportar logs merged")
-        print(f"   • GET  /api/merge-logs/stats - Estadísticas de merge")
-        print(f"   • POST /api/merge-logs/create - Crear archivo merged")
-        print(f"   • GET  /api/merge-logs/content - Contenido merged")
-        print(f"   • DELETE /api/merge-logs/clear-all - Borrar todos los logs")
-        print(f"   • GET  /api/merge-logs/export - Exportar logs merged")
-        print(f"   • GET  /api/merge-logs/stats - Estadísticas de merge")
-        print(f"   • POST /api/merge-logs/create - Crear archivo merged")
-        print(f"   • GET  /api/merge-logs/content - Contenido merged")
-        print(f"   • DELETE /api/merge-logs/clear-all - Borrar todos los logs")
-        print(f"   • GET  /api/merge-logs/export - Exportar logs merged")
+        print(f"   • GET  /api/merge-logs/export/stream - Exportar merged en streaming (text/ndjson)")
+        print(f"   • GET  /api/merge-logs/download - Descargar archivo merged (Range)")
+        print(f"   • GET  /api/merge-logs/stream - Tail en vivo merged (SSE)")
+        print(f"   • GET  /api/config/external-sources - Fuentes externas")
+        print(f"   • POST /api/config/external-sources - Configurar fuentes externas")
+        print(f"   • GET  /metrics - Métricas (formato Prometheus)")
+        if config_manager.get_config().get("debug", {}).get("enabled", False):
+            print(f"   • POST /api/debug/profile/start - Perfil de CPU (diagnóstico)")
+            print(f"   • POST /api/debug/tracemalloc/snapshot - Snapshot de memoria (diagnóstico)")
+            print(f"   • GET  /api/debug/routes - Latencias por ruta (diagnóstico)")
+        print(f"   • GET  /api/retention/status - Estado de la retención")
+        print(f"   • POST /api/retention/run - Aplicar retención ahora")
+        print(f"   • GET  /api/compaction/status - Estado de la compactación de segmentos")
+        print(f"   • POST /api/compaction/run - Compactar segmentos ahora")
+        print(f"   • GET  /api/stats/rollup - Conteos por minuto/hora (group_by, from, to)")
+        print(f"   • GET  /api/errors/groups - Errores agrupados por huella de la pila")
         print("🔗 Presiona Ctrl+C para detener el servidor")
 
+        retention_janitor.start()
+        segment_compactor.start()
+        rollup_aggregator.start()
+        error_group_index.start()
         app.run(host='0.0.0.0', port=port, debug=False)
 
     except KeyboardInterrupt:
         print("\n🛑 Servidor detenido por el usuario")
-        sys.exit(0)
     except Exception as e:
         print(f"❌ Error al iniciar el servidor: {e}")
         sys.exit(1)
+    finally:
+        # Detener cada componente aunque otro falle, y cerrar el backend al final
+        for component in (file_watcher, retention_janitor, segment_compactor, rollup_aggregator, error_group_index):
+            try:
+                component.stop()
+            except Exception as e:
+                print(f"Error deteniendo {type(component).__name__}: {e}")
+        # Compactar el journal de tokens para no dejar el snapshot desactualizado
+        try:
+            directory_manager.flush()
+        except Exception as e:
+            print(f"Error guardando tokens de directorios: {e}")
+        log_manager.close()
@@ -0,0 +1,96 @@
+"""Pruebas de los snapshots de configuración y de la recarga desde archivo."""
+
+import json
+
+import pytest
+
+from core.config_manager import ConfigManager
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    return tmp_path / "config" / "config.json"
+
+
+def write_config(path, **changes):
+    config = json.loads(path.read_text(encoding="utf-8"))
+    config.update(changes)
+    path.write_text(json.dumps(config), encoding="utf-8")
+
+
+def test_creates_file_with_defaults(config_path):
+    manager = ConfigManager(str(config_path))
+
+    assert json.loads(config_path.read_text(encoding="utf-8")) == manager.snapshot.to_dict()
+    assert manager.snapshot.version == 0
+
+
+def test_reload_publishes_new_snapshot(config_path):
+    manager = ConfigManager(str(config_path))
+    before = manager.snapshot
+
+    write_config(config_path, maxFileSize=100, urlFilters=["API/", " checkout "])
+
+    assert manager.reload() is True
+    after = manager.snapshot
+    assert after is not before
+    assert after.version == before.version + 1
+    assert after.max_file_size_bytes == 100 * 1024
+    assert after.url_filters == ("api/", "checkout")
+    assert after.url_matcher.search("/api/users")
+    # El snapshot anterior no cambia: los lectores en curso ven una configuración completa
+    assert before.config["maxFileSize"] == 50
+    assert before.url_matcher is None
+
+
+def test_reload_without_changes_keeps_snapshot(config_path):
+    manager = ConfigManager(str(config_path))
+    before = manager.snapshot
+
+    assert manager.reload() is False
+    assert manager.snapshot is before
+
+
+def test_reload_keeps_config_when_file_is_invalid(config_path):
+    manager = ConfigManager(str(config_path))
+    before = manager.snapshot
+
+    config_path.write_text('{"maxFileSize": 10', encoding="utf-8")
+
+    assert manager.reload() is False
+    assert manager.snapshot is before
+
+
+def test_reload_resolves_external_sources(config_path, tmp_path):
+    manager = ConfigManager(str(config_path))
+
+    write_config(config_path, externalSources=[
+        {"name": "nginx", "path": str(tmp_path / "error.log"), "parser": "nginx-error"},
+        {"name": "apagada", "path": str(tmp_path / "off.log"), "enabled": False}
+    ])
+
+    assert manager.reload() is True
+    assert [source["name"] for source in manager.get_external_sources()] == ["nginx"]
+
+
+def test_snapshot_is_read_only(config_path):
+    manager = ConfigManager(str(config_path))
+
+    with pytest.raises(TypeError):
+        manager.get_config()["port"] = 1
+    with pytest.raises(TypeError):
+        manager.get_config()["monitoring"]["enabled"] = True
+    copy = manager.snapshot.to_dict()
+    copy["monitoring"]["enabled"] = True
+    assert manager.get_config()["monitoring"]["enabled"] is False
+
+
+def test_internal_source_name_is_reserved(config_path, tmp_path):
+    manager = ConfigManager(str(config_path))
+
+    with pytest.raises(ValueError):
+        manager.set_external_sources([{"name": "devpipe", "path": str(tmp_path / "a.log")}])
+
+    write_config(config_path, externalSources=[{"name": "devpipe", "path": str(tmp_path / "a.log")}])
+    manager.reload()
+    assert manager.get_external_sources() == []
@@ -0,0 +1,67 @@
+"""Pruebas de la normalización de pilas y de la huella de los errores."""
+
+from core.error_groups import fingerprint, normalize_frame, normalize_message
+
+
+def test_normalize_frame_strips_origin_query_hash_and_location():
+    assert normalize_frame("    at render (https://app.example.com/static/js/main.3f2a1b9c.js?v=12:10:5)") == \
+        "at render (/static/js/main.js)"
+    assert normalize_frame("render@http://localhost:3000/assets/index-BdQq_4o1.js:1:2") == \
+        "render@/assets/index.js"
+    assert normalize_frame("    at Object.<anonymous> (webpack://src/app.js#hash:7)") == \
+        "at Object.<anonymous> (/app.js)"
+
+
+def test_normalize_frame_keeps_plain_names():
+    assert normalize_frame("    at handleClick (/src/components/Button.js:42:13)") == \
+        "at handleClick (/src/components/Button.js)"
+
+
+def test_normalize_message_replaces_identifiers():
+    assert normalize_message("User 123456 not found (id 0123456789abcdef01)\nmás detalle") == \
+        "User <id> not found (id <id>)"
+
+
+def test_same_stack_across_builds_and_messages_shares_fingerprint():
+    first = {
+        "message": "TypeError: Cannot read properties of undefined (reading 'id') for user 12345",
+        "stack_trace": "TypeError: Cannot read properties of undefined\n"
+                       "    at render (https://prod.example.com/js/app.3f2a1b9c.js:10:5)\n"
+                       "    at update (https://prod.example.com/js/app.3f2a1b9c.js:20:1)"
+    }
+    second = {
+        "message": "TypeError: Cannot read properties of undefined (reading 'id') for user 67890",
+        "stack_trace": "TypeError: Cannot read properties of undefined\n"
+                       "    at render (https://staging.example.com/js/app.9e8d7c6b.js:11:7)\n"
+                       "    at update (https://staging.example.com/js/app.9e8d7c6b.js:21:3)"
+    }
+
+    key, error_type, frames = fingerprint(first)
+
+    assert fingerprint(second)[0] == key
+    assert error_type == "TypeError"
+    assert frames == ["at render (/js/app.js)", "at update (/js/app.js)"]
+
+
+def test_different_error_type_or_frames_change_fingerprint():
+    stack = "    at render (/js/app.js:10:5)"
+    base = fingerprint({"message": "TypeError: x", "stack_trace": stack})[0]
+
+    assert fingerprint({"message": "RangeError: x", "stack_trace": stack})[0] != base
+    assert fingerprint({"message": "TypeError: x", "stack_trace": "    at paint (/js/app.js:10:5)"})[0] != base
+
+
+def test_only_first_frames_count():
+    top = "    at a (/js/app.js:1:1)\n    at b (/js/app.js:2:1)"
+
+    assert fingerprint({"message": "Error", "stack_trace": top + "\n    at c (/js/app.js:3:1)"}, max_frames=2)[0] == \
+        fingerprint({"message": "Error", "stack_trace": top + "\n    at d (/js/app.js:4:1)"}, max_frames=2)[0]
+
+
+def test_without_stack_uses_normalized_message():
+    first = fingerprint({"message": "Request 987654 failed at https://api.example.com/v1/items?page=2"})
+    second = fingerprint({"message": "Request 123456 failed at https://api.example.com/v1/items?page=9"})
+
+    assert first[0] == second[0]
+    assert first[1] == "Error"
+    assert first[2] == []
@@ -0,0 +1,117 @@
+"""Pruebas de la lectura del FileWatcher a través de rotaciones."""
+
+import os
+import shutil
+
+import pytest
+
+import core.file_watcher as file_watcher_module
+from core.file_watcher import FileWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    watcher = FileWatcher(checkpoint_file=str(tmp_path / "offsets.json"), backend="polling")
+    yield watcher
+    watcher.stop()
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_reads_only_appended_complete_lines(tmp_path, watcher):
+    log = str(tmp_path / "app.log")
+    append(log, "existente\n")
+    watcher.add_file(log)
+
+    append(log, "uno\ndos a medias")
+    assert watcher.get_new_content(log) == ["uno"]
+    append(log, "\n")
+    assert watcher.get_new_content(log) == ["dos a medias"]
+
+
+def test_rename_rotation_drains_old_file_first(tmp_path, watcher):
+    log = str(tmp_path / "app.log")
+    append(log, "")
+    watcher.add_file(log)
+
+    append(log, "antes 1\nantes 2\nsin salto")
+    os.rename(log, f"{log}.1")
+    append(log, "nuevo 1\n")
+
+    assert watcher.get_new_content(log) == ["antes 1", "antes 2", "sin salto", "nuevo 1"]
+    append(log, "nuevo 2\n")
+    assert watcher.get_new_content(log) == ["nuevo 2"]
+
+
+def test_rename_rotation_drains_beyond_read_limit(tmp_path, watcher, monkeypatch):
+    monkeypatch.setattr(file_watcher_module, "MAX_READ_BYTES", 1024)
+    log = str(tmp_path / "app.log")
+    append(log, "")
+    watcher.add_file(log)
+
+    append(log, "".join(f"línea {n}\n" for n in range(2000)))
+    os.rename(log, f"{log}.1")
+    append(log, "nuevo\n")
+
+    lines = []
+    for _ in range(100):
+        new_lines = watcher.get_new_content(log)
+        if not new_lines:
+            break
+        lines.extend(new_lines)
+
+    assert lines == [f"línea {n}" for n in range(2000)] + ["nuevo"]
+
+
+def test_copytruncate_rotation_rereads_from_start(tmp_path, watcher):
+    log = str(tmp_path / "app.log")
+    append(log, "")
+    watcher.add_file(log)
+
+    append(log, "antes de rotar con una línea bastante larga\n")
+    assert watcher.get_new_content(log) == ["antes de rotar con una línea bastante larga"]
+
+    shutil.copyfile(log, f"{log}.1")
+    with open(log, "r+") as f:
+        f.truncate(0)
+    append(log, "tras truncar\n")
+
+    assert watcher.get_new_content(log) == ["tras truncar"]
+
+
+def test_copytruncate_detected_when_file_regrows_past_offset(tmp_path, watcher):
+    log = str(tmp_path / "app.log")
+    append(log, "")
+    watcher.add_file(log)
+
+    append(log, "corta\n")
+    assert watcher.get_new_content(log) == ["corta"]
+
+    # Truncado y vuelto a crecer por encima del offset antes de la lectura
+    with open(log, "w", encoding="utf-8") as f:
+        f.write("otra primera línea más larga que la anterior\n")
+
+    assert watcher.get_new_content(log) == ["otra primera línea más larga que la anterior"]
+
+
+def test_checkpoint_resumes_after_restart(tmp_path):
+    log = str(tmp_path / "app.log")
+    checkpoint_file = str(tmp_path / "offsets.json")
+    append(log, "")
+
+    first = FileWatcher(checkpoint_file=checkpoint_file, backend="polling")
+    first.add_file(log)
+    append(log, "leída\n")
+    assert first.get_new_content(log) == ["leída"]
+    first.stop()
+
+    append(log, "escrita con el servidor parado\n")
+    second = FileWatcher(checkpoint_file=checkpoint_file, backend="polling")
+    try:
+        second.add_file(log)
+        assert second.get_new_content(log) == ["escrita con el servidor parado"]
+    finally:
+        second.stop()
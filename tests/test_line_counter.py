@@ -0,0 +1,42 @@
+"""Pruebas del contador de líneas incremental."""
+
+from core.line_counter import LineCounter
+
+
+def real_count(path):
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def test_incremental_appends_match_full_count(tmp_path):
+    log = tmp_path / "app.log"
+    counter = LineCounter()
+    log.write_text("".join(f"línea {n}\n" for n in range(10)), encoding="utf-8")
+    assert counter.count_lines(str(log)) == real_count(log)
+
+    for round_number in range(4):
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("".join(f"añadida {round_number}-{n}\n" for n in range(10)))
+        assert counter.count_lines(str(log)) == real_count(log)
+    assert counter._entries[str(log)]["size"] == log.stat().st_size
+
+
+def test_partial_last_line_counts_and_completes(tmp_path):
+    log = tmp_path / "app.log"
+    counter = LineCounter()
+    log.write_text("uno\ndos", encoding="utf-8")
+    assert counter.count_lines(str(log)) == 2
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(" sigue\ntres\n")
+    assert counter.count_lines(str(log)) == real_count(log) == 3
+
+
+def test_truncated_file_is_recounted(tmp_path):
+    log = tmp_path / "app.log"
+    counter = LineCounter()
+    log.write_text("a\nb\nc\n", encoding="utf-8")
+    assert counter.count_lines(str(log)) == 3
+
+    log.write_text("x\n", encoding="utf-8")
+    assert counter.count_lines(str(log)) == 1
@@ -0,0 +1,55 @@
+"""Pruebas de la búsqueda por rango de server_timestamp."""
+
+from datetime import datetime
+
+import pytest
+
+from core.log_manager import LogManager
+
+
+@pytest.fixture
+def log_manager(tmp_path):
+    log_manager = LogManager(str(tmp_path / "logs"))
+    # Cada lote sella el segmento anterior: los rangos salen del manifiesto
+    log_manager.max_file_size = 1
+    log_manager.start()
+    yield log_manager
+    log_manager.close()
+
+
+def write_batches(log_manager, batches, size):
+    written = []
+    for batch in range(batches):
+        logs = [{"level": "info", "message": f"{batch}-{n}"} for n in range(size)]
+        assert log_manager.write_logs(logs) == size
+        written.extend(logs)
+    return written
+
+
+def test_each_record_has_distinct_increasing_server_timestamp(log_manager):
+    written = write_batches(log_manager, 3, 5)
+    timestamps = [log["server_timestamp"] for log in written]
+
+    assert timestamps == sorted(set(timestamps))
+
+
+@pytest.mark.parametrize("durability", ["none", "always"])
+def test_exact_range_finds_every_record_of_sealed_segments(log_manager, durability):
+    log_manager.get_durability = lambda: durability
+    written = write_batches(log_manager, 3, 5)
+
+    for log in written:
+        timestamp = datetime.fromisoformat(log["server_timestamp"])
+        found = log_manager.query_logs(timestamp, timestamp)
+        assert [item["message"] for item in found] == [log["message"]]
+        assert log_manager.count_logs(timestamp, timestamp) == 1
+
+
+def test_range_covering_part_of_a_batch(log_manager):
+    written = write_batches(log_manager, 2, 5)
+    start = datetime.fromisoformat(written[1]["server_timestamp"])
+    end = datetime.fromisoformat(written[6]["server_timestamp"])
+
+    assert log_manager.count_logs(start, end) == 6
+    assert [log["message"] for log in log_manager.query_logs(start, end)] == \
+        [log["message"] for log in reversed(written[1:7])]
@@ -0,0 +1,95 @@
+"""Pruebas del orden del merge de logs internos y fuentes externas."""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.config_manager import ConfigManager
+from core.log_manager import LogManager
+from core.merge_manager import MergeManager
+from core.parallel_parser import iter_sorted
+
+
+@pytest.fixture
+def managers(tmp_path):
+    config_manager = ConfigManager(str(tmp_path / "config" / "config.json"))
+    log_manager = LogManager(str(tmp_path / "logs"))
+    log_manager.start()
+    yield config_manager, log_manager, MergeManager(log_manager, config_manager)
+    log_manager.close()
+
+
+def test_iter_sorted_orders_across_spilled_runs():
+    rng = random.Random(0)
+    base = datetime(2026, 10, 19, 12, 0, 0)
+    records = [{"parsed_timestamp": base + timedelta(seconds=rng.randint(0, 500)), "n": n} for n in range(2500)]
+
+    result = list(iter_sorted(records, run_records=300))
+
+    assert len(result) == len(records)
+    assert [r["parsed_timestamp"] for r in result] == sorted(r["parsed_timestamp"] for r in records)
+
+
+def test_iter_sorted_is_stable_for_equal_timestamps():
+    timestamp = datetime(2026, 10, 19, 12, 0, 0)
+    records = [{"parsed_timestamp": timestamp, "n": n} for n in range(1000)]
+
+    assert [r["n"] for r in iter_sorted(records, run_records=128)] == list(range(1000))
+
+
+def test_merge_orders_unsorted_internal_and_external_logs(tmp_path, managers):
+    config_manager, log_manager, merge_manager = managers
+    # Los clientes envían en orden de llegada, no de timestamp
+    for second in (30, 10, 50, 20):
+        log_manager.write_log({"level": "info", "message": f"client {second}",
+                               "timestamp": f"2026-10-19T12:00:{second:02d}"})
+
+    # Log externo con un salto de reloj hacia atrás
+    external = tmp_path / "debug.log"
+    external.write_text(
+        "[19-Oct-2026 12:00:40] PHP Warning:  external 40\n"
+        "[19-Oct-2026 12:00:05] PHP Notice:  external 05\n"
+        "[19-Oct-2026 12:00:45] PHP Warning:  external 45\n"
+        "[19-Oct-2026 12:00:15] PHP Notice:  external 15\n"
+    )
+    config_manager.set_external_sources([{"name": "wp", "path": str(external), "parser": "wordpress"}])
+
+    logs = list(merge_manager.iter_merged_logs())
+    timestamps = [log["parsed_timestamp"] for log in logs]
+
+    assert len(logs) == 8
+    assert timestamps == sorted(timestamps)
+    assert [log["message"].split()[-1] for log in logs] == ["05", "10", "15", "20", "30", "40", "45", "50"]
+
+
+def test_internal_line_without_timestamp_uses_previous_record(managers):
+    _, _, merge_manager = managers
+    previous = datetime(2026, 10, 19, 12, 0, 0)
+
+    log = merge_manager._parse_internal_line(json.dumps({"message": "sin fecha"}), previous)
+    orphan = merge_manager._parse_internal_line(json.dumps({"message": "sin fecha"}))
+
+    assert log["parsed_timestamp"] == previous
+    # Sin registro anterior el orden es reproducible (no depende de la hora actual)
+    assert orphan["parsed_timestamp"] == datetime.min
+
+
+def test_clear_all_logs_empties_every_configured_source(tmp_path, managers):
+    config_manager, log_manager, merge_manager = managers
+    legacy = tmp_path / "debug.log"
+    nginx_dir = tmp_path / "nginx"
+    nginx_dir.mkdir()
+    for path in (legacy, nginx_dir / "a.log", nginx_dir / "b.log"):
+        path.write_text("[19-Oct-2026 12:00:00] PHP Notice:  x\n")
+    config_manager.set_external_log_path(str(legacy))
+    config_manager.set_external_sources([{"name": "nginx", "path": str(nginx_dir / "*.log"), "parser": "wordpress"}])
+    log_manager.write_log({"level": "info", "message": "interno"})
+
+    results = merge_manager.clear_all_logs()
+
+    assert results["internal_cleared"] and results["external_cleared"]
+    assert sorted(results["sources_cleared"]) == sorted(str(p) for p in (legacy, nginx_dir / "a.log", nginx_dir / "b.log"))
+    assert all(p.read_text() == "" for p in (legacy, nginx_dir / "a.log", nginx_dir / "b.log"))
+    assert list(merge_manager.iter_merged_logs()) == []
@@ -0,0 +1,74 @@
+"""Pruebas del ensamblado de registros multilínea."""
+
+from datetime import datetime
+
+from core.log_parsers import MultilineAssembler, assemble_records, parse_wordpress_line
+
+
+def test_continuation_lines_join_previous_record():
+    lines = [
+        "[19-Oct-2026 12:00:00 UTC] PHP Fatal error:  Uncaught Exception: boom in /var/www/a.php:3",
+        "Stack trace:",
+        "#0 /var/www/index.php(10): run()",
+        "#1 {main}",
+        "  thrown in /var/www/a.php on line 3",
+        "[19-Oct-2026 12:00:01 UTC] PHP Notice:  siguiente",
+    ]
+
+    records = list(assemble_records(lines, parse_wordpress_line))
+
+    assert len(records) == 2
+    assert records[0].level == "error"
+    assert records[0].line_count == 5
+    assert records[0].message.splitlines()[1:] == lines[1:5]
+    assert records[1].message == "PHP Notice:  siguiente"
+
+
+def test_feed_returns_record_only_when_next_one_starts():
+    assembler = MultilineAssembler(parse_wordpress_line)
+
+    assert assembler.feed("[19-Oct-2026 12:00:00 UTC] PHP Warning:  uno") is None
+    assert assembler.feed("continuación") is None
+    completed = assembler.feed("[19-Oct-2026 12:00:05 UTC] PHP Warning:  dos")
+
+    assert completed.message == "PHP Warning:  uno\ncontinuación"
+    assert assembler.flush().message == "PHP Warning:  dos"
+    assert assembler.flush() is None
+
+
+def test_orphan_lines_take_timestamp_of_first_record():
+    records = list(assemble_records([
+        "#3 {main}",
+        "  thrown in /var/www/a.php on line 3",
+        "[19-Oct-2026 12:00:00 UTC] PHP Notice:  primero",
+    ], parse_wordpress_line))
+
+    assert len(records) == 2
+    assert records[0].message == "#3 {main}\n  thrown in /var/www/a.php on line 3"
+    assert records[0].timestamp == records[1].timestamp
+    assert isinstance(records[1].timestamp, datetime)
+
+
+def test_orphan_lines_without_any_record_have_no_timestamp():
+    records = list(assemble_records(["solo continuación"], parse_wordpress_line))
+
+    assert len(records) == 1
+    assert records[0].timestamp is None
+
+
+def test_record_limits_drop_excess_lines():
+    lines = ["[19-Oct-2026 12:00:00 UTC] PHP Warning:  inicio"] + [f"#{n} frame" for n in range(10)]
+
+    record, = assemble_records(lines, parse_wordpress_line, max_record_lines=3)
+
+    assert record.line_count == 11
+    assert record.message.splitlines() == ["PHP Warning:  inicio", "#0 frame", "#1 frame",
+                                           "... [8 líneas omitidas]"]
+
+
+def test_blank_lines_are_ignored():
+    assembler = MultilineAssembler(parse_wordpress_line)
+    assembler.feed("[19-Oct-2026 12:00:00 UTC] PHP Warning:  uno")
+
+    assert assembler.feed("   ") is None
+    assert assembler.flush().line_count == 1
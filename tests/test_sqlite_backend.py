@@ -0,0 +1,89 @@
+"""Pruebas del tail en vivo y la retención con el backend SQLite."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.config_manager import ConfigManager
+from core.directory_manager import DirectoryManager
+from core.log_manager import LogManager
+from core.merge_manager import MergeManager
+from core.merged_tail import MergedTail
+from core.retention import RetentionJanitor
+
+
+@pytest.fixture
+def setup(tmp_path):
+    config_manager = ConfigManager(str(tmp_path / "config" / "config.json"))
+    config_manager.update_config({"storage": {"backend": "sqlite", "sqlitePath": str(tmp_path / "logs.sqlite3")}})
+    directory_manager = DirectoryManager(str(tmp_path / "logs"), str(tmp_path / "config" / "directory_tokens.json"))
+    log_manager = LogManager(str(tmp_path / "logs"), directory_manager, config_manager)
+    log_manager.start()
+    yield config_manager, directory_manager, log_manager
+    log_manager.close()
+
+
+def write(log_manager, messages):
+    assert log_manager.write_logs([{"level": "info", "message": message} for message in messages]) == len(messages)
+    log_manager.get_sqlite_database().flush()
+
+
+def test_live_tail_reads_internal_logs_from_sqlite(setup):
+    config_manager, _, log_manager = setup
+    write(log_manager, ["antes de abrir el tail"])
+    tail = MergedTail(MergeManager(log_manager, config_manager), ["devpipe"], max_lateness_ms=0)
+
+    write(log_manager, ["uno", "dos"])
+    assert [log["message"] for log in tail.poll()] == ["uno", "dos"]
+
+    write(log_manager, ["tres"])
+    assert [log["message"] for log in tail.poll()] == ["tres"]
+    assert tail.poll() == []
+
+
+def test_retention_applies_directory_quota_to_sqlite(setup):
+    config_manager, directory_manager, log_manager = setup
+    write(log_manager, [f"registro {n}" for n in range(200)])
+    database = log_manager.get_sqlite_database()
+    used = database.data_bytes("")
+    config_manager.update_config({"retention": {"maxDirectoryMB": used / 2 / (1024 * 1024)}})
+
+    result = RetentionJanitor(log_manager, directory_manager, config_manager).run_once()
+
+    assert result["errors"] == []
+    assert result["deleted"][0]["reason"] == "directory_quota"
+    assert database.data_bytes("") <= used / 2
+    remaining = [log["message"] for log in log_manager.query_logs(limit=200)]
+    # Se conservan los más recientes
+    assert remaining[0] == "registro 199"
+    assert "registro 0" not in remaining
+
+
+def test_retention_deletes_sqlite_rows_older_than_max_age(setup):
+    config_manager, directory_manager, log_manager = setup
+    old = (datetime.now() - timedelta(hours=5)).isoformat()
+    database = log_manager.get_sqlite_database()
+    database.submit([(old, None, "info", None, "", '{"message": "viejo", "server_timestamp": "%s"}' % old)])
+    write(log_manager, ["nuevo"])
+    config_manager.update_config({"retention": {"maxAgeHours": 1}})
+
+    result = RetentionJanitor(log_manager, directory_manager, config_manager).run_once()
+
+    assert [entry["records"] for entry in result["deleted"]] == [1]
+    assert [log["message"] for log in log_manager.query_logs()] == ["nuevo"]
+
+
+def test_retention_override_of_zero_disables_age_pruning(setup):
+    config_manager, directory_manager, log_manager = setup
+    token = directory_manager.create_token(directory_manager.base_dir + "_app")
+    old = (datetime.now() - timedelta(hours=5)).isoformat()
+    database = log_manager.get_sqlite_database()
+    database.submit([(old, None, "info", None, "", '{"message": "viejo base"}'),
+                     (old, None, "info", None, token, '{"message": "viejo app"}')], wait=True)
+    config_manager.update_config({"retention": {"maxAgeHours": 1,
+                                                "directories": {token: {"maxAgeHours": 0}}}})
+
+    result = RetentionJanitor(log_manager, directory_manager, config_manager).run_once()
+
+    assert [entry["path"].rsplit("#", 1)[1] for entry in result["deleted"]] == ["default"]
+    assert database.data_bytes(token) > 0
@@ -0,0 +1,42 @@
+"""Pruebas de la normalización de zonas horarias en hosts que no están en UTC."""
+
+import json
+import time
+
+import pytest
+
+from core.log_parsers import _parse_timestamp_cached, parse_nginx_access_line, parse_wordpress_line
+from core.merge_manager import MergeManager
+
+
+@pytest.fixture
+def non_utc_host(monkeypatch):
+    # Zona POSIX fija 5 horas al oeste de UTC (sin depender de tzdata)
+    monkeypatch.setenv("TZ", "XYZ+5")
+    time.tzset()
+    _parse_timestamp_cached.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    _parse_timestamp_cached.cache_clear()
+
+
+def test_wordpress_utc_timestamp_is_converted_to_local(non_utc_host):
+    parsed_ts, _, _ = parse_wordpress_line("[19-Oct-2026 17:00:00 UTC] PHP Warning:  x")
+
+    assert parsed_ts.isoformat() == "2026-10-19T12:00:00"
+
+
+def test_wordpress_timestamp_without_zone_stays_local(non_utc_host):
+    parsed_ts, _, _ = parse_wordpress_line("[19-Oct-2026 17:00:00] PHP Warning:  x")
+
+    assert parsed_ts.isoformat() == "2026-10-19T17:00:00"
+
+
+def test_sources_in_different_zones_share_one_timeline(non_utc_host):
+    wordpress, _, _ = parse_wordpress_line("[19-Oct-2026 17:00:00 UTC] PHP Warning:  x")
+    nginx, _, _ = parse_nginx_access_line(
+        '1.2.3.4 - - [19/Oct/2026:19:00:00 +0200] "GET / HTTP/1.1" 200 5')
+    internal = MergeManager()._parse_internal_line(json.dumps({"timestamp": "2026-10-19T17:00:00Z"}))
+
+    assert wordpress == nginx == internal["parsed_timestamp"]